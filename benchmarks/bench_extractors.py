@@ -0,0 +1,64 @@
+"""Compare extraction backends on a corpus: speed and text yield per backend.
+
+Every registered backend for each extension found in the corpus is run
+alone over the matching files.
+Usage: python benchmarks/bench_extractors.py [--corpus fanga_inbox] [--repeat 5]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.extractor import FileExtractor, available_backends  # noqa: E402
+
+
+def corpus_files(corpus: str) -> dict[str, list[str]]:
+    by_ext = defaultdict(list)
+    for root, _, names in os.walk(corpus):
+        for name in sorted(names):
+            if not name.startswith("."):
+                by_ext[os.path.splitext(name)[1].lower()].append(os.path.join(root, name))
+    return by_ext
+
+
+def measure(extractor: FileExtractor, files: list[str], repeat: int) -> dict:
+    results = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [extractor.extract_content(path) for path in files]
+    elapsed = (time.perf_counter() - start) / repeat
+    texts = [r["content"] for r in results if r["type"] == "text"]
+    return {
+        "ms_par_fichier": elapsed * 1000 / len(files),
+        "fichiers_s": len(files) / elapsed if elapsed else float("inf"),
+        "avec_texte": len(texts),
+        "erreurs": sum(r["type"] == "error" for r in results),
+        "caracteres_moyens": sum(map(len, texts)) / len(texts) if texts else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default="fanga_inbox")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    # Scanned files and failing backends would otherwise flood the table
+    logging.getLogger("fanga").setLevel(logging.CRITICAL)
+
+    print(f"{'ext':<6} {'backend':<12} {'fichiers':>8} {'ms/fichier':>11} {'fichiers/s':>11} "
+          f"{'texte':>6} {'erreurs':>8} {'car. moy.':>10}")
+    for ext, files in sorted(corpus_files(args.corpus).items()):
+        for name in available_backends(ext):
+            row = measure(FileExtractor({ext: [name]}), files, args.repeat)
+            print(
+                f"{ext:<6} {name:<12} {len(files):>8} {row['ms_par_fichier']:>11.2f} {row['fichiers_s']:>11.1f} "
+                f"{row['avec_texte']:>6} {row['erreurs']:>8} {row['caracteres_moyens']:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
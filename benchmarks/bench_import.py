@@ -0,0 +1,74 @@
+"""Measure CLI start-up cost in fresh interpreters.
+
+Each target runs in its own subprocess so module caches never carry over.
+Usage: python benchmarks/bench_import.py [--repeat 10] [--profile]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "python -c pass": [sys.executable, "-c", "pass"],
+    "import src.pipeline": [sys.executable, "-c", "import src.pipeline"],
+    "Pipeline() sans appel": [
+        sys.executable, "-c",
+        "from src.pipeline import Pipeline; Pipeline('fanga_inbox', '/tmp/fanga_bench', api_key='x')",
+    ],
+    "main.py --help": [sys.executable, "main.py", "--help"],
+    "import openai (reference)": [sys.executable, "-c", "import openai"],
+}
+
+
+def measure(command: list[str], repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def heaviest_imports(module: str, top: int = 10) -> list[tuple[int, str]]:
+    """Return the cumulative -X importtime cost (us) of the slowest top-level imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--profile", action="store_true", help="List the slowest imports of src.pipeline")
+    args = parser.parse_args()
+
+    print(f"{'cible':<28} {'mediane':>10} {'min':>10}")
+    for label, command in TARGETS.items():
+        try:
+            timings = measure(command, args.repeat)
+        except subprocess.CalledProcessError:
+            print(f"{label:<28} {'echec':>10}")
+            continue
+        print(f"{label:<28} {statistics.median(timings) * 1000:>8.1f}ms {min(timings) * 1000:>8.1f}ms")
+
+    if args.profile:
+        print("\nImports les plus lents (src.pipeline, cumule):")
+        for cumulative, name in heaviest_imports("src.pipeline"):
+            print(f"  {cumulative / 1000:>8.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Micro-benchmark of filename generation over synthetic names.
+
+Compares the per-file generate_name path with the batch generate_names API
+and times sanitize_description on its own.
+Usage: python benchmarks/bench_renamer.py [--count 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.renamer import FileRenamer  # noqa: E402
+from src.utils import CATEGORIES, sanitize_description  # noqa: E402
+
+STEMS = [
+    "facture_station_cocody_mars_2024", "contrat_location_moto", "IMG_20240315_1200",
+    "releve_2024-03-15", "maintenance_batterie_ST-002", "export_transactions_février",
+    "scan_001", "rapport_mensuel_conducteurs", "recu_15-03-2024", "photo station plateau",
+]
+DESCRIPTIONS = [
+    "Facture station Cocody", "Contrat de location moto", "Relevé de transactions",
+    "Maintenance batterie", "Rapport mensuel des conducteurs", "Photo de la station",
+]
+TEXTS = ["", "", "Date : 15/01/2024\nTotal 2050 FCFA", "Fait à Abidjan, le 1er février 2025", "Montant 2030"]
+EXTENSIONS = [".pdf", ".docx", ".xlsx", ".csv", ".jpg", ".png"]
+
+
+def build_inputs(count: int) -> tuple[list[dict], list[dict], list[str]]:
+    rng = random.Random(42)
+    metadatas, classifications, texts = [], [], []
+    for i in range(count):
+        ext = rng.choice(EXTENSIONS)
+        metadatas.append({"filename": f"{rng.choice(STEMS)}_{i % 97}{ext}", "extension": ext})
+        classifications.append({"category": rng.choice(CATEGORIES), "description": rng.choice(DESCRIPTIONS)})
+        texts.append(rng.choice(TEXTS))
+    return metadatas, classifications, texts
+
+
+def timed(label: str, count: int, func) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:>8.2f}s  {count / elapsed:>12,.0f} noms/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    metadatas, classifications, texts = build_inputs(args.count)
+    renamer = FileRenamer()
+    print(f"{args.count:,} noms")
+
+    timed("generate_name (unitaire)", args.count, lambda: [
+        renamer.generate_name(m, c, t) for m, c, t in zip(metadatas, classifications, texts)
+    ])
+    timed("generate_names (lot)", args.count, lambda: renamer.generate_names(metadatas, classifications, texts))
+    timed("sanitize_description", args.count, lambda: [
+        sanitize_description(c["description"]) for c in classifications
+    ])
+
+
+if __name__ == "__main__":
+    main()
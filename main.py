@@ -4,7 +4,8 @@ import sys
 
 from dotenv import load_dotenv
 
-from src.pipeline import Pipeline
+from src.scheduler import SCHEDULE_POLICIES
+from src.utils import PER_FILE_RATE, stop_logging
 
 
 def main():
@@ -13,6 +14,43 @@ def main():
     parser = argparse.ArgumentParser(
         description="Fanga Intelligent File Classifier"
     )
+    parser.add_argument(
+        "command", nargs="?", choices=("run", "plan", "apply", "rethreshold", "rollback", "serve"),
+        default="run",
+        help="run: classify and place (default); plan: classify and write a "
+             "placement plan only; apply: execute a plan without classifying; "
+             "rethreshold: re-bucket a previous run with a new --threshold; "
+             "rollback: undo the file operations of a placement journal; "
+             "serve: classify single files on demand over HTTP",
+    )
+    parser.add_argument(
+        "--journal", type=str, default=None,
+        help="Placement journal undone by 'rollback' (default: latest under <output>/.journal)",
+    )
+    parser.add_argument(
+        "--from-report", type=str, default=None,
+        help="Report read by 'rethreshold' (default: rapport_traitement.json next to --output)",
+    )
+    parser.add_argument(
+        "--plan-file", type=str, default="./plan_traitement.json",
+        help="Placement plan written by 'plan' and read by 'apply' (default: ./plan_traitement.json)",
+    )
+    parser.add_argument(
+        "--host", type=str, default="127.0.0.1",
+        help="Address the 'serve' command listens on (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--port", type=int, default=8765,
+        help="Port the 'serve' command listens on (default: 8765)",
+    )
+    parser.add_argument(
+        "--batch-window-ms", type=float, default=20.0,
+        help="With 'serve', how long concurrent requests are gathered into one model call (default: 20)",
+    )
+    parser.add_argument(
+        "--max-batch", type=int, default=8,
+        help="With 'serve', most files classified in one model call (default: 8)",
+    )
     parser.add_argument(
         "--input", type=str, default="./fanga_inbox",
         help="Path to source folder (default: ./fanga_inbox)",
@@ -35,18 +73,141 @@ def main():
     )
     parser.add_argument(
         "--check-duplicates", action="store_true", default=False,
-        help="Enable duplicate detection via MD5 hash",
+        help="Enable duplicate detection via MD5 hash and perceptual hash",
+    )
+    parser.add_argument(
+        "--phash-distance", type=int, default=6,
+        help="Max Hamming distance between image dHashes to flag a near-duplicate; "
+             "0 keeps MD5-only detection (default: 6)",
+    )
+
+    parser.add_argument(
+        "--max-retries", type=int, default=5,
+        help="Retries per API call on rate limits, timeouts and 5xx (default: 5)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=8,
+        help="Worker threads and upper bound for concurrent API calls (default: 8)",
+    )
+    parser.add_argument(
+        "--cascade-model", type=str, default=os.getenv("OPENAI_CASCADE_MODEL") or None,
+        help="Cheap model tried first; OPENAI_MODEL is only asked below --threshold "
+             "(default: $OPENAI_CASCADE_MODEL, disabled if unset)",
+    )
+    parser.add_argument(
+        "--schedule", type=str, choices=SCHEDULE_POLICIES, default="fifo",
+        help="Processing order: fifo (alphabetical), sjf (cheapest first), "
+             "ljf (largest first), fair (round-robin by type) (default: fifo)",
+    )
+    parser.add_argument(
+        "--memory-budget-mb", type=int, default=0,
+        help="Cap on extracted content and request payloads held in memory "
+             "across workers, in MB (default: 0, unlimited)",
+    )
+    parser.add_argument(
+        "--sandbox", action="store_true", default=False,
+        help="Run extraction in worker subprocesses with time and memory limits",
+    )
+    parser.add_argument(
+        "--extraction-timeout", type=float, default=60.0,
+        help="With --sandbox, seconds before a file's extraction is killed (default: 60)",
+    )
+    parser.add_argument(
+        "--extraction-memory-mb", type=int, default=1024,
+        help="With --sandbox, RSS limit per extraction worker in MB (default: 1024)",
+    )
+    parser.add_argument(
+        "--extractor", action="append", default=[], metavar="EXT=BACKEND[,BACKEND...]",
+        help="Extraction backends to try for an extension, in order, e.g. pdf=pdfplumber "
+             "(default: registered priority, pdf=pdfium,pdfplumber); repeatable",
+    )
+    parser.add_argument(
+        "--extraction-cache", type=str, default=None, metavar="DIR",
+        help="Keep extracted content in DIR/extraction.sqlite, keyed by file content, "
+             "so reruns with another prompt or model skip extraction",
+    )
+    parser.add_argument(
+        "--extraction-cache-mb", type=int, default=1024,
+        help="Size above which least recently used extraction cache entries are evicted (default: 1024)",
+    )
+    parser.add_argument(
+        "--image-triage", action="store_true", default=False,
+        help="Label obvious camera photos and screenshots locally (EXIF, "
+             "screen size, pixel statistics) instead of calling the vision model",
+    )
+    parser.add_argument(
+        "--reuse-index", type=str, default=None, metavar="PATH",
+        help="Embedding index (.npz) of past classifications; near-identical "
+             "documents reuse their label without a chat completion",
+    )
+    parser.add_argument(
+        "--reuse-similarity", type=float, default=0.95,
+        help="Cosine similarity above which a past label is reused (default: 0.95)",
+    )
+    parser.add_argument(
+        "--note-files", action="store_true",
+        help="Also write a _NOTE.txt next to each ambiguous file (review index is always written)",
+    )
+    parser.add_argument(
+        "--log-json", action="store_true",
+        help="Write logs/pipeline.jsonl (one JSON object per line) instead of pipeline.log",
+    )
+    parser.add_argument(
+        "--log-rate", type=float, default=PER_FILE_RATE,
+        help=f"Max per-file INFO log lines per second, 0 for no limit (default: {PER_FILE_RATE:g})",
+    )
+    parser.add_argument(
+        "--coordinate", action="store_true",
+        help="Share the inbox with other nodes: claim files through lease files before processing",
+    )
+    parser.add_argument(
+        "--node-id", type=str, default=None,
+        help="Name of this node in coordinated mode (default: <hostname>-<pid>)",
+    )
+    parser.add_argument(
+        "--lease-ttl", type=float, default=300.0,
+        help="Seconds without renewal after which a node's lease is taken over (default: 300)",
+    )
+    parser.add_argument(
+        "--shard-nodes", type=str, default=None,
+        help="Comma-separated node ids; each node works on its consistent-hash shard first",
+    )
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument(
+        "--record", type=str, default=None, metavar="CASSETTE",
+        help="Record LLM responses to a cassette file for later replay",
+    )
+    cassette.add_argument(
+        "--replay", type=str, default=None, metavar="CASSETTE",
+        help="Serve LLM responses from a recorded cassette (no API calls)",
+    )
+    parser.add_argument(
+        "--replay-latency", action="store_true", default=False,
+        help="With --replay, sleep for the recorded latency of each response",
     )
 
     args = parser.parse_args()
 
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    extractor_backends = None
+    if args.extractor:
+        from src.extractor import FileExtractor, parse_backends
+
+        try:
+            extractor_backends = parse_backends(args.extractor)
+            FileExtractor(extractor_backends)
+        except ValueError as e:
+            parser.error(str(e))
+
+    api_key = os.getenv("OPENAI_API_KEY", "")
+    if not api_key and not args.replay and args.command in ("run", "plan", "serve"):
         print("Error: OPENAI_API_KEY not found. Set it in .env or environment.")
         sys.exit(1)
 
     model = os.getenv("OPENAI_MODEL", "gpt-4o")
 
+    # Imported after argument parsing so --help and usage errors stay instant
+    from src.pipeline import Pipeline
+
     pipeline = Pipeline(
         input_dir=args.input,
         output_dir=args.output,
@@ -54,14 +215,58 @@ def main():
         move=args.move,
         dry_run=args.dry_run,
         check_duplicates=args.check_duplicates,
+        phash_distance=args.phash_distance,
         api_key=api_key,
         model=model,
+        cassette_path=args.record or args.replay,
+        cassette_mode="record" if args.record else "replay",
+        replay_latency=args.replay_latency,
+        max_retries=args.max_retries,
+        workers=args.workers,
+        cascade_model=args.cascade_model,
+        image_triage=args.image_triage,
+        schedule_policy=args.schedule,
+        memory_budget_mb=args.memory_budget_mb,
+        note_files=args.note_files,
+        log_json=args.log_json,
+        log_rate=args.log_rate,
+        coordinate=args.coordinate,
+        node_id=args.node_id,
+        lease_ttl=args.lease_ttl,
+        shard_nodes=args.shard_nodes.split(",") if args.shard_nodes else None,
+        sandbox=args.sandbox,
+        extraction_timeout=args.extraction_timeout,
+        extraction_memory_mb=args.extraction_memory_mb,
+        extraction_cache_path=args.extraction_cache,
+        extraction_cache_mb=args.extraction_cache_mb,
+        extractor_backends=extractor_backends,
+        reuse_index_path=args.reuse_index,
+        reuse_similarity=args.reuse_similarity,
     )
 
-    report = pipeline.run()
-    print(f"\nDone. {report['total_fichiers']} files processed.")
-    print(f"Report saved to rapport_traitement.json")
+    if args.command == "plan":
+        report = pipeline.plan(args.plan_file)
+        summary = f"\nPlan saved to {args.plan_file} ({len(report['fichiers'])} files)."
+    elif args.command == "rethreshold":
+        report = pipeline.rethreshold(args.from_report)
+        moved = report["performance"]["reclassement_seuil"]["fichiers_deplaces"]
+        summary = f"\nDone. {moved} files moved at threshold {args.threshold}."
+    elif args.command == "rollback":
+        counts = pipeline.rollback(args.journal)
+        summary = (
+            f"\nRollback done. {counts['restaures']} files restored, "
+            f"{counts['supprimes']} copies removed, {counts['revues_supprimees']} review entries removed."
+        )
+    elif args.command == "serve":
+        pipeline.serve(args.host, args.port, args.batch_window_ms / 1000, args.max_batch)
+        summary = "\nService stopped."
+    else:
+        report = pipeline.apply(args.plan_file) if args.command == "apply" else pipeline.run()
+        summary = f"\nDone. {report['total_fichiers']} files processed.\nReport saved to rapport_traitement.json"
 
+    # Drain queued log lines before the summary so it prints last
+    stop_logging()
+    print(summary)
 
 if __name__ == "__main__":
     main()
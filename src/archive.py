@@ -0,0 +1,229 @@
+import io
+import logging
+import os
+import tarfile
+import threading
+import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+logger = logging.getLogger("fanga")
+
+# A member of an archive is addressed as "<archive path>::<member name>"
+MEMBER_SEPARATOR = "::"
+ZIP_EXTENSIONS = (".zip",)
+TAR_EXTENSIONS = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+MAX_MEMBER_BYTES = 100 * 1024 * 1024
+MAX_MEMBERS = 10_000
+# Decompressed TAR members kept in memory between reads, least recently used evicted first
+TAR_BUFFER_BYTES = 256 * 1024 * 1024
+
+_tar_buffers: OrderedDict[tuple, bytes] = OrderedDict()
+_tar_buffered_bytes = 0
+_tar_buffer_lock = threading.Lock()
+_tar_pass_locks: dict[str, threading.Lock] = {}
+
+
+class ArchiveMemberTooLarge(ValueError):
+    """Raised when a member decompresses to more than the allowed size."""
+
+
+def is_archive(path: str) -> bool:
+    """True for a ZIP or TAR bundle on disk (not for a member of one)."""
+    name = path.lower()
+    return MEMBER_SEPARATOR not in path and name.endswith(ZIP_EXTENSIONS + TAR_EXTENSIONS)
+
+
+def is_member(path: str) -> bool:
+    return MEMBER_SEPARATOR in path
+
+
+def member_path(archive_path: str, member: str) -> str:
+    return f"{archive_path}{MEMBER_SEPARATOR}{member}"
+
+
+def split_member(path: str) -> tuple[str, str | None]:
+    """Return (archive path, member name), or (path, None) for a plain file."""
+    if MEMBER_SEPARATOR not in path:
+        return path, None
+    archive_path, member = path.split(MEMBER_SEPARATOR, 1)
+    return archive_path, member
+
+
+def list_members(archive_path: str, max_member_bytes: int = MAX_MEMBER_BYTES) -> list[str]:
+    """Return the virtual paths of the regular files in an archive, in archive order.
+
+    Only headers are read. Hidden files, macOS resource forks and members
+    larger than max_member_bytes are skipped.
+    """
+    members = []
+    for name, (size, _) in _member_index(archive_path).items():
+        base = os.path.basename(name)
+        if not base or base.startswith(".") or name.startswith("__MACOSX/"):
+            continue
+        if size > max_member_bytes:
+            logger.warning(
+                f"Skipping {name} in {os.path.basename(archive_path)}: "
+                f"{size // (1024 * 1024)} MB exceeds the member limit"
+            )
+            continue
+        members.append(member_path(archive_path, name))
+        if len(members) >= MAX_MEMBERS:
+            logger.warning(f"{archive_path}: stopping after {MAX_MEMBERS} members")
+            break
+    return members
+
+
+def source_stat(path: str) -> tuple[int, float]:
+    """Return (size in bytes, modification timestamp) of a file or archive member."""
+    archive_path, member = split_member(path)
+    if member is None:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime
+    try:
+        return _member_index(archive_path)[member]
+    except KeyError:
+        raise FileNotFoundError(f"No member {member} in {archive_path}") from None
+
+
+def source_exists(path: str) -> bool:
+    archive_path, _ = split_member(path)
+    return os.path.isfile(archive_path)
+
+
+@contextmanager
+def open_source(path: str):
+    """Open a file or an archive member for binary reading.
+
+    Nothing is written to disk. ZIP members are decompressed as they are
+    read, reached through the central directory. TAR archives have no
+    directory, so a member is served from an in-memory buffer filled by one
+    sequential pass that also buffers the members after it (see _tar_member).
+    """
+    archive_path, member = split_member(path)
+    if member is None:
+        with open(path, "rb") as f:
+            yield f
+    elif archive_path.lower().endswith(ZIP_EXTENSIONS):
+        with zipfile.ZipFile(archive_path) as archive, archive.open(member) as f:
+            yield f
+    else:
+        with io.BytesIO(_tar_member(archive_path, member)) as f:
+            yield f
+
+
+def read_source(path: str, limit: int | None = None, max_member_bytes: int = MAX_MEMBER_BYTES) -> bytes:
+    """Read up to limit bytes (all by default). A member may not exceed max_member_bytes."""
+    with open_source(path) as f:
+        if limit is not None:
+            return f.read(limit)
+        if not is_member(path):
+            return f.read()
+        # Declared sizes can lie; never hold more than the cap in memory
+        data = f.read(max_member_bytes + 1)
+    if len(data) > max_member_bytes:
+        raise ArchiveMemberTooLarge(f"{path} exceeds {max_member_bytes // (1024 * 1024)} MB")
+    return data
+
+
+def as_file(path: str):
+    """Return the path of a plain file, or a seekable in-memory copy of an archive member.
+
+    For libraries (pdfplumber, python-docx, openpyxl, Pillow) that need
+    random access; the copy is bounded by the member size limit.
+    """
+    if not is_member(path):
+        return path
+    return io.BytesIO(read_source(path))
+
+
+def _member_index(archive_path: str) -> dict[str, tuple[int, float]]:
+    stat = os.stat(archive_path)
+    return _read_member_index(archive_path, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=32)
+def _read_member_index(archive_path: str, mtime_ns: int, size: int) -> dict[str, tuple[int, float]]:
+    """Map member name -> (size, mtime) for regular files, read once per archive version."""
+    index = {}
+    if archive_path.lower().endswith(ZIP_EXTENSIONS):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    index[info.filename] = (info.file_size, datetime(*info.date_time).timestamp())
+    else:
+        with tarfile.open(archive_path, "r:*") as archive:
+            for info in archive:
+                if info.isfile():
+                    index[info.name] = (info.size, float(info.mtime))
+    return index
+
+
+def _tar_member(archive_path: str, member: str) -> bytes:
+    """Return a TAR member's bytes (at most MAX_MEMBER_BYTES + 1 of them).
+
+    A miss streams the archive once from the start and buffers the member
+    and the ones after it, up to TAR_BUFFER_BYTES, since the pipeline reads
+    each member several times (sniff, hash, extraction, copy) and in roughly
+    archive order. Without this, every read of a compressed TAR decompressed
+    the whole archive to find its headers.
+    """
+    stat = os.stat(archive_path)
+    version = (archive_path, stat.st_mtime_ns, stat.st_size)
+    data = _buffered(version + (member,))
+    if data is not None:
+        return data
+    with _tar_buffer_lock:
+        pass_lock = _tar_pass_locks.setdefault(archive_path, threading.Lock())
+    with pass_lock:
+        # Another thread's pass may have buffered it meanwhile
+        data = _buffered(version + (member,))
+        if data is not None:
+            return data
+        found = None
+        budget = TAR_BUFFER_BYTES
+        with tarfile.open(archive_path, "r|*") as archive:
+            for info in archive:
+                if found is None and info.name != member:
+                    continue
+                if not info.isfile():
+                    if found is None:
+                        raise FileNotFoundError(f"Not a regular file: {member_path(archive_path, member)}")
+                    continue
+                if found is not None and info.size > min(budget, MAX_MEMBER_BYTES):
+                    break
+                with archive.extractfile(info) as f:
+                    content = f.read(MAX_MEMBER_BYTES + 1)
+                if found is None:
+                    found = content
+                if len(content) <= MAX_MEMBER_BYTES:
+                    _buffer(version + (info.name,), content)
+                    budget -= len(content)
+                if budget <= 0:
+                    break
+    if found is None:
+        raise FileNotFoundError(f"No member {member} in {archive_path}")
+    return found
+
+
+def _buffered(key: tuple) -> bytes | None:
+    with _tar_buffer_lock:
+        data = _tar_buffers.get(key)
+        if data is not None:
+            _tar_buffers.move_to_end(key)
+        return data
+
+
+def _buffer(key: tuple, data: bytes) -> None:
+    global _tar_buffered_bytes
+    with _tar_buffer_lock:
+        previous = _tar_buffers.pop(key, None)
+        if previous is not None:
+            _tar_buffered_bytes -= len(previous)
+        _tar_buffers[key] = data
+        _tar_buffered_bytes += len(data)
+        while _tar_buffered_bytes > TAR_BUFFER_BYTES and len(_tar_buffers) > 1:
+            _, evicted = _tar_buffers.popitem(last=False)
+            _tar_buffered_bytes -= len(evicted)
@@ -0,0 +1,108 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("fanga")
+
+CASSETTE_MODES = ("record", "replay")
+
+
+class Cassette:
+    """Record and replay LLM responses keyed by a request fingerprint.
+
+    The cassette is a gzip-compressed JSON-lines file. Each line holds the
+    fingerprint of a request, the raw response text, the token usage and the
+    latency observed when it was recorded. New entries are appended as an
+    extra gzip member on save, so existing recordings are never rewritten.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", simulate_latency: bool = False):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.simulate_latency = simulate_latency
+
+        self._entries = {}
+        self._pending = []
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+        if os.path.exists(path):
+            self._load()
+        elif mode == "replay":
+            raise FileNotFoundError(f"Cassette not found: {path}")
+
+    @staticmethod
+    def fingerprint(request: dict) -> str:
+        """Return a stable SHA-256 fingerprint of a request payload."""
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, request: dict) -> dict | None:
+        """Return the recorded response for a request, or None if absent."""
+        key = self.fingerprint(request)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        if self.simulate_latency:
+            time.sleep(entry.get("latency", 0.0))
+        return entry
+
+    def record(self, request: dict, content: str | list, usage: dict, latency: float) -> None:
+        """Store a live response so it can be replayed later."""
+        entry = {
+            "fingerprint": self.fingerprint(request),
+            "content": content,
+            "usage": usage,
+            "latency": round(latency, 4),
+        }
+        with self._lock:
+            self._entries[entry["fingerprint"]] = entry
+            self._pending.append(entry)
+            self.recorded += 1
+
+    def save(self) -> None:
+        """Append pending recordings to the cassette file."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            for entry in pending:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        logger.info(f"Cassette saved: {len(pending)} new responses -> {self.path}")
+
+    def stats(self) -> dict:
+        """Return replay/record counters for the report."""
+        return {
+            "mode": self.mode,
+            "reponses_rejouees": self.hits,
+            "reponses_absentes": self.misses if self.mode == "replay" else 0,
+            "reponses_enregistrees": self.recorded,
+        }
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                self._entries[entry["fingerprint"]] = entry
+        logger.info(f"Cassette loaded: {len(self._entries)} responses from {self.path}")
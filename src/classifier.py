@@ -1,10 +1,12 @@
 import json
 import logging
+import threading
 import time
 
-from openai import OpenAI
-
-from src.utils import CATEGORIES
+from src.cassette import Cassette
+from src.concurrency import AdaptiveLimiter
+from src.retry import CircuitBreaker, RetryPolicy, is_rate_limit, is_retryable
+from src.utils import CATEGORIES, PER_FILE
 
 logger = logging.getLogger("fanga")
 
@@ -20,31 +22,126 @@ Classify the given file into exactly one of these categories:
 - Maintenance: Battery maintenance reports, technical intervention logs, equipment status
 - Autre: Anything that doesn't fit the above categories (screenshots, planning, purchase orders, internal docs)
 
+Each user message describes one file: its name, extension and size, then its extracted content or an image.
+
 Respond with valid JSON only, with exactly these fields:
 - "category": one of the categories listed above
 - "confidence": float between 0.0 and 1.0 reflecting genuine certainty
 - "description": short kebab-case label suitable for a filename (max 5 words, no accents, lowercase)
 - "reasoning": brief explanation of your classification choice"""
 
+BATCH_INSTRUCTIONS = """Several files are given, numbered from 1. Respond with valid JSON only, of the form
+{"results": [...]}, with one object per file in the same order, each with exactly the fields above."""
+
+# Requests sharing this key are routed to the same prompt cache. Everything
+# static (system prompt, then batch instructions) comes first and the file
+# itself last, so consecutive requests share the longest possible prefix.
+PROMPT_CACHE_KEY = "fanga-classifier"
+
+
+def _cached_tokens(usage) -> int:
+    """Prompt tokens the provider served from its prefix cache (0 when not reported)."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None)
+    return cached if isinstance(cached, int) else 0
+
 
 class FileClassifier:
     """Classify files using GPT-4o."""
 
-    def __init__(self, api_key: str, model: str = "gpt-4o"):
-        self.client = OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4o",
+        cassette: Cassette | None = None,
+        retry_policy: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+        limiter: AdaptiveLimiter | None = None,
+        cascade_model: str | None = None,
+        escalation_threshold: float = 0.70,
+        embedding_model: str = "text-embedding-3-small",
+    ):
+        self.api_key = api_key
+        self._client = None
+        self._client_lock = threading.Lock()
         self.model = model
+        self.cassette = cassette
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter
+        self.cascade_model = cascade_model
+        self.escalation_threshold = escalation_threshold
+        self.embedding_model = embedding_model
+        self._local = threading.local()
+        self._usage_lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+
+    @property
+    def client(self):
+        """OpenAI client, built on first use so replayed or idle runs never import the SDK."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+
+                    # Retries are handled by retry_policy, not by the SDK
+                    self._client = OpenAI(api_key=self.api_key, max_retries=0)
+        return self._client
+
+    @client.setter
+    def client(self, value) -> None:
+        self._client = value
 
     def classify(self, metadata: dict, content: dict) -> dict:
-        """Send file content to LLM and return structured classification."""
+        """Send file content to LLM and return structured classification.
+
+        With a cascade model configured, the cheap model answers first and the
+        main model is only asked when the cheap answer is below the escalation
+        threshold or names an invalid category.
+        """
+        self._local.retries = 0
+        start = time.perf_counter()
+
+        tier = "complet"
+        if self.cascade_model:
+            result, valid = self._classify_with(self.cascade_model, metadata, content)
+            if valid and result["confidence"] >= self.escalation_threshold:
+                tier = "rapide"
+            else:
+                logger.info(
+                    "Escalating %s to %s (cascade confidence: %s)",
+                    metadata["filename"], self.model, result["confidence"], extra=PER_FILE,
+                )
+
+        if tier == "complet":
+            result, _ = self._classify_with(self.model, metadata, content)
+
+        result["retries"] = self._local.retries
+        result["tier"] = tier
+        result["latency"] = round(time.perf_counter() - start, 3)
+        return result
+
+    def _classify_with(self, model: str, metadata: dict, content: dict) -> tuple[dict, bool]:
+        """Classify with one model. Return the validated result and whether the category was valid."""
         try:
-            result = self._call_llm(metadata, content)
+            result = self._call_llm(metadata, content, model=model)
         except Exception as e:
             logger.error(f"Classification failed for {metadata['filename']}: {e}")
             result = self._fallback(str(e))
+        result["model"] = model
 
+        return self._validate(result)
+
+    @staticmethod
+    def _validate(result: dict) -> tuple[dict, bool]:
+        """Coerce a raw answer into a usable result. Return it and whether the category was valid."""
         # Validate category
         category = result.get("category")
-        if category not in CATEGORIES:
+        valid = category in CATEGORIES
+        if not valid:
             logger.warning(f"Invalid category '{category}', mapping to Autre")
             result["category"] = "Autre"
 
@@ -55,39 +152,206 @@ class FileClassifier:
         except (ValueError, TypeError):
             result["confidence"] = 0.0
 
-        return result
+        return result, valid
 
-    def _call_llm(self, metadata: dict, content: dict, retry: bool = True) -> dict:
+    def _call_llm(self, metadata: dict, content: dict, retry: bool = True, model: str | None = None) -> dict:
         """Make the API call and parse JSON response."""
         user_content = self._build_user_message(metadata, content)
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
+        request = {
+            "model": model or self.model,
+            "messages": [
                 {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": user_content},
             ],
-            temperature=0.2,
-            response_format={"type": "json_object"},
-        )
+            "temperature": 0.2,
+            "response_format": {"type": "json_object"},
+            "prompt_cache_key": PROMPT_CACHE_KEY,
+        }
+        # On the retry pass a recorded response is the one that failed to parse
+        text, usage = self._complete(request, fresh=not retry)
 
-        usage = response.usage
         logger.info(
-            f"Tokens used for {metadata['filename']}: "
-            f"prompt={usage.prompt_tokens}, completion={usage.completion_tokens}"
+            "Tokens used for %s: prompt=%s (cached %s), completion=%s",
+            metadata["filename"], usage["prompt_tokens"], usage.get("cached_tokens", 0),
+            usage["completion_tokens"], extra=PER_FILE,
         )
 
-        text = response.choices[0].message.content
-        time.sleep(0.5)
-
         try:
             return json.loads(text)
         except json.JSONDecodeError:
             if retry:
                 logger.warning(f"JSON parse failed for {metadata['filename']}, retrying")
-                return self._call_llm(metadata, content, retry=False)
+                return self._call_llm(metadata, content, retry=False, model=model)
             raise
 
+    def classify_batch(self, items: list[tuple[dict, dict]]) -> list[dict]:
+        """Classify several (metadata, content) pairs, sending the text ones in a single request.
+
+        Images and a lone text file go through classify(). If the batched
+        answer does not hold one result per file, each file is classified on
+        its own. With a cascade, the cheap model answers the batch and files
+        it is unsure about are escalated one by one to the main model.
+        """
+        results = [None] * len(items)
+        texts = [i for i, (_, content) in enumerate(items) if content.get("type") != "image"]
+        if len(texts) > 1:
+            self._local.retries = 0
+            start = time.perf_counter()
+            model = self.cascade_model or self.model
+            try:
+                answers = self._call_llm_batch([items[i] for i in texts], model)
+            except Exception as e:
+                logger.warning(f"Batched classification of {len(texts)} files failed, classifying one by one: {e}")
+                answers = []
+            latency = round(time.perf_counter() - start, 3)
+            retries = self._local.retries
+            for i, answer in zip(texts, answers):
+                result, valid = self._validate(answer if isinstance(answer, dict) else {})
+                result["model"] = model
+                tier = "complet"
+                if self.cascade_model:
+                    if valid and result["confidence"] >= self.escalation_threshold:
+                        tier = "rapide"
+                    else:
+                        metadata, content = items[i]
+                        self._local.retries = 0
+                        result, _ = self._classify_with(self.model, metadata, content)
+                        retries += self._local.retries
+                result.update(retries=retries, tier=tier, latency=latency, batch=len(texts))
+                results[i] = result
+
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = self.classify(*items[i])
+        return results
+
+    def _call_llm_batch(self, items: list[tuple[dict, dict]], model: str) -> list:
+        """Send text files in one request. Return the raw answers, one per file."""
+        sections = []
+        for number, (metadata, content) in enumerate(items, 1):
+            text = self._build_user_message(metadata, content)[0]["text"]
+            sections.append(f"### File {number}\n{text}")
+        user_text = "\n\n".join(sections)
+        request = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": f"{SYSTEM_PROMPT}\n\n{BATCH_INSTRUCTIONS}"},
+                {"role": "user", "content": [{"type": "text", "text": user_text}]},
+            ],
+            "temperature": 0.2,
+            "response_format": {"type": "json_object"},
+            "prompt_cache_key": PROMPT_CACHE_KEY,
+        }
+        text, usage = self._complete(request)
+        logger.info(
+            "Tokens used for a batch of %d files: prompt=%s (cached %s), completion=%s",
+            len(items), usage["prompt_tokens"], usage.get("cached_tokens", 0), usage["completion_tokens"],
+            extra=PER_FILE,
+        )
+        answers = json.loads(text).get("results")
+        if not isinstance(answers, list) or len(answers) != len(items):
+            raise ValueError(f"expected {len(items)} results, got {len(answers) if isinstance(answers, list) else 0}")
+        return answers
+
+    def _complete(self, request: dict, fresh: bool = False) -> tuple[str, dict]:
+        """Return response text and token usage, from the cassette when possible."""
+        if self.cassette is not None and not (fresh and self.cassette.mode == "record"):
+            entry = self.cassette.lookup(request)
+            if entry is not None:
+                self._count(entry["usage"])
+                return entry["content"], entry["usage"]
+            if self.cassette.mode == "replay":
+                raise LookupError("No recorded response for this request in cassette")
+
+        response, latency = self._create_with_retry(self.client.chat.completions.create, request)
+
+        usage = {
+            "prompt_tokens": response.usage.prompt_tokens,
+            "cached_tokens": _cached_tokens(response.usage),
+            "completion_tokens": response.usage.completion_tokens,
+        }
+        text = response.choices[0].message.content
+
+        if self.cassette is not None:
+            self.cassette.record(request, text, usage, latency)
+
+        self._count(usage)
+        return text, usage
+
+    def _count(self, usage: dict) -> None:
+        with self._usage_lock:
+            self.calls += 1
+            self.prompt_tokens += usage.get("prompt_tokens") or 0
+            self.cached_tokens += usage.get("cached_tokens") or 0
+            self.completion_tokens += usage.get("completion_tokens") or 0
+
+    def token_stats(self) -> dict:
+        """Chat completion token totals, with the share of prompt tokens served from the provider's cache."""
+        with self._usage_lock:
+            return {
+                "appels": self.calls,
+                "jetons_prompt": self.prompt_tokens,
+                "jetons_prompt_en_cache": self.cached_tokens,
+                "jetons_prompt_hors_cache": self.prompt_tokens - self.cached_tokens,
+                "jetons_completion": self.completion_tokens,
+                "taux_cache": round(self.cached_tokens / self.prompt_tokens, 3) if self.prompt_tokens else 0.0,
+            }
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Return one embedding vector per text, in a single API request."""
+        request = {"model": self.embedding_model, "input": texts}
+        if self.cassette is not None:
+            entry = self.cassette.lookup(request)
+            if entry is not None:
+                return entry["content"]
+            if self.cassette.mode == "replay":
+                raise LookupError("No recorded embeddings for this request in cassette")
+
+        response, latency = self._create_with_retry(self.client.embeddings.create, request)
+        vectors = [item.embedding for item in response.data]
+
+        if self.cassette is not None:
+            self.cassette.record(request, vectors, {"prompt_tokens": response.usage.prompt_tokens}, latency)
+        return vectors
+
+    def _create_with_retry(self, create, request: dict):
+        """Call an API endpoint with backoff on transient errors. Return (response, latency)."""
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            token = self.limiter.acquire() if self.limiter else None
+            start = time.perf_counter()
+            try:
+                response = create(**request)
+            except Exception as e:
+                if not is_retryable(e):
+                    self._release(token, "ignored")
+                    self.breaker.record_success()
+                    raise
+                self._release(token, "rate_limited" if is_rate_limit(e) else "error")
+                self.breaker.record_failure()
+                if attempt >= self.retry_policy.max_retries:
+                    raise
+                delay = self.retry_policy.compute_delay(attempt, e)
+                logger.warning(
+                    f"Transient API error ({type(e).__name__}), "
+                    f"retry {attempt + 1}/{self.retry_policy.max_retries} in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                attempt += 1
+                self._local.retries = getattr(self._local, "retries", 0) + 1
+                continue
+
+            latency = time.perf_counter() - start
+            self._release(token, "success")
+            self.breaker.record_success()
+            return response, latency
+
+    def _release(self, token, outcome: str) -> None:
+        if self.limiter is not None and token is not None:
+            self.limiter.release(token, outcome)
+
     def _build_user_message(self, metadata: dict, content: dict) -> list:
         """Build the user message content for the API call."""
         file_info = (
@@ -100,7 +364,7 @@ class FileClassifier:
             ext = metadata["extension"].lstrip(".")
             mime = "jpeg" if ext == "jpg" else ext
             return [
-                {"type": "text", "text": f"{file_info}\n\nClassify this file."},
+                {"type": "text", "text": file_info},
                 {
                     "type": "image_url",
                     "image_url": {
@@ -113,7 +377,7 @@ class FileClassifier:
         return [
             {
                 "type": "text",
-                "text": f"{file_info}\n\nFile content:\n{content.get('content', '')}\n\nClassify this file.",
+                "text": f"{file_info}\n\nFile content:\n{content.get('content', '')}",
             }
         ]
 
@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger("fanga")
+
+
+class AdaptiveLimiter:
+    """AIMD limit on the number of in-flight API calls.
+
+    Each healthy call grows the limit by 1/limit, so the limit climbs by about
+    one per round trip. A 429, a transient error or a latency spike halves it.
+    Only one decrease is applied per generation of calls: requests that were
+    already in flight when the limit dropped cannot trigger a second cut.
+
+    A spike is a latency above latency_tolerance times the smoothed baseline
+    and at least min_spike seconds above it. Every successful call feeds the
+    baseline, spikes included, so a lasting shift in latency (e.g. slow
+    vision calls after fast embeddings) becomes the new normal instead of
+    cutting the limit on every call.
+    """
+
+    def __init__(
+        self,
+        initial: int = 2,
+        min_limit: int = 1,
+        max_limit: int = 8,
+        latency_tolerance: float = 2.0,
+        backoff: float = 0.5,
+        smoothing: float = 0.2,
+        min_spike: float = 0.05,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.min_spike = min_spike
+
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.in_flight = 0
+        self.peak_limit = self.limit
+        self.increases = 0
+        self.decreases = 0
+        self.decisions = deque(maxlen=50)
+
+        self._baseline = None
+        self._generation = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> tuple[float, int]:
+        """Block until a slot is free. Return a token to pass to release()."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            return time.monotonic(), self._generation
+
+    def release(self, token: tuple[float, int], outcome: str = "success") -> None:
+        """Free a slot and adapt the limit.
+
+        outcome is one of "success", "rate_limited", "error" (transient) or
+        "ignored" (a call that says nothing about server health).
+        """
+        start, generation = token
+        latency = time.monotonic() - start
+        with self._cond:
+            self.in_flight -= 1
+
+            if outcome in ("rate_limited", "error"):
+                self._decrease(generation, "429" if outcome == "rate_limited" else "erreur")
+            elif outcome == "success":
+                if self._is_spike(latency):
+                    self._decrease(generation, "latence")
+                else:
+                    self._increase()
+                self._observe_latency(latency)
+
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Return the current limit and recent decisions for the report."""
+        with self._cond:
+            return {
+                "limite_actuelle": int(self.limit),
+                "limite_max_atteinte": int(self.peak_limit),
+                "augmentations": self.increases,
+                "reductions": self.decreases,
+                "latence_reference": round(self._baseline, 3) if self._baseline else None,
+                "decisions": list(self.decisions),
+            }
+
+    def _is_spike(self, latency: float) -> bool:
+        if self._baseline is None:
+            return False
+        return latency > max(self.latency_tolerance * self._baseline, self._baseline + self.min_spike)
+
+    def _observe_latency(self, latency: float) -> None:
+        if self._baseline is None:
+            self._baseline = latency
+        else:
+            self._baseline += self.smoothing * (latency - self._baseline)
+
+    def _increase(self) -> None:
+        if self.limit >= self.max_limit:
+            return
+        previous = int(self.limit)
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        if int(self.limit) > previous:
+            self.increases += 1
+            self.peak_limit = max(self.peak_limit, self.limit)
+            self._log_decision("augmentation", "sain")
+
+    def _decrease(self, generation: int, reason: str) -> None:
+        if generation != self._generation:
+            return
+        self._generation += 1
+        previous = int(self.limit)
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        # Already at the floor: nothing changed, nothing to report
+        if int(self.limit) == previous:
+            return
+        self.decreases += 1
+        self._log_decision("reduction", reason)
+        logger.warning(f"Concurrency limit reduced to {int(self.limit)} ({reason})")
+
+    def _log_decision(self, action: str, reason: str) -> None:
+        self.decisions.append({
+            "t": round(time.time(), 3),
+            "action": action,
+            "raison": reason,
+            "limite": int(self.limit),
+        })
@@ -0,0 +1,146 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from src.archive import open_source, read_source
+from src.extractor import EXTRACTOR_VERSION, MAX_TEXT_LENGTH
+
+logger = logging.getLogger("fanga")
+
+CACHE_DB = "extraction.sqlite"
+DEFAULT_MAX_MB = 1024
+# Eviction frees down to this fraction of the cap so it does not run on every insert
+EVICTION_TARGET = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extraction (
+    cle TEXT PRIMARY KEY,
+    donnees BLOB NOT NULL,
+    taille INTEGER NOT NULL,
+    utilise REAL NOT NULL
+)
+"""
+
+
+class ExtractionCache:
+    """On-disk cache of FileExtractor.extract_content output, independent of the model.
+
+    Entries are keyed by the SHA-256 of the file bytes, the extension used
+    for routing, the backend chain, EXTRACTOR_VERSION and MAX_TEXT_LENGTH,
+    so a renamed or moved file still hits and a change to the extractor
+    misses. Content is stored as zlib-compressed JSON in one SQLite file;
+    least recently used entries are evicted once the total exceeds max_mb.
+    Image results only keep their shape: the base64 payload is rebuilt from
+    the file on a hit rather than stored a second time. Extraction errors
+    are never cached.
+    """
+
+    def __init__(self, directory: str, max_mb: int = DEFAULT_MAX_MB):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, CACHE_DB)
+        self.max_bytes = max_mb * 1024 * 1024
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._lock = threading.Lock()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(taille), 0) FROM extraction").fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+
+    def fetch(self, filepath: str, ext: str, extract, backends: list[str] | None = None) -> dict:
+        """Return the cached content of a file, calling extract(filepath, ext) on a miss.
+
+        backends names the extractor chain used, so switching backends misses.
+        """
+        key = self.key(filepath, ext, backends)
+        content = self.get(key, filepath)
+        if content is None:
+            content = extract(filepath, ext)
+            self.put(key, content)
+        return content
+
+    @staticmethod
+    def key(filepath: str, ext: str, backends: list[str] | None = None) -> str:
+        digest = hashlib.sha256()
+        with open_source(filepath) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        chain = ",".join(backends or ())
+        return f"{digest.hexdigest()}:{ext}:{chain}:{EXTRACTOR_VERSION}:{MAX_TEXT_LENGTH}"
+
+    def get(self, key: str, filepath: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT donnees FROM extraction WHERE cle = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # Committed with the next insert or on flush
+            self._conn.execute("UPDATE extraction SET utilise = ? WHERE cle = ?", (time.time(), key))
+        content = json.loads(zlib.decompress(row[0]))
+        if content["type"] == "image":
+            content["content"] = base64.b64encode(read_source(filepath)).decode("utf-8")
+        return content
+
+    def put(self, key: str, content: dict) -> None:
+        if content.get("type") == "error":
+            return
+        if content.get("type") == "image":
+            content = dict(content, content=None)
+        data = zlib.compress(json.dumps(content, ensure_ascii=False).encode("utf-8"), 6)
+        with self._lock:
+            previous = self._conn.execute("SELECT taille FROM extraction WHERE cle = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extraction (cle, donnees, taille, utilise) VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time()),
+            )
+            self._bytes += len(data) - (previous[0] if previous else 0)
+            self.stored += 1
+            if self._bytes > self.max_bytes:
+                self._evict_locked()
+            self._conn.commit()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "succes": self.hits,
+                "echecs": self.misses,
+                "taux_succes": round(self.hits / lookups, 3) if lookups else 0.0,
+                "ajouts": self.stored,
+                "evictions": self.evicted,
+                "taille_mo": round(self._bytes / (1024 * 1024), 2),
+                "chemin": self.path,
+            }
+
+    def _evict_locked(self) -> None:
+        """Drop least recently used entries until the cache is back under its target size."""
+        target = self.max_bytes * EVICTION_TARGET
+        cursor = self._conn.execute("SELECT cle, taille FROM extraction ORDER BY utilise")
+        victims = []
+        for key, size in cursor:
+            if self._bytes <= target:
+                break
+            victims.append((key,))
+            self._bytes -= size
+        self._conn.executemany("DELETE FROM extraction WHERE cle = ?", victims)
+        self.evicted += len(victims)
+        logger.info(f"Extraction cache: evicted {len(victims)} entries")
@@ -3,161 +3,245 @@ import csv
 import io
 import logging
 import os
+import threading
+import zipfile
+from collections.abc import Callable
 from datetime import datetime
+from typing import NamedTuple
 
+from src.archive import as_file, is_member, open_source, read_source, source_stat
 from src.utils import TEXT_EXTENSIONS, IMAGE_EXTENSIONS
 
 logger = logging.getLogger("fanga")
 
 MAX_TEXT_LENGTH = 1000
+# Bump whenever extract_content output changes; invalidates the extraction cache
+EXTRACTOR_VERSION = 2
+SNIFF_BYTES = 4096
+PDF_PAGES = 2
+# A PDF with less text than this is treated as scanned and sent as an image
+MIN_PDF_TEXT = 20
+# Formats sent as an image when a backend finds no text layer
+SCANNED_TYPES = {".pdf"}
+
+# (offset, signature, extension); ZIP containers are resolved by member names
+MAGIC_SIGNATURES = [
+    (0, b"%PDF-", ".pdf"),
+    (0, b"\x89PNG\r\n\x1a\n", ".png"),
+    (0, b"\xff\xd8\xff", ".jpg"),
+    (0, b"GIF87a", ".gif"),
+    (0, b"GIF89a", ".gif"),
+    (0, b"BM", ".bmp"),
+    (8, b"WEBP", ".webp"),
+    (0, b"PK\x03\x04", ".zip"),
+]
+ZIP_MEMBER_TYPES = [
+    ("word/document.xml", ".docx"),
+    ("xl/workbook.xml", ".xlsx"),
+]
+TEXT_TYPES = {".csv", ".txt"}
+# Short signatures that plain text can start with; a match must also pass a header check
+WEAK_SIGNATURES = {".bmp"}
+# BITMAPCOREHEADER, BITMAPINFOHEADER and its V2 to V5 successors
+BMP_DIB_SIZES = {12, 40, 52, 56, 108, 124}
+EQUIVALENT_EXTENSIONS = {".jpeg": ".jpg"}
+_PDFIUM_LOCK = threading.Lock()
+
+
+class Backend(NamedTuple):
+    """A registered extraction function and the extensions it handles."""
+
+    name: str
+    extensions: tuple[str, ...]
+    extract: Callable[[str], dict | None]
+    priority: int
+
+
+# name -> Backend, and extension -> [(priority, name)] sorted, lowest first
+_BACKENDS: dict[str, Backend] = {}
+_REGISTRY: dict[str, list[tuple[int, str]]] = {}
+
+
+def register_backend(name: str, extensions: tuple[str, ...], priority: int = 50):
+    """Register func(filepath) -> content dict, or None when there is no text layer, for extensions.
+
+    Lower priorities are tried first.
+    """
+    def decorator(func):
+        _BACKENDS[name] = Backend(name, tuple(extensions), func, priority)
+        for ext in extensions:
+            entries = _REGISTRY.setdefault(ext, [])
+            entries.append((priority, name))
+            entries.sort()
+        return func
+    return decorator
+
+
+def available_backends(ext: str) -> list[str]:
+    return [name for _, name in _REGISTRY.get(ext, ())]
+
+
+def parse_backends(specs: list[str]) -> dict[str, list[str]]:
+    """Parse "pdf=pdfium,pdfplumber" style specs into {".pdf": ["pdfium", "pdfplumber"]}."""
+    backends = {}
+    for spec in specs:
+        ext, sep, names = spec.partition("=")
+        if not sep or not names:
+            raise ValueError(f"Expected EXT=BACKEND[,BACKEND...], got {spec!r}")
+        ext = ext.strip().lower()
+        backends[ext if ext.startswith(".") else f".{ext}"] = [n.strip() for n in names.split(",") if n.strip()]
+    return backends
 
 
 class FileExtractor:
-    """Extract metadata and content from files."""
+    """Extract metadata and content from files.
+
+    backends maps an extension to the backend names to try for it, in order,
+    replacing the registered priority order (e.g. {".pdf": ["pdfplumber"]}).
+    """
+
+    def __init__(self, backends: dict[str, list[str]] | None = None):
+        self._chains = {ext: [name for _, name in entries] for ext, entries in _REGISTRY.items()}
+        for ext, names in (backends or {}).items():
+            for name in names:
+                backend = _BACKENDS.get(name)
+                if backend is None or ext not in backend.extensions:
+                    raise ValueError(f"No extractor backend {name!r} for {ext} (available: {available_backends(ext)})")
+            self._chains[ext] = list(names)
 
     def extract_metadata(self, filepath: str) -> dict:
-        """Return file metadata dict."""
-        stat = os.stat(filepath)
-        size = stat.st_size
+        """Return file metadata dict. Archive members report their own size and date."""
+        if is_member(filepath):
+            size, mtime = source_stat(filepath)
+            ctime = mtime
+        else:
+            stat = os.stat(filepath)
+            size, mtime, ctime = stat.st_size, stat.st_mtime, stat.st_ctime
         return {
             "filename": os.path.basename(filepath),
             "extension": os.path.splitext(filepath)[1].lower(),
             "size_bytes": size,
             "size_human": self._human_size(size),
-            "created_date": datetime.fromtimestamp(stat.st_ctime).strftime("%Y-%m-%d"),
-            "modified_date": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d"),
+            "created_date": datetime.fromtimestamp(ctime).strftime("%Y-%m-%d"),
+            "modified_date": datetime.fromtimestamp(mtime).strftime("%Y-%m-%d"),
         }
 
-    def extract_content(self, filepath: str) -> dict:
-        """Extract readable content based on file type."""
-        ext = os.path.splitext(filepath)[1].lower()
-        try:
-            if ext == ".pdf":
-                return self._extract_pdf(filepath)
-            elif ext == ".docx":
-                return self._extract_docx(filepath)
-            elif ext == ".xlsx":
-                return self._extract_xlsx(filepath)
-            elif ext == ".csv":
-                return self._extract_csv(filepath)
-            elif ext in IMAGE_EXTENSIONS:
-                return self._extract_image(filepath)
-            else:
-                return {
-                    "type": "text",
-                    "content": os.path.basename(filepath),
-                    "extraction_method": "filename_only",
-                    "truncated": False,
-                }
-        except Exception as e:
-            logger.error(f"Extraction failed for {filepath}: {e}")
-            return {
-                "type": "error",
-                "content": "",
-                "error": str(e),
-            }
-
-    def _extract_pdf(self, filepath: str) -> dict:
-        import pdfplumber
-
-        text = ""
-        with pdfplumber.open(filepath) as pdf:
-            for page in pdf.pages[:2]:
-                page_text = page.extract_text() or ""
-                text += page_text + "\n"
-
-        text = text.strip()
+    def sniff(self, filepath: str) -> dict:
+        """Detect the real file type from its first bytes.
 
-        # If text extraction yields < 20 chars, fall back to image
-        if len(text) < 20:
-            return self._extract_image(filepath)
+        Returns the declared and detected extensions and a decision:
+        "ok", "corrige" (wrong extension, route by content), "vide" (empty)
+        or "non_supporte" (claims a supported format but matches none).
+        """
+        declared = os.path.splitext(filepath)[1].lower()
+        result = {"extension_declaree": declared, "type_detecte": None, "decision": "ok"}
 
-        truncated = len(text) > MAX_TEXT_LENGTH
-        if truncated:
-            logger.warning(f"Content truncated for {filepath}")
-            text = text[:MAX_TEXT_LENGTH]
+        head = read_source(filepath, SNIFF_BYTES)
+        if not head.strip():
+            result["decision"] = "vide"
+            return result
 
-        return {
-            "type": "text",
-            "content": text,
-            "extraction_method": "pdfplumber",
-            "truncated": truncated,
-        }
-
-    def _extract_docx(self, filepath: str) -> dict:
-        from docx import Document
+        detected = None
+        for offset, signature, ext in MAGIC_SIGNATURES:
+            if head[offset:offset + len(signature)] == signature:
+                if ext in WEAK_SIGNATURES and not self._valid_header(filepath, head, ext):
+                    continue
+                detected = ext
+                break
 
-        doc = Document(filepath)
-        text = "\n".join(p.text for p in doc.paragraphs)
+        if detected == ".zip":
+            try:
+                with zipfile.ZipFile(as_file(filepath)) as archive:
+                    names = set(archive.namelist())
+                detected = next((ext for member, ext in ZIP_MEMBER_TYPES if member in names), ".zip")
+            except zipfile.BadZipFile:
+                detected = None
+        elif detected is None and self._looks_like_text(head):
+            detected = declared if declared in TEXT_TYPES else ".txt"
 
-        truncated = len(text) > MAX_TEXT_LENGTH
-        if truncated:
-            logger.warning(f"Content truncated for {filepath}")
-            text = text[:MAX_TEXT_LENGTH]
+        result["type_detecte"] = detected
+        binary_formats = (TEXT_EXTENSIONS - TEXT_TYPES) | IMAGE_EXTENSIONS
+        if detected is None:
+            if declared in TEXT_EXTENSIONS or declared in IMAGE_EXTENSIONS:
+                result["decision"] = "non_supporte"
+        elif EQUIVALENT_EXTENSIONS.get(declared, declared) != detected:
+            # Plain text under an unknown extension keeps its name and filename-only route
+            if detected != ".txt" or declared in binary_formats:
+                result["decision"] = "corrige"
+        return result
 
-        return {
-            "type": "text",
-            "content": text,
-            "extraction_method": "python-docx",
-            "truncated": truncated,
-        }
+    def extract_content(self, filepath: str, ext: str | None = None) -> dict:
+        """Extract readable content based on file type.
 
-    def _extract_xlsx(self, filepath: str) -> dict:
-        from openpyxl import load_workbook
+        ext overrides the extension taken from the filename, e.g. with the
+        type detected by sniff(). Backends for the extension are tried in
+        order: one that raises (or whose library is missing) hands over to
+        the next; one that returns None has found no text layer, which is
+        final, and scanned formats are then sent as an image.
+        """
+        if ext is None:
+            ext = os.path.splitext(filepath)[1].lower()
+        chain = self._chains.get(ext)
+        if not chain:
+            return {
+                "type": "text",
+                "content": os.path.basename(filepath),
+                "extraction_method": "filename_only",
+                "truncated": False,
+            }
 
-        wb = load_workbook(filepath, read_only=True)
-        lines = [f"Sheets: {', '.join(wb.sheetnames)}"]
-        ws = wb.active
-        for i, row in enumerate(ws.iter_rows(values_only=True)):
-            if i >= 10:
+        errors = []
+        for name in chain:
+            try:
+                result = _BACKENDS[name].extract(filepath)
+            except ImportError as e:
+                logger.debug(f"Extractor backend {name} unavailable: {e}")
+                errors.append(f"{name}: {e}")
+                continue
+            except Exception as e:
+                logger.warning(f"Extractor backend {name} failed on {filepath}: {e}")
+                errors.append(f"{name}: {e}")
+                continue
+            if result is None:
+                if ext in SCANNED_TYPES:
+                    return _extract_image(filepath)
                 break
-            lines.append(" | ".join(str(c) if c is not None else "" for c in row))
-        wb.close()
-
-        text = "\n".join(lines)
-        truncated = len(text) > MAX_TEXT_LENGTH
-        if truncated:
-            logger.warning(f"Content truncated for {filepath}")
-            text = text[:MAX_TEXT_LENGTH]
+            return result
 
+        logger.error(f"Extraction failed for {filepath}: {'; '.join(errors) or 'no content'}")
         return {
-            "type": "text",
-            "content": text,
-            "extraction_method": "openpyxl",
-            "truncated": truncated,
+            "type": "error",
+            "content": "",
+            "error": "; ".join(errors) or "no content",
         }
 
-    def _extract_csv(self, filepath: str) -> dict:
-        lines = []
-        with open(filepath, "r", encoding="utf-8") as f:
-            reader = csv.reader(f)
-            for i, row in enumerate(reader):
-                if i >= 11:
-                    break
-                lines.append(" | ".join(row))
-
-        text = "\n".join(lines)
-        truncated = len(text) > MAX_TEXT_LENGTH
-        if truncated:
-            logger.warning(f"Content truncated for {filepath}")
-            text = text[:MAX_TEXT_LENGTH]
+    def chain(self, ext: str) -> list[str]:
+        """Backend names tried for an extension, in order."""
+        return list(self._chains.get(ext, ()))
 
-        return {
-            "type": "text",
-            "content": text,
-            "extraction_method": "csv",
-            "truncated": truncated,
-        }
+    @classmethod
+    def _valid_header(cls, filepath: str, head: bytes, ext: str) -> bool:
+        """Check the header behind a weak signature (e.g. "BMW,Serie 3" is a CSV, not a bitmap)."""
+        if cls._looks_like_text(head):
+            return False
+        if ext == ".bmp":
+            if len(head) < 18:
+                return False
+            declared_size = int.from_bytes(head[2:6], "little")
+            dib_size = int.from_bytes(head[14:18], "little")
+            return dib_size in BMP_DIB_SIZES and 14 + dib_size <= declared_size <= source_stat(filepath)[0]
+        return True
 
-    def _extract_image(self, filepath: str) -> dict:
-        with open(filepath, "rb") as f:
-            data = base64.b64encode(f.read()).decode("utf-8")
-        return {
-            "type": "image",
-            "content": data,
-            "extraction_method": "vision",
-            "truncated": False,
-        }
+    @staticmethod
+    def _looks_like_text(head: bytes) -> bool:
+        if b"\x00" in head:
+            return False
+        try:
+            head.decode("utf-8")
+        except UnicodeDecodeError as e:
+            # A multi-byte character cut at the end of the sample is still text
+            return e.start >= len(head) - 3
+        return True
 
     @staticmethod
     def _human_size(size_bytes: int) -> str:
@@ -166,3 +250,133 @@ class FileExtractor:
                 return f"{size_bytes:.1f} {unit}"
             size_bytes /= 1024
         return f"{size_bytes:.1f} TB"
+
+
+def _text_result(text: str, method: str, filepath: str) -> dict:
+    truncated = len(text) > MAX_TEXT_LENGTH
+    if truncated:
+        logger.warning(f"Content truncated for {filepath}")
+        text = text[:MAX_TEXT_LENGTH]
+    return {
+        "type": "text",
+        "content": text,
+        "extraction_method": method,
+        "truncated": truncated,
+    }
+
+
+def pdfium_text(filepath: str, pages: int = PDF_PAGES) -> str:
+    """Raw text layer of the first pages through PDFium, without layout analysis."""
+    import pypdfium2
+
+    parts = []
+    # PDFium is not thread-safe
+    with _PDFIUM_LOCK:
+        pdf = pypdfium2.PdfDocument(as_file(filepath))
+        try:
+            for i in range(min(pages, len(pdf))):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                parts.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+    return "\n".join(parts).replace("\r\n", "\n").strip()
+
+
+def pdfium_render(filepath: str, page_index: int = 0, dpi: int = 72):
+    """Render one PDF page to a PIL image through PDFium. None if the page does not exist."""
+    import pypdfium2
+
+    with _PDFIUM_LOCK:
+        pdf = pypdfium2.PdfDocument(as_file(filepath))
+        try:
+            if page_index >= len(pdf):
+                return None
+            page = pdf[page_index]
+            bitmap = page.render(scale=dpi / 72)
+            image = bitmap.to_pil()
+            bitmap.close()
+            page.close()
+            return image
+        finally:
+            pdf.close()
+
+
+@register_backend("pdfium", (".pdf",), priority=10)
+def _extract_pdf_pdfium(filepath: str) -> dict | None:
+    """Raw text layer through PDFium: no layout analysis, several times faster than pdfplumber."""
+    text = pdfium_text(filepath)
+    if len(text) < MIN_PDF_TEXT:
+        return None
+    return _text_result(text, "pdfium", filepath)
+
+
+@register_backend("pdfplumber", (".pdf",), priority=20)
+def _extract_pdf(filepath: str) -> dict | None:
+    import pdfplumber
+
+    text = ""
+    with pdfplumber.open(as_file(filepath)) as pdf:
+        for page in pdf.pages[:PDF_PAGES]:
+            page_text = page.extract_text() or ""
+            text += page_text + "\n"
+
+    text = text.strip()
+    if len(text) < MIN_PDF_TEXT:
+        return None
+    return _text_result(text, "pdfplumber", filepath)
+
+
+@register_backend("python-docx", (".docx",))
+def _extract_docx(filepath: str) -> dict:
+    from docx import Document
+
+    doc = Document(as_file(filepath))
+    return _text_result("\n".join(p.text for p in doc.paragraphs), "python-docx", filepath)
+
+
+@register_backend("openpyxl", (".xlsx",))
+def _extract_xlsx(filepath: str) -> dict:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(as_file(filepath), read_only=True)
+    lines = [f"Sheets: {', '.join(wb.sheetnames)}"]
+    ws = wb.active
+    for i, row in enumerate(ws.iter_rows(values_only=True)):
+        if i >= 10:
+            break
+        lines.append(" | ".join(str(c) if c is not None else "" for c in row))
+    wb.close()
+    return _text_result("\n".join(lines), "openpyxl", filepath)
+
+
+@register_backend("csv", (".csv",))
+def _extract_csv(filepath: str) -> dict:
+    lines = []
+    with open_source(filepath) as raw, io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        for i, row in enumerate(reader):
+            if i >= 11:
+                break
+            lines.append(" | ".join(row))
+    return _text_result("\n".join(lines), "csv", filepath)
+
+
+@register_backend("text", (".txt",))
+def _extract_txt(filepath: str) -> dict:
+    with open_source(filepath) as raw, io.TextIOWrapper(raw, encoding="utf-8", errors="replace") as f:
+        text = f.read(MAX_TEXT_LENGTH + 1)
+    return _text_result(text, "text", filepath)
+
+
+@register_backend("vision", tuple(sorted(IMAGE_EXTENSIONS)))
+def _extract_image(filepath: str) -> dict:
+    data = base64.b64encode(read_source(filepath)).decode("utf-8")
+    return {
+        "type": "image",
+        "content": data,
+        "extraction_method": "vision",
+        "truncated": False,
+    }
@@ -0,0 +1,118 @@
+import logging
+
+from src.archive import as_file
+
+logger = logging.getLogger("fanga")
+
+# Common phone and desktop screen sizes, stored as (short side, long side)
+SCREEN_RESOLUTIONS = {
+    (720, 1280), (720, 1600), (750, 1334), (768, 1366), (828, 1792),
+    (900, 1440), (900, 1600), (864, 1536), (1050, 1680), (1080, 1920),
+    (1080, 2160), (1080, 2220), (1080, 2340), (1080, 2400), (1125, 2436),
+    (1170, 2532), (1179, 2556), (1200, 1920), (1242, 2688), (1284, 2778),
+    (1290, 2796), (1440, 2560), (1440, 3200), (1600, 2560), (2160, 3840),
+}
+
+EXIF_MAKE = 0x010F
+EXIF_MODEL = 0x0110
+EXIF_SOFTWARE = 0x0131
+
+ANALYSIS_SIZE = 256
+EDGE_THRESHOLD = 32
+
+# Natural photos: few identical neighbouring pixels, rich colour histogram
+PHOTO_MAX_FLAT_RATIO = 0.35
+PHOTO_MIN_ENTROPY = 7.0
+# Screenshots: large flat UI areas, small palette
+SCREENSHOT_MIN_FLAT_RATIO = 0.55
+SCREENSHOT_MAX_ENTROPY = 6.0
+# Near-white paper background hints at a photographed document (ID, invoice)
+DOCUMENT_MIN_WHITE_RATIO = 0.30
+
+
+class ImageTriage:
+    """Label obvious camera photos and screenshots locally, before any vision call.
+
+    Returns a classification dict in the same shape as FileClassifier.classify
+    when the signals agree, and None when the image is ambiguous and should
+    go to the model.
+    """
+
+    def analyze(self, filepath: str) -> dict | None:
+        from PIL import Image
+
+        try:
+            with Image.open(as_file(filepath)) as image:
+                exif = image.getexif()
+                width, height = image.size
+                stats = self.pixel_stats(image)
+        except Exception as e:
+            logger.warning(f"Image triage failed for {filepath}: {e}")
+            return None
+
+        camera = " ".join(str(exif.get(tag, "")).strip() for tag in (EXIF_MAKE, EXIF_MODEL)).strip()
+        is_screen_size = (min(width, height), max(width, height)) in SCREEN_RESOLUTIONS
+        summary = (
+            f"{width}x{height}, flat={stats['flat_ratio']:.2f}, "
+            f"entropy={stats['entropy']:.1f}, white={stats['white_ratio']:.2f}"
+        )
+
+        if (
+            camera
+            and stats["flat_ratio"] <= PHOTO_MAX_FLAT_RATIO
+            and stats["entropy"] >= PHOTO_MIN_ENTROPY
+            and stats["white_ratio"] < DOCUMENT_MIN_WHITE_RATIO
+        ):
+            return {
+                "category": "Photos",
+                "confidence": 0.85,
+                "description": "photo",
+                "reasoning": f"Local triage: camera photo ({camera}; {summary})",
+            }
+
+        if (
+            not camera
+            and is_screen_size
+            and stats["flat_ratio"] >= SCREENSHOT_MIN_FLAT_RATIO
+            and stats["entropy"] <= SCREENSHOT_MAX_ENTROPY
+        ):
+            return {
+                "category": "Autre",
+                "confidence": 0.85,
+                "description": "capture-ecran",
+                "reasoning": f"Local triage: screenshot at screen resolution ({summary})",
+            }
+
+        return None
+
+    @staticmethod
+    def pixel_stats(image) -> dict:
+        """Return flat-pixel ratio, colour entropy (bits), edge density and near-white ratio."""
+        import numpy as np
+
+        small = image.convert("RGB")
+        small.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE))
+        pixels = np.asarray(small, dtype=np.int16)
+
+        horizontal = np.abs(np.diff(pixels, axis=1)).sum(axis=2)
+        vertical = np.abs(np.diff(pixels, axis=0)).sum(axis=2)
+        flat_ratio = float((horizontal == 0).mean()) if horizontal.size else 1.0
+        edge_density = float((horizontal > EDGE_THRESHOLD).mean()) if horizontal.size else 0.0
+        if vertical.size:
+            edge_density = (edge_density + float((vertical > EDGE_THRESHOLD).mean())) / 2
+
+        # 4 bits per channel -> 4096-bin colour histogram
+        quantised = pixels >> 4
+        codes = (quantised[..., 0] << 8) | (quantised[..., 1] << 4) | quantised[..., 2]
+        counts = np.bincount(codes.ravel(), minlength=4096)
+        probabilities = counts[counts > 0] / codes.size
+        entropy = float(-(probabilities * np.log2(probabilities)).sum())
+
+        white_ratio = float((pixels.min(axis=2) >= 220).mean())
+
+        return {
+            "flat_ratio": flat_ratio,
+            "entropy": entropy,
+            "edge_density": edge_density,
+            "white_ratio": white_ratio,
+        }
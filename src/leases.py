@@ -0,0 +1,228 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+from src.archive import source_stat
+from src.utils import PER_FILE
+
+logger = logging.getLogger("fanga")
+
+LEASE_DIR = ".fanga_leases"
+DEFAULT_TTL = 300.0
+RING_REPLICAS = 64
+
+
+def default_node_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.sha1(value.encode("utf-8")).digest()[:8], "big")
+
+
+class ConsistentHashRing:
+    """Map keys to nodes so that adding or removing a node only moves ~1/n of the keys."""
+
+    def __init__(self, nodes: list[str], replicas: int = RING_REPLICAS):
+        if not nodes:
+            raise ValueError("A hash ring needs at least one node")
+        points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas))
+        self._keys = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key: str) -> str:
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._nodes[index]
+
+
+class LeaseManager:
+    """Claim inbox files across nodes through lease files on the shared filesystem.
+
+    A claim is an O_EXCL create of <inbox>/.fanga_leases/<key>.lease, which is
+    atomic on local filesystems and NFSv3+. A background thread renews held
+    leases every ttl/3; a lease not renewed for ttl seconds belongs to a
+    crashed node and is taken over by renaming it away, which only one node
+    can do. Finished files get a .done marker keyed by path, size and mtime,
+    so a replaced file is processed again.
+
+    With shard_nodes, files whose consistent hash maps to this node are
+    ordered first; the others are still claimable afterwards, so the shard of
+    a dead node is picked up once the live nodes run out of their own work.
+    """
+
+    def __init__(
+        self,
+        inbox_dir: str,
+        node_id: str | None = None,
+        ttl: float = DEFAULT_TTL,
+        shard_nodes: list[str] | None = None,
+    ):
+        self.inbox_dir = os.path.abspath(inbox_dir)
+        self.node_id = node_id or default_node_id()
+        self.ttl = ttl
+        self.directory = os.path.join(self.inbox_dir, LEASE_DIR)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.ring = None
+        if shard_nodes:
+            nodes = list(dict.fromkeys(shard_nodes))
+            if self.node_id not in nodes:
+                raise ValueError(f"Node {self.node_id} is not among the shard nodes {nodes}")
+            self.ring = ConsistentHashRing(nodes)
+
+        self._held = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat = None
+
+        self.claimed = 0
+        self.taken = 0
+        self.already_done = 0
+        self.expired_taken_over = 0
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._renew_loop, name="lease-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def stop(self) -> None:
+        """Stop renewing and drop any lease still held (unfinished files become claimable)."""
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+        with self._lock:
+            held, self._held = self._held, {}
+        for lease_path in held.values():
+            self._remove(lease_path)
+
+    def order(self, files: list[str]) -> list[str]:
+        """Put this node's shard first, keeping the relative order otherwise."""
+        if self.ring is None:
+            return files
+        own = [f for f in files if self.ring.node_for(self._relative(f)) == self.node_id]
+        owned = set(own)
+        return own + [f for f in files if f not in owned]
+
+    def claim(self, filepath: str) -> bool:
+        """Take the lease on a file. False if it is done or leased by a live node."""
+        key = self._key(filepath)
+        if key is None:
+            return False
+        if os.path.exists(os.path.join(self.directory, key + ".done")):
+            with self._lock:
+                self.already_done += 1
+            return False
+
+        lease_path = os.path.join(self.directory, key + ".lease")
+        for _ in range(2):
+            if self._create(lease_path, filepath):
+                with self._lock:
+                    self._held[filepath] = lease_path
+                    self.claimed += 1
+                return True
+            if not self._break_if_expired(lease_path):
+                break
+        with self._lock:
+            self.taken += 1
+        return False
+
+    def complete(self, filepath: str) -> None:
+        """Mark a claimed file as finished and release its lease."""
+        with self._lock:
+            lease_path = self._held.pop(filepath, None)
+        if lease_path is None:
+            return
+        done_path = lease_path[: -len(".lease")] + ".done"
+        try:
+            os.replace(lease_path, done_path)
+        except FileNotFoundError:
+            # Our lease was taken over after a stall: record completion anyway
+            with open(done_path, "w", encoding="utf-8") as f:
+                json.dump({"noeud": self.node_id, "chemin": self._relative(filepath)}, f)
+
+    def release(self, filepath: str) -> None:
+        """Give a claimed file back without marking it done."""
+        with self._lock:
+            lease_path = self._held.pop(filepath, None)
+        if lease_path is not None:
+            self._remove(lease_path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "noeud": self.node_id,
+                "fichiers_reclames": self.claimed,
+                "fichiers_pris_ailleurs": self.taken,
+                "fichiers_deja_traites": self.already_done,
+                "baux_expires_repris": self.expired_taken_over,
+                "shard": self.ring is not None,
+            }
+
+    def _key(self, filepath: str) -> str | None:
+        try:
+            size, mtime = source_stat(filepath)
+        except OSError:
+            return None
+        return hashlib.sha1(f"{self._relative(filepath)}|{size}|{mtime}".encode("utf-8")).hexdigest()
+
+    def _relative(self, filepath: str) -> str:
+        return os.path.relpath(os.path.abspath(filepath), self.inbox_dir)
+
+    def _create(self, lease_path: str, filepath: str) -> bool:
+        try:
+            fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"noeud": self.node_id, "chemin": self._relative(filepath), "ttl": self.ttl}, f)
+        return True
+
+    def _break_if_expired(self, lease_path: str) -> bool:
+        """Move a stale lease out of the way. True if this node did it."""
+        try:
+            age = time.time() - os.stat(lease_path).st_mtime
+        except FileNotFoundError:
+            # Released meanwhile: try to create it again
+            return True
+        if age < self.ttl:
+            return False
+        stale_path = f"{lease_path}.expired-{self.node_id}"
+        try:
+            os.rename(lease_path, stale_path)
+        except FileNotFoundError:
+            return False
+        if time.time() - os.stat(stale_path).st_mtime < self.ttl:
+            # Another node replaced the stale lease between our stat and rename: put it back
+            try:
+                os.link(stale_path, lease_path)
+            except FileExistsError:
+                pass
+            self._remove(stale_path)
+            return False
+        self._remove(stale_path)
+        with self._lock:
+            self.expired_taken_over += 1
+        logger.warning("Took over expired lease %s", os.path.basename(lease_path), extra=PER_FILE)
+        return True
+
+    def _renew_loop(self) -> None:
+        while not self._stop.wait(self.ttl / 3):
+            with self._lock:
+                held = list(self._held.values())
+            for lease_path in held:
+                try:
+                    os.utime(lease_path)
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,57 @@
+import logging
+import threading
+
+logger = logging.getLogger("fanga")
+
+
+class MemoryBudget:
+    """Counting semaphore over bytes of extracted content and request payloads in flight.
+
+    acquire() blocks until the reservation fits in the budget. A single item
+    larger than the whole budget is still admitted once nothing else is in
+    flight, so oversized files slow the run down instead of deadlocking it.
+    """
+
+    def __init__(self, limit_bytes: int):
+        self.limit_bytes = limit_bytes
+        self.in_use = 0
+        self.peak = 0
+        self.waits = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, nbytes: int) -> int:
+        """Reserve nbytes, blocking while over budget. Return the amount reserved."""
+        with self._cond:
+            if self.in_use and self.in_use + nbytes > self.limit_bytes:
+                self.waits += 1
+                while self.in_use and self.in_use + nbytes > self.limit_bytes:
+                    self._cond.wait()
+            self._take(nbytes)
+        return nbytes
+
+    def resize(self, reserved: int, actual: int) -> int:
+        """Adjust a reservation to the real size once known, without blocking. Return new amount."""
+        with self._cond:
+            if actual > reserved:
+                self._take(actual - reserved)
+            else:
+                self.in_use -= reserved - actual
+                self._cond.notify_all()
+        return actual
+
+    def release(self, nbytes: int) -> None:
+        with self._cond:
+            self.in_use -= nbytes
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        mb = 1024 * 1024
+        return {
+            "budget_mo": round(self.limit_bytes / mb, 1),
+            "pic_mo": round(self.peak / mb, 1),
+            "attentes": self.waits,
+        }
+
+    def _take(self, nbytes: int) -> None:
+        self.in_use += nbytes
+        self.peak = max(self.peak, self.in_use)
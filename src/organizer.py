@@ -1,12 +1,19 @@
 import logging
 import os
 import shutil
+import sys
 from datetime import datetime
 
-from src.utils import CATEGORIES, AMBIGUOUS_FOLDER
+from src.archive import is_member, open_source
+from src.utils import CATEGORIES, AMBIGUOUS_FOLDER, PER_FILE
 
 logger = logging.getLogger("fanga")
 
+# shutil.copy2 uses zero-copy sendfile on Linux; elsewhere it falls back to
+# small userland buffers, so copy with a large buffer instead.
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+_KERNEL_COPY = sys.platform.startswith("linux")
+
 
 class FileOrganizer:
     """Create directory structure and place files."""
@@ -26,19 +33,51 @@ class FileOrganizer:
         new_name: str,
         move: bool = False,
     ) -> str:
-        """Copy or move file to destination. Return final path."""
+        """Copy or move file to destination. Return final path.
+
+        Archive members are always copied, streamed out of the archive.
+        """
         dest_dir = os.path.join(output_base, category)
         dest_path = os.path.join(dest_dir, new_name)
 
-        if move:
+        if move and not is_member(source):
             shutil.move(source, dest_path)
-            logger.info(f"Moved: {source} -> {dest_path}")
+            logger.info("Moved: %s -> %s", source, dest_path, extra=PER_FILE)
         else:
+            self._copy(source, dest_path)
+            logger.info("Copied: %s -> %s", source, dest_path, extra=PER_FILE)
+
+        return dest_path
+
+    @staticmethod
+    def _copy(source: str, dest_path: str) -> None:
+        if is_member(source):
+            with open_source(source) as fsrc, open(dest_path, "wb") as fdst:
+                shutil.copyfileobj(fsrc, fdst, COPY_BUFFER_SIZE)
+            return
+        if _KERNEL_COPY:
             shutil.copy2(source, dest_path)
-            logger.info(f"Copied: {source} -> {dest_path}")
+            return
+        with open(source, "rb") as fsrc, open(dest_path, "wb") as fdst:
+            shutil.copyfileobj(fsrc, fdst, COPY_BUFFER_SIZE)
+        shutil.copystat(source, dest_path)
 
+    def relocate(self, source: str, dest_path: str) -> str:
+        """Move an already placed file within the output tree. Return final path."""
+        os.replace(source, dest_path)
+        logger.info("Relocated: %s -> %s", source, dest_path, extra=PER_FILE)
         return dest_path
 
+    def remove_ambiguity_note(self, dest_folder: str, filename: str) -> bool:
+        """Delete the companion note of a file, if any. Return True if one was removed."""
+        note_path = os.path.join(dest_folder, os.path.splitext(filename)[0] + "_NOTE.txt")
+        try:
+            os.remove(note_path)
+        except FileNotFoundError:
+            return False
+        logger.info("Ambiguity note removed: %s", note_path, extra=PER_FILE)
+        return True
+
     def write_ambiguity_note(
         self,
         dest_folder: str,
@@ -48,8 +87,8 @@ class FileOrganizer:
         confidence: float,
         threshold: float,
         reasoning: str,
-    ) -> None:
-        """Write a companion note file for ambiguous classifications."""
+    ) -> str:
+        """Write a companion note file for ambiguous classifications. Return its path."""
         note_name = os.path.splitext(filename)[0] + "_NOTE.txt"
         note_path = os.path.join(dest_folder, note_name)
 
@@ -64,4 +103,5 @@ class FileOrganizer:
 
         with open(note_path, "w", encoding="utf-8") as f:
             f.write(content)
-        logger.info(f"Ambiguity note written: {note_path}")
+        logger.info("Ambiguity note written: %s", note_path, extra=PER_FILE)
+        return note_path
@@ -0,0 +1,103 @@
+import logging
+import os
+
+from src.archive import as_file
+from src.utils import IMAGE_EXTENSIONS
+
+logger = logging.getLogger("fanga")
+
+HASH_SIZE = 8
+PDF_TEXT_MIN_CHARS = 20
+
+
+def dhash(image, size: int = HASH_SIZE) -> int:
+    """Return the difference hash of a PIL image as a size*size-bit integer.
+
+    The image is reduced to (size+1) x size greyscale pixels and each bit
+    records whether a pixel is brighter than its right-hand neighbour, which
+    survives re-compression, resizing and small exposure changes.
+    """
+    from PIL import Image
+
+    small = image.convert("L").resize((size + 1, size), Image.Resampling.LANCZOS)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def perceptual_hash(filepath: str) -> int | None:
+    """Return the dHash of an image or of the first page of a scanned PDF.
+
+    PDFs with a text layer return None: pages built from the same template
+    look alike at hash resolution even when their content differs. The text
+    check and the render go through PDFium, like the extractor's fast path.
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    try:
+        if ext in IMAGE_EXTENSIONS:
+            from PIL import Image
+
+            with Image.open(as_file(filepath)) as image:
+                return dhash(image)
+        if ext == ".pdf":
+            from src.extractor import pdfium_render, pdfium_text
+
+            if len(pdfium_text(filepath, pages=1)) >= PDF_TEXT_MIN_CHARS:
+                return None
+            image = pdfium_render(filepath, 0, dpi=36)
+            return dhash(image) if image is not None else None
+    except Exception as e:
+        logger.warning(f"Perceptual hash failed for {filepath}: {e}")
+    return None
+
+
+class BKTree:
+    """Burkhard-Keller tree for Hamming-distance queries over integer hashes."""
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item) -> None:
+        node = [value, item, {}]
+        self._size += 1
+        if self._root is None:
+            self._root = node
+            return
+        current = self._root
+        while True:
+            distance = hamming(value, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def query(self, value: int, max_distance: int) -> list[tuple[int, object]]:
+        """Return (distance, item) pairs within max_distance, closest first."""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node_value, item, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= max_distance:
+                found.append((distance, item))
+            # Triangle inequality: only subtrees at |d - k| <= max_distance can match
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        found.sort(key=lambda pair: pair[0])
+        return found
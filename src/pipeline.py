@@ -1,17 +1,36 @@
+import json
 import logging
 import os
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
 from collections import defaultdict
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 
+from src.archive import is_archive, list_members, source_exists
+from src.cassette import Cassette
 from src.classifier import FileClassifier
-from src.extractor import FileExtractor
+from src.concurrency import AdaptiveLimiter
+from src.extractor import MAX_TEXT_LENGTH, FileExtractor
+from src.memory_budget import MemoryBudget
 from src.organizer import FileOrganizer
+from src.plan import load_plan, write_plan
 from src.renamer import FileRenamer
 from src.reporter import ReportGenerator
-from src.utils import AMBIGUOUS_FOLDER, setup_logging, compute_file_hash
+from src.retry import CircuitBreaker, RetryPolicy
+from src.scheduler import schedule
+from src.utils import AMBIGUOUS_FOLDER, IMAGE_EXTENSIONS, PER_FILE, PER_FILE_RATE, setup_logging, compute_file_hash
 
 logger = logging.getLogger("fanga")
 
 
+class SkippedFile(Exception):
+    """Raised when content sniffing rejects a file before extraction."""
+
+
 class Pipeline:
     """Main orchestrator tying all modules together."""
 
@@ -23,8 +42,33 @@ class Pipeline:
         move: bool = False,
         dry_run: bool = False,
         check_duplicates: bool = False,
+        phash_distance: int = 6,
         api_key: str = "",
         model: str = "gpt-4o",
+        cassette_path: str | None = None,
+        cassette_mode: str = "replay",
+        replay_latency: bool = False,
+        max_retries: int = 5,
+        workers: int = 8,
+        cascade_model: str | None = None,
+        reuse_index_path: str | None = None,
+        reuse_similarity: float = 0.95,
+        image_triage: bool = False,
+        sandbox: bool = False,
+        extraction_timeout: float = 60.0,
+        extraction_memory_mb: int = 1024,
+        schedule_policy: str = "fifo",
+        extraction_cache_path: str | None = None,
+        extraction_cache_mb: int = 1024,
+        extractor_backends: dict[str, list[str]] | None = None,
+        memory_budget_mb: int = 0,
+        note_files: bool = False,
+        log_json: bool = False,
+        log_rate: float = PER_FILE_RATE,
+        coordinate: bool = False,
+        node_id: str | None = None,
+        lease_ttl: float = 300.0,
+        shard_nodes: list[str] | None = None,
     ):
         self.input_dir = input_dir
         self.output_dir = output_dir
@@ -32,154 +76,872 @@ class Pipeline:
         self.move = move
         self.dry_run = dry_run
         self.check_duplicates = check_duplicates
+        self.phash_distance = phash_distance
+        self._classifications = {}
+        self.workers = max(1, workers)
+        self.schedule_policy = schedule_policy
+        self.note_files = note_files
+        self.log_json = log_json
+        self.log_rate = log_rate
+        self.leases = None
+        self._lease_options = None
+        if coordinate:
+            self._lease_options = {"node_id": node_id, "ttl": lease_ttl, "shard_nodes": shard_nodes}
+        self.placement = None
+        self.review = None
+        self._placements = {}
+        self._planning = False
+        self._cancel = threading.Event()
+        self._cancel_request = None
+
+        self.cassette = None
+        if cassette_path:
+            self.cassette = Cassette(cassette_path, mode=cassette_mode, simulate_latency=replay_latency)
+
+        self.breaker = CircuitBreaker()
+        self.limiter = AdaptiveLimiter(initial=min(2, self.workers), max_limit=self.workers)
+
+        self.extractor = FileExtractor(extractor_backends)
+        self.sandbox = None
+        self._sandbox_options = None
+        if sandbox:
+            self._sandbox_options = {
+                "workers": min(self.workers, os.cpu_count() or 1),
+                "timeout": extraction_timeout,
+                "max_memory_mb": extraction_memory_mb,
+                "backends": extractor_backends,
+            }
+        self.extraction_cache = None
+        if extraction_cache_path:
+            from src.extraction_cache import ExtractionCache
+
+            self.extraction_cache = ExtractionCache(extraction_cache_path, max_mb=extraction_cache_mb)
+        self.classifier = FileClassifier(
+            api_key=api_key,
+            model=model,
+            cassette=self.cassette,
+            retry_policy=RetryPolicy(max_retries=max_retries),
+            breaker=self.breaker,
+            limiter=self.limiter,
+            cascade_model=cascade_model,
+            escalation_threshold=threshold,
+        )
+        self.reuse_index_path = reuse_index_path
+        self.reuse_similarity = reuse_similarity
+        self.reuse_index = None
+        if reuse_index_path:
+            from src.vector_index import VectorIndex
+
+            self.reuse_index = VectorIndex.load(reuse_index_path)
+
+        self.image_triage = None
+        if image_triage:
+            from src.image_triage import ImageTriage
+
+            self.image_triage = ImageTriage()
+
+        self.memory_budget = None
+        if memory_budget_mb > 0:
+            self.memory_budget = MemoryBudget(memory_budget_mb * 1024 * 1024)
 
-        self.extractor = FileExtractor()
-        self.classifier = FileClassifier(api_key=api_key, model=model)
         self.renamer = FileRenamer()
         self.organizer = FileOrganizer()
         self.reporter = ReportGenerator()
 
     def run(self) -> dict:
         """Execute the full pipeline. Return the report dict."""
-        setup_logging(os.path.join(os.path.dirname(self.output_dir), "logs"))
+        self._setup_logging()
+        start = time.perf_counter()
 
         # Validate input
         if not os.path.isdir(self.input_dir):
             logger.error(f"Input directory not found: {self.input_dir}")
             return self.reporter.generate([], [{"error": "Input directory not found"}])
 
-        # Create output structure
-        self.organizer.setup_output_dirs(self.output_dir)
-
         # Scan files
         files = self._scan_files()
         if not files:
             logger.warning("No files found in input directory")
             return self.reporter.generate([], [])
 
+        results = []
+        errors = []
+        skipped = []
+        # The report keeps the scan order whatever the completion order
+        for _, record in sorted(self._stream(files), key=lambda item: item[0]):
+            status = record.pop("statut") if record.get("statut") in ("erreur", "ignore") else None
+            if status == "erreur":
+                errors.append(record)
+            elif status == "ignore":
+                skipped.append(record)
+            else:
+                results.append(record)
+
+        # Generate and save report; a plan run's only output is the plan file
+        report = self.reporter.generate(results, errors, self._collect_metrics(start), skipped)
+        if not self._planning:
+            # Nodes sharing an output directory each keep their own report
+            report_name = "rapport_traitement.json"
+            if self.leases is not None:
+                report_name = f"rapport_traitement_{self.leases.node_id}.json"
+            report_path = os.path.join(os.path.dirname(self.output_dir), report_name)
+            self.reporter.save(report, report_path)
+
+        logger.info(
+            f"Pipeline complete. {len(results)} files processed, "
+            f"{len(errors)} errors, "
+            f"{sum(1 for r in results if r.get('statut') == 'ambigu')} ambiguous."
+        )
+
+        return report
+
+    def iter_process(self, paths: list[str] | None = None, cancel: threading.Event | None = None) -> Iterator[dict]:
+        """Yield each file's result entry as soon as the file is placed.
+
+        paths defaults to the input directory; archives among them are
+        expanded into their members. Entries come in completion order and
+        have the report's shape; a failed file yields {"statut": "erreur",
+        "erreur": ...} and a rejected one {"statut": "ignore", "raison": ...}.
+        Setting cancel stops queued files from starting; files already in
+        flight are finished, placed and yielded before the generator returns.
+        Closing the generator (e.g. breaking out of the loop) also finishes
+        and places them, but their entries can only be logged. No report is
+        written.
+        """
+        self._setup_logging()
+        if paths is None:
+            if not os.path.isdir(self.input_dir):
+                raise FileNotFoundError(f"Input directory not found: {self.input_dir}")
+            files = self._scan_files()
+        else:
+            files = [member for path in paths for member in self._expand(path)]
+        for _, record in self._stream(files, cancel):
+            yield record
+
+    def _stream(self, files: list[str], cancel: threading.Event | None = None) -> Iterator[tuple[int, dict]]:
+        """Process files, yielding (scan position, entry) as each one completes.
+
+        Subsystems are opened on the first step and closed when the stream is
+        exhausted, cancelled or closed.
+        """
         logger.info(f"Found {len(files)} files to process")
+        # Private stop flag: the caller's event is only read, so it can be reused
+        self._cancel = threading.Event()
+        self._cancel_request = cancel
+        self.organizer.setup_output_dirs(self.output_dir)
+        self.open_sandbox()
 
-        # Duplicate detection
-        duplicates = set()
-        if self.check_duplicates:
-            duplicates = self._find_duplicates(files)
+        if not self.dry_run and not self._planning:
+            self._open_placement()
 
-        results = []
-        errors = []
+        if self._lease_options is not None:
+            from src.leases import LeaseManager
+
+            self.leases = LeaseManager(self.input_dir, **self._lease_options)
+            self.leases.start()
+            logger.info(f"Coordinated mode: node {self.leases.node_id}")
+
+        try:
+            # Duplicate detection
+            duplicates = {}
+            if self.check_duplicates:
+                duplicates = self._find_duplicates(files)
+
+            # Worker threads overlap extraction and classification while the
+            # placement stage copies files on its own pool; the adaptive limiter
+            # decides how many of them may be waiting on the API at once.
+            # Duplicates run after all originals so they can reuse their classification.
+            positions = {filepath: i for i, filepath in enumerate(files)}
+            ordered = schedule(files, self.schedule_policy)
+            if self.leases is not None:
+                ordered = self.leases.order(ordered)
+            submitted = 0
+            pending = {}
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                try:
+                    for phase in ([f for f in ordered if f not in duplicates], [f for f in ordered if f in duplicates]):
+                        for filepath in phase:
+                            submitted += 1
+                            future = pool.submit(self._process_numbered, submitted, len(files), filepath, duplicates)
+                            pending[future] = filepath
+                        for future in as_completed(list(pending)):
+                            filepath = pending.pop(future)
+                            record = self._collect(filepath, future)
+                            if record is not None:
+                                yield positions[filepath], record
+                            if self._cancelled():
+                                break
+                        if self._cancelled():
+                            logger.warning("Processing cancelled; finishing files already in flight")
+                            self._cancel.set()
+                            # cancel() only succeeds on files that have not started
+                            in_flight = {future: pending[future] for future in list(pending) if not future.cancel()}
+                            for future in as_completed(in_flight):
+                                del pending[future]
+                                record = self._collect(in_flight[future], future)
+                                if record is not None:
+                                    yield positions[in_flight[future]], record
+                            return
+                finally:
+                    # Reached on generator close: drop what has not started,
+                    # then finish the running files; their entries can only be logged
+                    self._cancel.set()
+                    for future in pending:
+                        future.cancel()
+                    pool.shutdown(wait=True)
+                    for future, filepath in pending.items():
+                        if not future.cancelled():
+                            self._collect(filepath, future)
+        finally:
+            self.close_sandbox()
+            self._close_placement()
+            if self.leases is not None:
+                self.leases.stop()
+            if self.cassette is not None:
+                self.cassette.save()
+            if self.extraction_cache is not None:
+                self.extraction_cache.flush()
+            if self.reuse_index is not None and not self.dry_run:
+                self.reuse_index.save(self.reuse_index_path)
 
-        for i, filepath in enumerate(files, 1):
-            filename = os.path.basename(filepath)
-            logger.info(f"Processing file {i} of {len(files)}: {filename}")
+    def _collect(self, filepath: str, future: Future) -> dict | None:
+        """Wait for a file's placement and return its entry; None if another node or a cancel took it."""
+        filename = os.path.basename(filepath)
+        try:
+            result = future.result()
+            if result is None:
+                return None
+            if filepath in self._placements:
+                self._placements.pop(filepath).result()
+            logger.info(
+                "%s -> %s/%s (confidence: %s)",
+                filename, result["categorie"], result["nom_final"], result["confiance"], extra=PER_FILE,
+            )
+            return result
+        except SkippedFile as e:
+            logger.warning(f"Skipped {filename}: {e}")
+            return {"nom_original": filename, "statut": "ignore", "raison": str(e)}
+        except Exception as e:
+            logger.error(f"Failed to process {filename}: {e}")
+            return {"nom_original": filename, "statut": "erreur", "erreur": str(e)}
 
+    def _setup_logging(self) -> None:
+        setup_logging(
+            os.path.join(os.path.dirname(self.output_dir), "logs"),
+            json_lines=self.log_json,
+            per_file_rate=self.log_rate,
+        )
+
+    def open_sandbox(self) -> None:
+        """Start the extraction worker processes when sandboxing is enabled."""
+        if self._sandbox_options is not None and self.sandbox is None:
+            from src.sandbox import ExtractionSandbox
+
+            self.sandbox = ExtractionSandbox(**self._sandbox_options)
+
+    def close_sandbox(self) -> None:
+        """Stop the extraction worker processes, if any."""
+        if self.sandbox is not None:
+            self.sandbox.close()
+            self.sandbox = None
+
+    def _open_placement(self) -> None:
+        from src.placement import PlacementStage
+        from src.review_index import ReviewIndex
+
+        self.review = ReviewIndex(os.path.join(self.output_dir, AMBIGUOUS_FOLDER), note_files=self.note_files)
+        self.placement = PlacementStage(self.output_dir, workers=self.workers, move=self.move, review=self.review)
+
+    def _close_placement(self) -> None:
+        if self.placement is not None:
+            self.placement.close()
+        if self.review is not None:
+            self.review.close()
+
+    def rollback(self, journal_path: str | None = None) -> dict:
+        """Undo the file operations recorded in a placement journal (latest by default)."""
+        from src.placement import latest_journal, rollback
+
+        self._setup_logging()
+        journal_path = journal_path or latest_journal(self.output_dir)
+        if journal_path is None:
+            raise FileNotFoundError(f"No placement journal found under {self.output_dir}")
+        logger.info(f"Rolling back {journal_path}")
+        counts = rollback(journal_path)
+        logger.info(
+            f"Rollback complete. {counts['restaures']} restored, {counts['supprimes']} removed, "
+            f"{counts['revues_supprimees']} review entries removed."
+        )
+        return counts
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8765, batch_window: float = 0.02, max_batch: int = 8) -> None:
+        """Serve single-file classification over HTTP until interrupted."""
+        from src.service import ClassificationService, make_server
+
+        self._setup_logging()
+        service = ClassificationService(self, window=batch_window, max_batch=max_batch)
+        server = make_server(service, host, port)
+        logger.info(f"Classification service listening on http://{host}:{server.server_address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            service.close()
+            logger.info(f"Service stopped after {service.requests} requests")
+
+    def plan(self, plan_path: str) -> dict:
+        """Classify every file and write a placement plan instead of touching files.
+
+        No report is saved. Planned names are made unique within the plan and
+        against the output folders as they are now; apply() reserves the real
+        names and reports them.
+        """
+        self._planning = True
+        try:
+            report = self.run()
+        finally:
+            self._planning = False
+        taken = set()
+        for entry in report["fichiers"]:
+            entry["nom_final"] = self._planned_name(entry["dossier"], entry["nom_final"], taken)
+        write_plan(plan_path, report["fichiers"], self.input_dir, self.output_dir, self.threshold)
+        return report
+
+    def _planned_name(self, folder: str, name: str, taken: set[str]) -> str:
+        """Suffix name like resolve_collision, counting names already given out in this plan."""
+        path = os.path.join(self.output_dir, folder, name)
+        base, ext = os.path.splitext(path)
+        counter = 0
+        while path in taken or os.path.exists(path):
+            counter += 1
+            path = f"{base}_{counter:02d}{ext}"
+        taken.add(path)
+        return os.path.basename(path)
+
+    def apply(self, plan_path: str) -> dict:
+        """Execute a placement plan in parallel, with no extraction or classification."""
+        self._setup_logging()
+        start = time.perf_counter()
+
+        plan = load_plan(plan_path)
+        self.threshold = plan.get("seuil", self.threshold)
+        entries = plan["fichiers"]
+        logger.info(f"Applying plan {plan_path}: {len(entries)} files")
+
+        self.organizer.setup_output_dirs(self.output_dir)
+        if not self.dry_run:
+            self._open_placement()
+        pending = [self._apply_entry(entry) for entry in entries]
+
+        results = []
+        errors = []
+        for entry, (new_name, future) in zip(entries, pending):
             try:
-                result = self._process_file(filepath, filename, duplicates)
-                results.append(result)
-                logger.info(
-                    f"{filename} -> {result['categorie']}/{result['nom_final']} "
-                    f"(confidence: {result['confiance']})"
-                )
+                future.result()
+                results.append(dict(entry, nom_final=new_name))
             except Exception as e:
-                logger.error(f"Failed to process {filename}: {e}")
+                logger.error(f"Failed to apply {entry['nom_original']}: {e}")
                 errors.append({
-                    "nom_original": filename,
+                    "nom_original": entry["nom_original"],
                     "erreur": str(e),
                 })
+        self._close_placement()
 
-        # Generate and save report
-        report = self.reporter.generate(results, errors)
+        metrics = {"duree_secondes": round(time.perf_counter() - start, 3)}
+        if self.review is not None:
+            metrics["revue"] = self.review.stats()
+        report = self.reporter.generate(results, errors, metrics)
         report_path = os.path.join(os.path.dirname(self.output_dir), "rapport_traitement.json")
         self.reporter.save(report, report_path)
+        logger.info(f"Plan applied. {len(results)} files placed, {len(errors)} errors.")
+        return report
 
-        logger.info(
-            f"Pipeline complete. {len(results)} files processed, "
-            f"{len(errors)} errors, "
-            f"{sum(1 for r in results if r.get('statut') == 'ambigu')} ambiguous."
-        )
+    def rethreshold(self, report_path: str | None = None) -> dict:
+        """Re-bucket files of a previous run against self.threshold, without reclassifying.
+
+        Only files whose folder changes are moved; review index rows are added
+        or removed accordingly and the report is rewritten in place. Moves are
+        recorded in their own placement journal, so rollback undoes them.
+        """
+        self._setup_logging()
+        start = time.perf_counter()
+        report_path = report_path or os.path.join(os.path.dirname(self.output_dir), "rapport_traitement.json")
 
+        with open(report_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+
+        journal = None
+        if not self.dry_run:
+            from src.placement import PlacementJournal
+            from src.review_index import ReviewIndex
+
+            self.review = ReviewIndex(os.path.join(self.output_dir, AMBIGUOUS_FOLDER), note_files=self.note_files)
+            journal = PlacementJournal.create(self.output_dir)
+        results = []
+        errors = list(previous.get("erreurs", []))
+        moved = 0
+        for entry in previous.get("fichiers", []):
+            try:
+                updated = self._rebucket(entry, journal)
+            except Exception as e:
+                logger.error(f"Failed to re-threshold {entry['nom_original']}: {e}")
+                errors.append({"nom_original": entry["nom_original"], "erreur": str(e)})
+                continue
+            moved += updated is not entry
+            results.append(updated)
+
+        metrics = {
+            "duree_secondes": round(time.perf_counter() - start, 3),
+            "reclassement_seuil": {"seuil": self.threshold, "fichiers_deplaces": moved},
+        }
+        if self.review is not None:
+            self.review.close()
+            metrics["revue"] = self.review.stats()
+        if journal is not None:
+            journal.close()
+            if moved:
+                metrics["placement"] = {"fichiers_places": moved, "journal": journal.path}
+            else:
+                # Nothing to undo: keep rollback pointed at the run's journal
+                os.remove(journal.path)
+        report = self.reporter.generate(results, errors, metrics, previous.get("ignores", []))
+        self.reporter.save(report, report_path)
+        logger.info(f"Re-threshold at {self.threshold} complete. {moved} files moved.")
         return report
 
+    def _rebucket(self, entry: dict, journal) -> dict:
+        """Move one placed file if the threshold changes its folder. Return the updated entry."""
+        current = entry.get("dossier") or (AMBIGUOUS_FOLDER if entry.get("statut") == "ambigu" else entry["categorie"])
+        if entry["confiance"] < self.threshold:
+            target, status = AMBIGUOUS_FOLDER, "ambigu"
+        else:
+            target, status = entry["categorie"], "succes"
+        if target == current:
+            return entry
+
+        source = os.path.join(self.output_dir, current, entry["nom_final"])
+        if not os.path.isfile(source):
+            raise FileNotFoundError(f"Placed file not found: {source}")
+        if self.dry_run:
+            logger.info("[DRY-RUN] Would move %s: %s -> %s", entry["nom_final"], current, target, extra=PER_FILE)
+            return dict(entry, dossier=target, statut=status)
+
+        dest_dir = os.path.join(self.output_dir, target)
+        dest_path = self.renamer.resolve_collision(os.path.join(dest_dir, entry["nom_final"]))
+        op_id = uuid.uuid4().hex
+        journal.log({"id": op_id, "etat": "intent", "op": "relocate", "source": source, "dest": dest_path})
+        try:
+            self.organizer.relocate(source, dest_path)
+        except Exception:
+            journal.log({"id": op_id, "etat": "failed"})
+            raise
+        new_name = os.path.basename(dest_path)
+
+        if current == AMBIGUOUS_FOLDER:
+            row = self.review.get(entry["nom_final"])
+            if self.review.remove(entry["nom_final"]) and row is not None:
+                note = {
+                    "filename": row["fichier"],
+                    "original_name": row["nom_original"],
+                    "suggested_category": row["categorie_suggeree"],
+                    "confidence": row["confiance"],
+                    "threshold": row["seuil"],
+                    "reasoning": row["raisonnement"],
+                }
+                journal.log({"id": op_id, "etat": "revue_retiree", "index": self.review.path, "note": note})
+        if target == AMBIGUOUS_FOLDER:
+            self.review.add(
+                filename=new_name,
+                original_name=entry["nom_original"],
+                suggested_category=entry["categorie"],
+                confidence=entry["confiance"],
+                threshold=self.threshold,
+                reasoning=entry.get("raisonnement") or "",
+            )
+            journal.log({"id": op_id, "etat": "revue", "index": self.review.path, "fichier": new_name})
+        journal.log({"id": op_id, "etat": "done"})
+        return dict(entry, dossier=target, statut=status, nom_final=new_name)
+
+    def _apply_entry(self, entry: dict) -> tuple[str, Future]:
+        """Queue one plan entry on the placement stage. Return the final name and pending operation."""
+        if self.dry_run or not source_exists(entry["chemin_source"]):
+            future = Future()
+            if self.dry_run:
+                logger.info(
+                    "[DRY-RUN] Would place %s -> %s/%s",
+                    entry["nom_original"], entry["dossier"], entry["nom_final"], extra=PER_FILE,
+                )
+                future.set_result(entry["nom_final"])
+            else:
+                future.set_exception(FileNotFoundError(f"Source file not found: {entry['chemin_source']}"))
+            return entry["nom_final"], future
+
+        note = None
+        if entry["dossier"] == AMBIGUOUS_FOLDER:
+            note = {
+                "original_name": entry["nom_original"],
+                "suggested_category": entry["categorie"],
+                "confidence": entry["confiance"],
+                "threshold": self.threshold,
+                "reasoning": entry.get("raisonnement") or "",
+            }
+        return self.placement.submit(entry["chemin_source"], entry["dossier"], entry["nom_final"], note)
+
+    def _collect_metrics(self, start: float) -> dict:
+        """Gather run-level timings and subsystem counters for the report."""
+        metrics = {
+            "duree_secondes": round(time.perf_counter() - start, 3),
+            "disjoncteur": self.breaker.stats(),
+            "concurrence": self.limiter.stats(),
+            "jetons": self.classifier.token_stats(),
+        }
+        if self.placement is not None:
+            metrics["placement"] = {"fichiers_places": self.placement.placed, "journal": self.placement.journal.path}
+            metrics["revue"] = self.review.stats()
+        if self.leases is not None:
+            metrics["coordination"] = self.leases.stats()
+        if self.memory_budget is not None:
+            metrics["memoire"] = self.memory_budget.stats()
+        if self.sandbox is not None:
+            metrics["extraction_isolee"] = self.sandbox.stats()
+        if self.extraction_cache is not None:
+            metrics["cache_extraction"] = self.extraction_cache.stats()
+        if self.reuse_index is not None:
+            metrics["index_vectoriel"] = {"entrees": len(self.reuse_index)}
+        if self.cassette is not None:
+            metrics["cassette"] = self.cassette.stats()
+        return metrics
+
     def _scan_files(self) -> list[str]:
-        """List all non-hidden files in input directory."""
+        """List all non-hidden files in input directory; ZIP and TAR bundles are expanded into their members."""
         files = []
         for name in sorted(os.listdir(self.input_dir)):
             if name.startswith("."):
                 continue
             path = os.path.join(self.input_dir, name)
             if os.path.isfile(path):
-                files.append(path)
+                files.extend(self._expand(path))
         return files
 
-    def _find_duplicates(self, files: list[str]) -> set[str]:
-        """Return set of filepaths that are duplicates (keep first occurrence)."""
+    def _expand(self, path: str) -> list[str]:
+        """Return the members of an archive, or the path itself for any other file."""
+        if not is_archive(path):
+            return [path]
+        name = os.path.basename(path)
+        try:
+            members = list_members(path)
+        except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+            logger.warning(f"Cannot read archive {name}, processing it as a single file: {e}")
+            return [path]
+        logger.info(f"Archive {name}: {len(members)} members")
+        return members
+
+    def _find_duplicates(self, files: list[str]) -> dict[str, str]:
+        """Map each duplicate filepath to the original it copies (first occurrence kept).
+
+        Byte-identical files are matched by MD5. Images and scanned PDFs are
+        also matched by perceptual hash within phash_distance bits, which
+        catches re-compressed or re-photographed copies.
+        """
         hashes = defaultdict(list)
         for f in files:
             h = compute_file_hash(f)
             hashes[h].append(f)
 
-        duplicates = set()
+        duplicates = {}
         for paths in hashes.values():
             if len(paths) > 1:
                 for dup in paths[1:]:
                     logger.warning(f"Duplicate detected: {os.path.basename(dup)}")
-                    duplicates.add(dup)
+                    duplicates[dup] = paths[0]
+
+        if self.phash_distance > 0:
+            from src.perceptual_hash import BKTree, perceptual_hash
+
+            tree = BKTree()
+            for f in files:
+                if f in duplicates:
+                    continue
+                value = perceptual_hash(f)
+                if value is None:
+                    continue
+                matches = tree.query(value, self.phash_distance)
+                if matches:
+                    distance, original = matches[0]
+                    logger.warning(
+                        f"Near-duplicate detected: {os.path.basename(f)} ~ "
+                        f"{os.path.basename(original)} (distance {distance})"
+                    )
+                    duplicates[f] = original
+                else:
+                    tree.add(value, f)
         return duplicates
 
-    def _process_file(self, filepath: str, filename: str, duplicates: set[str]) -> dict:
+    def _process_numbered(self, i: int, total: int, filepath: str, duplicates: dict[str, str]) -> dict | None:
+        """Process one file. None when the run is cancelled or another node holds or finished it."""
+        if self._cancelled():
+            return None
+        if self.leases is not None and not self.leases.claim(filepath):
+            return None
+        filename = os.path.basename(filepath)
+        logger.info("Processing file %d of %d: %s", i, total, filename, extra=PER_FILE)
+        try:
+            result = self._process_file(filepath, filename, duplicates)
+        except BaseException:
+            # Give it back so another run retries it
+            if self.leases is not None:
+                self.leases.release(filepath)
+            raise
+        if self.leases is not None:
+            # The file is done once its copy lands, not when classification returns
+            pending = self._placements.get(filepath)
+            if pending is None:
+                # Dry run or plan: nothing was placed
+                self.leases.release(filepath)
+            else:
+                pending.add_done_callback(lambda future: self._settle_lease(filepath, future))
+        return result
+
+    def _settle_lease(self, filepath: str, placement: Future) -> None:
+        if placement.cancelled() or placement.exception() is not None:
+            self.leases.release(filepath)
+        else:
+            self.leases.complete(filepath)
+
+    def _cancelled(self) -> bool:
+        return self._cancel.is_set() or (self._cancel_request is not None and self._cancel_request.is_set())
+
+    def _process_file(self, filepath: str, filename: str, duplicates: dict[str, str]) -> dict:
         """Process a single file through the pipeline."""
-        is_duplicate = filepath in duplicates
+        original = duplicates.get(filepath)
+        is_duplicate = original is not None
+        metadata, detection = self._sniff(filepath, filename)
 
         # Extract
-        metadata = self.extractor.extract_metadata(filepath)
-        content = self.extractor.extract_content(filepath)
+        classification = None
+        embedding = None
+        text = ""
 
-        if content.get("type") == "error":
-            raise RuntimeError(f"Extraction error: {content.get('error', 'unknown')}")
+        # A duplicate takes the classification of its original, with no API call
+        if is_duplicate and original in self._classifications:
+            classification = dict(
+                self._classifications[original],
+                reasoning=f"Duplicate of {os.path.basename(original)}",
+                tier="doublon",
+                retries=0,
+                latency=0.0,
+            )
+        elif self.image_triage is not None and metadata["extension"] in IMAGE_EXTENSIONS:
+            classification = self._triage_image(filepath, filename)
 
-        # Classify
-        classification = self.classifier.classify(metadata, content)
+        if classification is None:
+            classification, embedding, text = self._extract_and_classify(filepath, filename, metadata)
+        self._classifications[filepath] = classification
 
-        # Determine effective category
+        effective_category, status = self._bucket(filename, classification, embedding)
         confidence = classification["confidence"]
-        if confidence < self.threshold:
-            effective_category = AMBIGUOUS_FOLDER
-            status = "ambigu"
-        else:
-            effective_category = classification["category"]
-            status = "succes"
 
         # Rename
-        new_name = self.renamer.generate_name(metadata, classification)
+        new_name = self.renamer.generate_name(metadata, classification, text)
         if is_duplicate:
             base, ext = os.path.splitext(new_name)
             new_name = f"{base}_DOUBLON{ext}"
 
-        # Place file
-        if not self.dry_run:
-            dest_dir = os.path.join(self.output_dir, effective_category)
-            dest_path = os.path.join(dest_dir, new_name)
-            dest_path = self.renamer.resolve_collision(dest_path)
-            new_name = os.path.basename(dest_path)
-
-            self.organizer.place_file(filepath, self.output_dir, effective_category, new_name, self.move)
-
-            if effective_category == AMBIGUOUS_FOLDER:
-                self.organizer.write_ambiguity_note(
-                    dest_folder=dest_dir,
-                    filename=new_name,
-                    original_name=filename,
-                    suggested_category=classification["category"],
-                    confidence=confidence,
-                    threshold=self.threshold,
-                    reasoning=classification.get("reasoning", ""),
-                )
-        else:
-            logger.info(f"[DRY-RUN] Would place {filename} -> {effective_category}/{new_name}")
+        # Place file; a plan run leaves placement to apply()
+        if self.dry_run:
+            logger.info("[DRY-RUN] Would place %s -> %s/%s", filename, effective_category, new_name, extra=PER_FILE)
+        elif not self._planning:
+            new_name = self._place(filepath, filename, effective_category, new_name, classification)
 
         return {
             "nom_original": filename,
+            "chemin_source": os.path.abspath(filepath),
             "nom_final": new_name,
             "categorie": classification["category"],
+            "dossier": effective_category,
             "confiance": confidence,
             "statut": status,
+            "raisonnement": classification.get("reasoning", ""),
             "doublon": is_duplicate,
+            "doublon_de": os.path.basename(original) if is_duplicate else None,
+            "detection": detection["decision"],
+            "reessais": classification.get("retries", 0),
+            "niveau": classification.get("tier", "complet"),
+            "modele": classification.get("model"),
+            "latence": classification.get("latency", 0.0),
         }
+
+    def classify_path(self, filepath: str, classify=None) -> dict:
+        """Classify one file without placing it. Return its result entry with the suggested name.
+
+        classify replaces FileClassifier.classify, e.g. with the micro-batching
+        submitter of the HTTP service. Raises SkippedFile like a run would.
+        """
+        filename = os.path.basename(filepath)
+        metadata, detection = self._sniff(filepath, filename)
+        classification = None
+        embedding = None
+        text = ""
+        if self.image_triage is not None and metadata["extension"] in IMAGE_EXTENSIONS:
+            classification = self._triage_image(filepath, filename)
+        if classification is None:
+            classification, embedding, text = self._extract_and_classify(filepath, filename, metadata, classify)
+        effective_category, status = self._bucket(filename, classification, embedding)
+        return {
+            "nom_original": filename,
+            "nom_suggere": self.renamer.generate_name(metadata, classification, text),
+            "categorie": classification["category"],
+            "dossier": effective_category,
+            "confiance": classification["confidence"],
+            "statut": status,
+            "description": classification.get("description", ""),
+            "raisonnement": classification.get("reasoning", ""),
+            "detection": detection["decision"],
+            "reessais": classification.get("retries", 0),
+            "niveau": classification.get("tier", "complet"),
+            "modele": classification.get("model"),
+            "latence": classification.get("latency", 0.0),
+            "lot": classification.get("batch", 1),
+        }
+
+    def _sniff(self, filepath: str, filename: str) -> tuple[dict, dict]:
+        """Return (metadata, detection); reject empty or unreadable files before any parsing."""
+        metadata = self.extractor.extract_metadata(filepath)
+        detection = self.extractor.sniff(filepath)
+        if detection["decision"] == "vide":
+            raise SkippedFile("Fichier vide")
+        if detection["decision"] == "non_supporte":
+            raise SkippedFile(f"Contenu non reconnu pour l'extension {detection['extension_declaree']}")
+        if detection["decision"] == "corrige":
+            logger.warning(
+                f"{filename} is really {detection['type_detecte']}, "
+                f"not {detection['extension_declaree']}; routing by content"
+            )
+            metadata["extension"] = detection["type_detecte"]
+        return metadata, detection
+
+    def _bucket(self, filename: str, classification: dict, embedding: list | None) -> tuple[str, str]:
+        """Return (destination folder, status) and index a confident fresh embedding for reuse."""
+        if classification["confidence"] < self.threshold:
+            effective_category = AMBIGUOUS_FOLDER
+            status = "ambigu"
+        else:
+            effective_category = classification["category"]
+            status = "succes"
+
+        if embedding is not None and status == "succes" and classification.get("tier") != "voisin":
+            self.reuse_index.add([embedding], [{
+                "category": classification["category"],
+                "description": classification.get("description", ""),
+                "confidence": classification["confidence"],
+                "source": filename,
+            }])
+        return effective_category, status
+
+    def _extract_and_classify(
+        self, filepath: str, filename: str, metadata: dict, classify=None
+    ) -> tuple[dict, list | None, str]:
+        """Extract content and classify it. Return (classification, embedding or None, extracted text).
+
+        Extracted content and its request payload count against the memory
+        budget from before extraction until the classification returns.
+        """
+        reserved = 0
+        if self.memory_budget is not None:
+            reserved = self.memory_budget.acquire(self._payload_estimate(metadata))
+        try:
+            extract = self.sandbox.extract_content if self.sandbox is not None else self.extractor.extract_content
+            if self.extraction_cache is not None:
+                content = self.extraction_cache.fetch(
+                    filepath, metadata["extension"], extract, self.extractor.chain(metadata["extension"])
+                )
+            else:
+                content = extract(filepath, metadata["extension"])
+            if self.memory_budget is not None:
+                # Content string plus its copy in the serialized request
+                reserved = self.memory_budget.resize(reserved, 2 * len(content.get("content", "")))
+
+            if content.get("type") == "error":
+                raise RuntimeError(f"Extraction error: {content.get('error', 'unknown')}")
+
+            # Classify, reusing the label of a near-identical past document if any
+            classification = None
+            embedding = None
+            if self.reuse_index is not None and content.get("type") == "text" and content.get("content"):
+                classification, embedding = self._reuse_lookup(filename, content["content"])
+            if classification is None:
+                classification = (classify or self.classifier.classify)(metadata, content)
+            text = content["content"] if content.get("type") == "text" else ""
+            return classification, embedding, text
+        finally:
+            if self.memory_budget is not None:
+                self.memory_budget.release(reserved)
+
+    @staticmethod
+    def _payload_estimate(metadata: dict) -> int:
+        """Worst-case bytes held for a file: base64 for images and possibly-scanned PDFs."""
+        size = metadata["size_bytes"]
+        if metadata["extension"] in IMAGE_EXTENSIONS or metadata["extension"] == ".pdf":
+            content_bytes = size * 4 // 3
+        else:
+            content_bytes = min(size, 4 * MAX_TEXT_LENGTH)
+        return 2 * content_bytes
+
+    def _triage_image(self, filepath: str, filename: str) -> dict | None:
+        """Return a local classification for an obvious photo or screenshot, else None."""
+        start = time.perf_counter()
+        result = self.image_triage.analyze(filepath)
+        if result is None:
+            return None
+        logger.info("%s triaged locally as %s, skipping vision call", filename, result["category"], extra=PER_FILE)
+        result.update(tier="local", model=None, retries=0, latency=round(time.perf_counter() - start, 3))
+        return result
+
+    def _reuse_lookup(self, filename: str, text: str) -> tuple[dict | None, list | None]:
+        """Return (reused classification or None, embedding of the text or None)."""
+        try:
+            embedding = self.classifier.embed([text])[0]
+        except Exception as e:
+            logger.warning(f"Embedding failed for {filename}, classifying normally: {e}")
+            return None, None
+
+        matches = self.reuse_index.query(embedding)
+        if not matches or matches[0][0] < self.reuse_similarity:
+            return None, embedding
+
+        score, label = matches[0]
+        logger.info("%s matches %s (similarity %.3f), reusing label", filename, label["source"], score, extra=PER_FILE)
+        return {
+            "category": label["category"],
+            "confidence": label["confidence"],
+            "description": label["description"],
+            "reasoning": f"Reused from {label['source']} (similarity {score:.3f})",
+            "tier": "voisin",
+            "model": self.classifier.embedding_model,
+            "retries": 0,
+            "latency": 0.0,
+        }, embedding
+
+    def _place(
+        self,
+        filepath: str,
+        filename: str,
+        effective_category: str,
+        new_name: str,
+        classification: dict,
+    ) -> str:
+        """Queue the copy or move of a file, indexed for review if ambiguous. Return the reserved final name."""
+        note = None
+        if effective_category == AMBIGUOUS_FOLDER:
+            note = {
+                "original_name": filename,
+                "suggested_category": classification["category"],
+                "confidence": classification["confidence"],
+                "threshold": self.threshold,
+                "reasoning": classification.get("reasoning", ""),
+            }
+        new_name, pending = self.placement.submit(filepath, effective_category, new_name, note)
+        self._placements[filepath] = pending
+        return new_name
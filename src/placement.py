@@ -0,0 +1,233 @@
+import glob
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+
+from src.archive import is_member
+from src.organizer import FileOrganizer
+from src.renamer import FileRenamer
+from src.review_index import ReviewIndex
+from src.utils import PER_FILE
+
+logger = logging.getLogger("fanga")
+
+JOURNAL_DIR = ".journal"
+SYNC_EVERY = 64
+
+
+def _fsync_dir(path: str) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class PlacementJournal:
+    """Append-only JSON-lines intent journal of file operations.
+
+    Every operation is logged as "intent" before it touches the filesystem
+    and as "done" afterwards, so a crashed or failed run can be undone.
+    Lines are flushed immediately; the journal is fsynced together with the
+    destination directories in batches.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, output_dir: str) -> "PlacementJournal":
+        # Microseconds keep journals of back-to-back commands in order
+        name = f"placement_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{uuid.uuid4().hex[:6]}.jsonl"
+        return cls(os.path.join(output_dir, JOURNAL_DIR, name))
+
+    def log(self, entry: dict) -> None:
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def sync(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+
+
+class PlacementStage:
+    """Parallel, journaled placement of files into the output tree.
+
+    Names are reserved under a lock with an empty placeholder so workers can
+    copy or move concurrently without colliding. Destination directories are
+    fsynced in batches of SYNC_EVERY operations and on close. Ambiguous files
+    are recorded in the review index rather than in individual note files.
+    """
+
+    def __init__(self, output_dir: str, workers: int = 4, move: bool = False, review: ReviewIndex | None = None):
+        self.output_dir = output_dir
+        self.move = move
+        self.review = review
+        self.organizer = FileOrganizer()
+        self.renamer = FileRenamer()
+        self.journal = PlacementJournal.create(output_dir)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="placement")
+        self._lock = threading.Lock()
+        self._dirty_dirs = set()
+        self._pending_sync = 0
+        self.placed = 0
+
+    def submit(self, source: str, folder: str, new_name: str, note: dict | None = None) -> tuple[str, Future]:
+        """Reserve a final name and schedule the copy/move. Return the name and the pending operation."""
+        wanted = os.path.join(self.output_dir, folder, new_name)
+        with self._lock:
+            while True:
+                dest_path = self.renamer.resolve_collision(wanted)
+                try:
+                    open(dest_path, "x").close()
+                    break
+                except FileExistsError:
+                    # Another node on the shared output took the name first
+                    continue
+        op_id = uuid.uuid4().hex
+        op = "move" if self._moves(source) else "copy"
+        self.journal.log({"id": op_id, "etat": "intent", "op": op, "source": source, "dest": dest_path})
+        return os.path.basename(dest_path), self._pool.submit(self._execute, op_id, source, folder, dest_path, note)
+
+    def close(self) -> None:
+        """Wait for pending operations, then fsync directories and the journal."""
+        self._pool.shutdown(wait=True)
+        self._sync()
+        self.journal.close()
+        logger.info(f"Placement journal: {self.journal.path}")
+
+    def _execute(self, op_id: str, source: str, folder: str, dest_path: str, note: dict | None) -> str:
+        new_name = os.path.basename(dest_path)
+        try:
+            self.organizer.place_file(source, self.output_dir, folder, new_name, self.move)
+        except Exception:
+            # Drop the placeholder or partial copy, unless a move already landed
+            if (not self._moves(source) or os.path.exists(source)) and os.path.exists(dest_path):
+                os.remove(dest_path)
+            self.journal.log({"id": op_id, "etat": "failed"})
+            raise
+        if note is not None and self.review is not None:
+            self.review.add(filename=new_name, **note)
+            self.journal.log({"id": op_id, "etat": "revue", "index": self.review.path, "fichier": new_name})
+        self.journal.log({"id": op_id, "etat": "done"})
+
+        with self._lock:
+            self.placed += 1
+            self._dirty_dirs.add(os.path.dirname(dest_path))
+            if self._moves(source):
+                self._dirty_dirs.add(os.path.dirname(source))
+            self._pending_sync += 1
+            due = self._pending_sync >= SYNC_EVERY
+        if due:
+            self._sync()
+        return new_name
+
+    def _moves(self, source: str) -> bool:
+        # Members cannot be removed from their archive, so they are copied
+        return self.move and not is_member(source)
+
+    def _sync(self) -> None:
+        with self._lock:
+            dirs, self._dirty_dirs = self._dirty_dirs, set()
+            self._pending_sync = 0
+        for directory in dirs:
+            _fsync_dir(directory)
+        self.journal.sync()
+
+
+def latest_journal(output_dir: str) -> str | None:
+    """Return the most recent journal that has not been rolled back yet."""
+    journals = sorted(glob.glob(os.path.join(output_dir, JOURNAL_DIR, "placement_*.jsonl")))
+    return journals[-1] if journals else None
+
+
+def rollback(journal_path: str) -> dict:
+    """Undo every journaled operation, newest first. Return counters.
+
+    Moved and relocated files go back to their source, copies are deleted
+    and their rows are dropped from the review index; rows a relocation
+    removed are indexed again. The journal is renamed with a .rolledback
+    suffix so it is not replayed twice.
+    """
+    operations = {}
+    order = []
+    with open(journal_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if entry["etat"] == "intent":
+                operations[entry["id"]] = dict(entry, revue=[], retirees=[])
+                order.append(entry["id"])
+            elif entry["etat"] == "revue":
+                operations[entry["id"]]["revue"].append((entry["index"], entry["fichier"]))
+            elif entry["etat"] == "revue_retiree":
+                operations[entry["id"]]["retirees"].append((entry["index"], entry["note"]))
+            elif entry["etat"] == "failed":
+                order.remove(entry["id"])
+
+    counts = {"restaures": 0, "supprimes": 0, "revues_supprimees": 0, "absents": 0}
+    indexes = {}
+    for op_id in reversed(order):
+        op = operations[op_id]
+        for index_path, filename in op["revue"]:
+            if index_path not in indexes:
+                indexes[index_path] = ReviewIndex(os.path.dirname(index_path))
+            if indexes[index_path].remove(filename):
+                counts["revues_supprimees"] += 1
+        for index_path, note in op["retirees"]:
+            if index_path not in indexes:
+                indexes[index_path] = ReviewIndex(os.path.dirname(index_path))
+            indexes[index_path].add(**note)
+
+        dest, source = op["dest"], op["source"]
+        if not os.path.exists(dest):
+            counts["absents"] += 1
+            continue
+        if op["op"] == "relocate" and os.path.exists(source):
+            # Never delete a placed file; something else now holds its old name
+            logger.warning(f"Cannot restore {dest}: {source} already exists")
+            continue
+        if op["op"] in ("move", "relocate") and not os.path.exists(source):
+            os.makedirs(os.path.dirname(source), exist_ok=True)
+            shutil.move(dest, source)
+            counts["restaures"] += 1
+            logger.info("Restored: %s -> %s", dest, source, extra=PER_FILE)
+        else:
+            # A copy, or an interrupted move whose source is still in place
+            os.remove(dest)
+            counts["supprimes"] += 1
+            logger.info("Removed: %s", dest, extra=PER_FILE)
+
+    for index in indexes.values():
+        index.close()
+    os.replace(journal_path, journal_path + ".rolledback")
+    return counts
@@ -0,0 +1,47 @@
+import json
+import logging
+import os
+from datetime import datetime
+
+logger = logging.getLogger("fanga")
+
+PLAN_VERSION = 1
+PLAN_FIELDS = (
+    "chemin_source",
+    "nom_original",
+    "categorie",
+    "dossier",
+    "nom_final",
+    "confiance",
+    "statut",
+    "doublon",
+    "raisonnement",
+)
+
+
+def write_plan(path: str, results: list[dict], input_dir: str, output_dir: str, threshold: float) -> dict:
+    """Write a machine-readable placement plan from classification results."""
+    plan = {
+        "version": PLAN_VERSION,
+        "date_creation": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+        "dossier_source": os.path.abspath(input_dir),
+        "dossier_sortie": os.path.abspath(output_dir),
+        "seuil": threshold,
+        "fichiers": [{field: r.get(field) for field in PLAN_FIELDS} for r in results],
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+    logger.info(f"Plan saved to {path} ({len(results)} files)")
+    return plan
+
+
+def load_plan(path: str) -> dict:
+    """Read a plan written by write_plan and check its version."""
+    with open(path, "r", encoding="utf-8") as f:
+        plan = json.load(f)
+    if plan.get("version") != PLAN_VERSION:
+        raise ValueError(f"Unsupported plan version: {plan.get('version')}")
+    return plan
@@ -13,18 +13,87 @@ FRENCH_MONTHS = {
     "septembre": "09", "octobre": "10", "novembre": "11", "decembre": "12",
 }
 
+# Accented spellings as they appear in real filenames and documents
+_MONTH_NUMBERS = dict(FRENCH_MONTHS, **{"février": "02", "août": "08", "décembre": "12"})
+_MONTH = "|".join(sorted(_MONTH_NUMBERS, key=len, reverse=True))
+
+# One pass over the text. Digit runs try full dates before a bare year, and
+# each branch is anchored on its first character so most positions fail fast.
+_DATE_PATTERN = re.compile(
+    rf"""
+    (?<!\d)(?=\d)(?:
+        (?P<iso_y>20\d{{2}})[-_.](?P<iso_m>\d{{2}})[-_.](?P<iso_d>\d{{2}})(?!\d)
+      | (?P<cmp_y>20\d{{2}})(?P<cmp_m>[01]\d)(?P<cmp_d>[0-3]\d)(?!\d)
+      | (?P<dmy_d>\d{{1,2}})[/.-](?P<dmy_m>\d{{1,2}})[/.-](?P<dmy_y>20\d{{2}})(?!\d)
+      | (?P<txt_d>\d{{1,2}})(?:er)?\s+(?P<txt_m>{_MONTH})\s+(?P<txt_y>20\d{{2}})(?!\d)
+      | (?P<year>20\d{{2}})(?!\d)
+    )
+    | (?<![a-zé])(?=[jfmasond])(?P<month>{_MONTH})(?![a-zé])
+    """,
+    re.VERBOSE,
+)
+
+
+def _full_date(year: str, month: str, day: str) -> str | None:
+    try:
+        return date(int(year), int(month), int(day)).isoformat()
+    except ValueError:
+        return None
+
+
+def _scan_dates(text: str) -> tuple[str | None, str | None, str | None]:
+    """Return (first full date, first year, first month) found in lowercase text."""
+    full = year = month = None
+    for match in _DATE_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == "iso_d":
+            full = _full_date(match["iso_y"], match["iso_m"], match["iso_d"])
+        elif kind == "cmp_d":
+            full = _full_date(match["cmp_y"], match["cmp_m"], match["cmp_d"])
+        elif kind == "dmy_y":
+            full = _full_date(match["dmy_y"], match["dmy_m"], match["dmy_d"])
+        elif kind == "txt_y":
+            full = _full_date(match["txt_y"], _MONTH_NUMBERS[match["txt_m"]], match["txt_d"])
+        elif kind == "month":
+            month = month or _MONTH_NUMBERS[match["month"]]
+        else:
+            year = year or match["year"]
+        if full:
+            break
+    return full, year, month
+
 
 class FileRenamer:
     """Generate normalized filenames."""
 
-    def generate_name(self, metadata: dict, classification: dict) -> str:
-        """Return a normalized filename: YYYY-MM-DD_{category}_{description}.{ext}"""
-        date_str = self._extract_date(metadata["filename"], classification.get("description", ""))
-        category = classification["category"]
-        description = sanitize_description(classification.get("description", "unknown"))
-        ext = metadata["extension"]
+    def generate_name(self, metadata: dict, classification: dict, text: str = "") -> str:
+        """Return a normalized filename: YYYY-MM-DD_{category}_{description}.{ext}
 
-        return f"{date_str}_{category}_{description}{ext}"
+        text is the extracted document content; a full date found in it (for
+        instance "Date : 15/01/2024") is used when the filename has none.
+        """
+        return self.generate_names([metadata], [classification], [text])[0]
+
+    def generate_names(
+        self,
+        metadatas: list[dict],
+        classifications: list[dict],
+        texts: list[str] | None = None,
+    ) -> list[str]:
+        """Batch form of generate_name, with the date and sanitized descriptions shared across the batch."""
+        today = date.today()
+        sanitized = {}
+        names = []
+        for i, (metadata, classification) in enumerate(zip(metadatas, classifications)):
+            description = classification.get("description", "unknown")
+            date_str = self._extract_date(
+                metadata["filename"], classification.get("description", ""), texts[i] if texts else "", today
+            )
+            clean = sanitized.get(description)
+            if clean is None:
+                clean = sanitized[description] = sanitize_description(description)
+            names.append(f"{date_str}_{classification['category']}_{clean}{metadata['extension']}")
+        return names
 
     def resolve_collision(self, filepath: str) -> str:
         """Append a counter if file already exists at destination."""
@@ -39,29 +108,29 @@ class FileRenamer:
                 return new_path
             counter += 1
 
-    def _extract_date(self, filename: str, description: str) -> str:
-        """Try to extract a date from filename or description."""
+    def _extract_date(self, filename: str, description: str, text: str = "", today: date | None = None) -> str:
+        """Try to extract a date from filename or description, then from the content."""
+        today = today or date.today()
         combined = f"{filename} {description}".lower()
 
-        # Remove accents for matching
+        # Fold decomposed accents (macOS filenames) for matching
         combined = combined.replace("e\u0301", "e").replace("u\u0302", "u")
 
-        # Look for full year
-        year_match = re.search(r"(20\d{2})", combined)
-        year = year_match.group(1) if year_match else None
-
-        # Look for French month name
-        month = None
-        for name, num in FRENCH_MONTHS.items():
-            if name in combined:
-                month = num
-                break
-
+        full, year, month = _scan_dates(combined)
+        if full:
+            return full
         if year and month:
             return f"{year}-{month}-01"
+
+        # Content dates are only trusted when complete: stray years are common in amounts and references
+        if text:
+            content_date = _scan_dates(text.lower())[0]
+            if content_date:
+                return content_date
+
         if year:
             return f"{year}-01-01"
         if month:
-            return f"{date.today().year}-{month}-01"
+            return f"{today.year}-{month}-01"
 
-        return date.today().strftime("%Y-%m-%d")
+        return today.strftime("%Y-%m-%d")
@@ -10,8 +10,16 @@ logger = logging.getLogger("fanga")
 class ReportGenerator:
     """Generate the final JSON treatment report."""
 
-    def generate(self, results: list[dict], errors: list[dict]) -> dict:
-        """Build the report dict from results and errors."""
+    def generate(
+        self,
+        results: list[dict],
+        errors: list[dict],
+        metrics: dict | None = None,
+        skipped: list[dict] | None = None,
+    ) -> dict:
+        """Build the report dict from results, errors and skipped files, plus optional run metrics."""
+        skipped = skipped or []
+
         # Count files per category
         classes = {cat: 0 for cat in CATEGORIES}
         for r in results:
@@ -24,20 +32,50 @@ class ReportGenerator:
 
         ambiguous = sum(1 for r in results if r.get("statut") == "ambigu")
         duplicates = sum(1 for r in results if r.get("doublon", False))
+        retries = sum(r.get("reessais", 0) for r in results)
+
+        tiers = {}
+        for r in results:
+            tier = r.get("niveau")
+            if tier is None:
+                continue
+            entry = tiers.setdefault(tier, {"fichiers": 0, "latences": []})
+            entry["fichiers"] += 1
+            entry["latences"].append(r.get("latence", 0.0))
+        tiers = {
+            tier: {
+                "fichiers": entry["fichiers"],
+                "latence_moyenne": round(sum(entry["latences"]) / len(entry["latences"]), 3),
+            }
+            for tier, entry in tiers.items()
+        }
+
+        detection = {"corrige": 0, "ignores": len(skipped)}
+        for r in results:
+            if r.get("detection") == "corrige":
+                detection["corrige"] += 1
 
-        return {
+        report = {
             "date_execution": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-            "total_fichiers": len(results) + len(errors),
+            "total_fichiers": len(results) + len(errors) + len(skipped),
             "classes": classes,
             "fichiers": results,
             "erreurs": errors,
+            "ignores": skipped,
             "statistiques": {
                 "confiance_moyenne": round(avg_confidence, 2),
                 "fichiers_ambigus": ambiguous,
                 "fichiers_en_erreur": len(errors),
+                "fichiers_ignores": len(skipped),
+                "detection_contenu": detection,
                 "doublons_detectes": duplicates,
+                "reessais_api": retries,
+                "niveaux_modele": tiers,
             },
         }
+        if metrics:
+            report["performance"] = metrics
+        return report
 
     def save(self, report: dict, output_path: str) -> None:
         """Write report to JSON file."""
@@ -0,0 +1,172 @@
+import logging
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger("fanga")
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {"APIConnectionError", "APITimeoutError"}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def is_rate_limit(exc: Exception) -> bool:
+    """Return True if the error is an HTTP 429 from the API."""
+    return getattr(exc, "status_code", None) == 429
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Return True for transient errors: rate limits, timeouts, 5xx, dropped connections."""
+    if getattr(exc, "status_code", None) in RETRYABLE_STATUS:
+        return True
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(exc).__mro__)
+
+
+def parse_duration(value: str) -> float | None:
+    """Parse rate-limit reset durations such as '20ms', '1s' or '6m0s'."""
+    parts = _DURATION_PART.findall(value.strip())
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after_seconds(exc: Exception) -> float | None:
+    """Return the server-requested wait from Retry-After or rate-limit headers."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    resets = [
+        parse_duration(headers[name])
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        if headers.get(name)
+    ]
+    resets = [r for r in resets if r is not None]
+    return max(resets) if resets else None
+
+
+class RetryPolicy:
+    """Jittered exponential backoff that defers to server wait hints.
+
+    Hints may exceed max_delay, since the server knows when its quota resets,
+    but never max_hint_delay: a huge or hostile hint must not park a worker
+    for hours.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        max_hint_delay: float = 120.0,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_hint_delay = max_hint_delay
+
+    def compute_delay(self, attempt: int, exc: Exception | None = None) -> float:
+        """Return seconds to wait before retry number `attempt` (0-based)."""
+        hinted = retry_after_seconds(exc) if exc is not None else None
+        if hinted is not None:
+            if hinted > self.max_hint_delay:
+                logger.warning(f"Server asked to wait {hinted:.0f}s; capping at {self.max_hint_delay:.0f}s")
+                hinted = self.max_hint_delay
+            # Small jitter so workers throttled together do not retry together
+            return hinted + random.uniform(0, 0.1 * self.base_delay)
+
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """Shared breaker that pauses every caller while the API is failing.
+
+    After `failure_threshold` consecutive transient failures the breaker opens
+    and all callers block for `reset_timeout` seconds. It then lets a single
+    trial call through; success closes it again, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self.times_opened = 0
+        self._failures = 0
+        self._open_until = 0.0
+        self._trial_in_flight = False
+        self._cond = threading.Condition()
+
+    def before_call(self) -> None:
+        """Block until a call is allowed."""
+        with self._cond:
+            while True:
+                if self.state == self.CLOSED:
+                    return
+                if self.state == self.OPEN:
+                    remaining = self._open_until - time.monotonic()
+                    if remaining > 0:
+                        self._cond.wait(remaining)
+                        continue
+                    self.state = self.HALF_OPEN
+                    self._trial_in_flight = False
+                if not self._trial_in_flight:
+                    self._trial_in_flight = True
+                    return
+                self._cond.wait(self.reset_timeout)
+
+    def record_success(self) -> None:
+        with self._cond:
+            if self.state != self.CLOSED:
+                logger.info("Circuit breaker closed, API calls resumed")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+            self._cond.notify_all()
+
+    def record_failure(self) -> None:
+        with self._cond:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning(
+                        f"Circuit breaker opened after {self._failures} failures, "
+                        f"pausing API calls for {self.reset_timeout}s"
+                    )
+                self.state = self.OPEN
+                self._open_until = time.monotonic() + self.reset_timeout
+                self._trial_in_flight = False
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        return {"etat": self.state, "ouvertures": self.times_opened}
@@ -0,0 +1,180 @@
+import csv
+import html
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from src.organizer import FileOrganizer
+
+logger = logging.getLogger("fanga")
+
+REVIEW_DB = "revue.sqlite"
+REVIEW_HTML = "revue.html"
+REVIEW_CSV = "revue.csv"
+BATCH_SIZE = 200
+
+COLUMNS = ("fichier", "nom_original", "categorie_suggeree", "confiance", "seuil", "raisonnement", "date")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS revue (
+    fichier TEXT PRIMARY KEY,
+    nom_original TEXT NOT NULL,
+    categorie_suggeree TEXT NOT NULL,
+    confiance REAL NOT NULL,
+    seuil REAL NOT NULL,
+    raisonnement TEXT NOT NULL,
+    date TEXT NOT NULL
+)
+"""
+
+
+class ReviewIndex:
+    """One SQLite table for every file waiting in A_verifier, with HTML and CSV views.
+
+    Rows are buffered and inserted in batches of batch_size. The views are
+    regenerated from the whole table on close, so they also list files from
+    earlier runs. Companion _NOTE.txt files are only written when note_files
+    is set.
+    """
+
+    def __init__(self, folder: str, batch_size: int = BATCH_SIZE, note_files: bool = False):
+        self.folder = folder
+        self.path = os.path.join(folder, REVIEW_DB)
+        self.batch_size = batch_size
+        self.note_files = note_files
+        self.organizer = FileOrganizer()
+
+        os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(_SCHEMA)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._added = []
+        self.total = 0
+
+    def add(
+        self,
+        filename: str,
+        original_name: str,
+        suggested_category: str,
+        confidence: float,
+        threshold: float,
+        reasoning: str,
+    ) -> None:
+        """Queue one ambiguous file; the batch is written once batch_size rows are pending."""
+        row = (
+            filename,
+            original_name,
+            suggested_category,
+            confidence,
+            threshold,
+            reasoning or "",
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        )
+        with self._lock:
+            self._pending.append(row)
+            self._added.append(filename)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def remove(self, filename: str) -> bool:
+        """Drop a file from the index and delete its note, if any. Return True if a row was removed."""
+        with self._lock:
+            self._flush_locked()
+            removed = self._conn.execute("DELETE FROM revue WHERE fichier = ?", (filename,)).rowcount
+            self._conn.commit()
+            if filename in self._added:
+                self._added.remove(filename)
+        self.organizer.remove_ambiguity_note(self.folder, filename)
+        return removed > 0
+
+    def get(self, filename: str) -> dict | None:
+        """Return the indexed row of a file, or None."""
+        with self._lock:
+            self._flush_locked()
+            row = self._conn.execute(f"SELECT {', '.join(COLUMNS)} FROM revue WHERE fichier = ?", (filename,)).fetchone()
+        return dict(zip(COLUMNS, row)) if row is not None else None
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def rows(self) -> list[dict]:
+        """Return every indexed file, lowest confidence first."""
+        with self._lock:
+            self._flush_locked()
+            cursor = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM revue ORDER BY confiance, fichier"
+            )
+            return [dict(zip(COLUMNS, row)) for row in cursor]
+
+    def export(self) -> None:
+        """Write revue.csv and revue.html next to the database."""
+        rows = self.rows()
+        self.total = len(rows)
+        with open(os.path.join(self.folder, REVIEW_CSV), "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+        lines = [
+            "<!DOCTYPE html>",
+            '<html lang="fr"><head><meta charset="utf-8"><title>Fichiers a verifier</title>',
+            "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+            "td,th{border:1px solid #ccc;padding:4px 8px;text-align:left;vertical-align:top}</style>",
+            "</head><body>",
+            f"<h1>Fichiers a verifier ({len(rows)})</h1>",
+            "<table><tr>" + "".join(f"<th>{column}</th>" for column in COLUMNS) + "</tr>",
+        ]
+        for row in rows:
+            name = html.escape(row["fichier"])
+            cells = [f'<a href="{html.escape(row["fichier"], quote=True)}">{name}</a>']
+            cells += [html.escape(str(row[column])) for column in COLUMNS[1:]]
+            lines.append("<tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>")
+        lines.append("</table></body></html>")
+        with open(os.path.join(self.folder, REVIEW_HTML), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        logger.info(f"Review index exported: {len(rows)} files in {self.folder}")
+
+    def export_notes(self, filenames: list[str] | None = None) -> int:
+        """Write a companion _NOTE.txt for the given files (all indexed files by default)."""
+        rows = self.rows()
+        if filenames is not None:
+            wanted = set(filenames)
+            rows = [row for row in rows if row["fichier"] in wanted]
+        for row in rows:
+            self.organizer.write_ambiguity_note(
+                dest_folder=self.folder,
+                filename=row["fichier"],
+                original_name=row["nom_original"],
+                suggested_category=row["categorie_suggeree"],
+                confidence=row["confiance"],
+                threshold=row["seuil"],
+                reasoning=row["raisonnement"],
+            )
+        return len(rows)
+
+    def close(self) -> None:
+        """Flush pending rows, write optional notes for this session, regenerate the views."""
+        self.flush()
+        if self.note_files and self._added:
+            self.export_notes(self._added)
+        self.export()
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> dict:
+        """Counters for the report; the total is the one of the last export."""
+        return {"fichiers_a_verifier": self.total, "ajoutes": len(self._added), "index": self.path}
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO revue ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            self._pending,
+        )
+        self._conn.commit()
+        self._pending = []
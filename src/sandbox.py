@@ -0,0 +1,152 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger("fanga")
+
+POLL_INTERVAL = 0.1
+
+
+def _worker_main(conn, max_memory_bytes: int, backends: dict[str, list[str]] | None = None) -> None:
+    """Subprocess loop: extract each requested file and send the content dict back."""
+    try:
+        import resource
+
+        # Hard cap as a backstop; the parent also watches RSS and kills early
+        resource.setrlimit(resource.RLIMIT_AS, (max_memory_bytes * 2, max_memory_bytes * 2))
+    except (ImportError, ValueError, OSError):
+        pass
+
+    from src.extractor import FileExtractor
+
+    extractor = FileExtractor(backends)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        filepath, ext = request
+        conn.send(extractor.extract_content(filepath, ext))
+
+
+def _rss_bytes(pid: int) -> int | None:
+    """Resident set size of a process, from /proc on Linux; None elsewhere."""
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Worker:
+
+    def __init__(self, context, max_memory_bytes: int, backends: dict[str, list[str]] | None = None):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, max_memory_bytes, backends), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+
+class ExtractionSandbox:
+    """Pool of reusable extraction subprocesses with per-file time and memory limits.
+
+    A worker that exceeds the wall-clock timeout or the RSS limit is killed
+    and replaced, and the file is reported as an extraction error, so one
+    pathological document never stalls the rest of the batch.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        timeout: float = 60.0,
+        max_memory_mb: int = 1024,
+        backends: dict[str, list[str]] | None = None,
+    ):
+        self.timeout = timeout
+        self.backends = backends
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+
+        self.timeouts = 0
+        self.memory_kills = 0
+        self.crashes = 0
+
+        for _ in range(max(1, workers)):
+            self._idle.put(self._spawn())
+
+    def extract_content(self, filepath: str, ext: str | None = None) -> dict:
+        """Extract in a worker subprocess; same return shape as FileExtractor.extract_content."""
+        worker = self._idle.get()
+        try:
+            worker.conn.send((filepath, ext))
+            deadline = time.monotonic() + self.timeout
+            while not worker.conn.poll(POLL_INTERVAL):
+                if not worker.process.is_alive():
+                    break
+                if time.monotonic() >= deadline:
+                    worker = self._recycle(worker, "timeouts")
+                    logger.error(f"Extraction timeout after {self.timeout}s: {filepath}")
+                    return self._error(f"Extraction timeout after {self.timeout}s", timeout=True)
+                rss = _rss_bytes(worker.process.pid)
+                if rss is not None and rss > self.max_memory_bytes:
+                    worker = self._recycle(worker, "memory_kills")
+                    logger.error(f"Extraction memory limit exceeded ({rss // (1024 * 1024)} MB): {filepath}")
+                    return self._error(f"Extraction memory limit exceeded ({self.max_memory_bytes // (1024 * 1024)} MB)")
+
+            try:
+                return worker.conn.recv()
+            except (EOFError, OSError):
+                worker = self._recycle(worker, "crashes")
+                logger.error(f"Extraction worker died on {filepath}")
+                return self._error("Extraction worker died")
+        finally:
+            self._idle.put(worker)
+
+    def close(self) -> None:
+        """Stop all idle workers."""
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+            worker.process.join(1)
+            if worker.process.is_alive():
+                worker.kill()
+
+    def stats(self) -> dict:
+        return {
+            "expirations": self.timeouts,
+            "depassements_memoire": self.memory_kills,
+            "workers_plantes": self.crashes,
+        }
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._context, self.max_memory_bytes, self.backends)
+
+    def _recycle(self, worker: _Worker, counter: str) -> _Worker:
+        worker.kill()
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        return self._spawn()
+
+    @staticmethod
+    def _error(message: str, timeout: bool = False) -> dict:
+        return {"type": "error", "content": "", "error": message, "timeout": timeout}
@@ -0,0 +1,85 @@
+import logging
+import os
+from collections import defaultdict
+
+from src.archive import source_stat
+from src.utils import IMAGE_EXTENSIONS
+
+logger = logging.getLogger("fanga")
+
+SCHEDULE_POLICIES = ("fifo", "sjf", "ljf", "fair")
+
+# Fixed latency of one classification request, in seconds
+REQUEST_OVERHEAD = 1.5
+# Time per expected prompt token, in seconds
+SECONDS_PER_TOKEN = 0.0005
+# Base prompt tokens (system prompt + file info) sent with every request
+BASE_PROMPT_TOKENS = 350
+# Low-detail vision input costs a flat token budget
+IMAGE_TOKENS = 85
+# Extracted text is capped at MAX_TEXT_LENGTH characters, ~4 characters per token
+MAX_TEXT_TOKENS = 250
+
+# Local extraction time per MB, by extension
+EXTRACTION_SECONDS_PER_MB = {
+    ".pdf": 0.8,
+    ".docx": 0.1,
+    ".xlsx": 0.3,
+    ".csv": 0.01,
+    ".txt": 0.01,
+}
+IMAGE_SECONDS_PER_MB = 0.05
+# PDFs above this size are usually scans that fall back to the vision path
+SCANNED_PDF_BYTES = 2 * 1024 * 1024
+
+
+def estimate_cost(filepath: str, size: int | None = None) -> float:
+    """Estimate seconds of work for a file from its size, type and expected tokens."""
+    if size is None:
+        size = source_stat(filepath)[0]
+    ext = os.path.splitext(filepath)[1].lower()
+    size_mb = size / (1024 * 1024)
+
+    if ext in IMAGE_EXTENSIONS:
+        extraction = IMAGE_SECONDS_PER_MB * size_mb
+        tokens = IMAGE_TOKENS
+    else:
+        extraction = EXTRACTION_SECONDS_PER_MB.get(ext, 0.0) * size_mb
+        tokens = min(MAX_TEXT_TOKENS, size // 4)
+        if ext == ".pdf" and size > SCANNED_PDF_BYTES:
+            extraction += IMAGE_SECONDS_PER_MB * size_mb
+            tokens = IMAGE_TOKENS
+
+    return REQUEST_OVERHEAD + extraction + (BASE_PROMPT_TOKENS + tokens) * SECONDS_PER_TOKEN
+
+
+def schedule(files: list[str], policy: str = "fifo") -> list[str]:
+    """Return files in processing order for a scheduling policy.
+
+    fifo: input order. sjf: cheapest first, for fast time-to-first-results.
+    ljf: most expensive first, which shortens the makespan with many workers.
+    fair: round-robin across file types, cheapest first within each type, so
+    one large batch of scans cannot starve everything else.
+    """
+    if policy not in SCHEDULE_POLICIES:
+        raise ValueError(f"Unknown schedule policy: {policy}")
+    if policy == "fifo":
+        return list(files)
+
+    costs = {f: estimate_cost(f) for f in files}
+    if policy == "sjf":
+        return sorted(files, key=costs.__getitem__)
+    if policy == "ljf":
+        return sorted(files, key=costs.__getitem__, reverse=True)
+
+    groups = defaultdict(list)
+    for f in sorted(files, key=costs.__getitem__):
+        groups[os.path.splitext(f)[1].lower()].append(f)
+    queues = [groups[ext] for ext in sorted(groups, key=lambda ext: costs[groups[ext][0]])]
+
+    ordered = []
+    while queues:
+        for q in queues:
+            ordered.append(q.pop(0))
+        queues = [q for q in queues if q]
+    return ordered
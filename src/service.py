@@ -0,0 +1,281 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty, SimpleQueue
+from urllib.parse import parse_qs, urlparse
+
+from src.pipeline import SkippedFile
+
+logger = logging.getLogger("fanga")
+
+BATCH_WINDOW = 0.02
+MAX_BATCH = 8
+LATENCY_WINDOW = 1000
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+
+class MicroBatcher:
+    """Coalesce concurrent requests into batches for one handler call.
+
+    The first queued item opens a window of `window` seconds; everything that
+    arrives before it closes, up to max_batch items, is handed to handler as
+    one list. Batches run on their own pool so a slow batch never holds the
+    next window open.
+    """
+
+    def __init__(self, handler, window: float = BATCH_WINDOW, max_batch: int = MAX_BATCH, workers: int = 4):
+        self.handler = handler
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self._queue = SimpleQueue()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest = 0
+        self._thread = threading.Thread(target=self._collect, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def close(self) -> None:
+        """Dispatch what is queued, wait for running batches and stop."""
+        self._queue.put(None)
+        self._thread.join()
+        self._pool.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "file_attente": self._queue.qsize(),
+                "lots": self.batches,
+                "requetes_groupees": self.items,
+                "taille_moyenne_lot": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "plus_grand_lot": self.largest,
+            }
+
+    def _collect(self) -> None:
+        closing = False
+        while not closing:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except Empty:
+                    break
+                if entry is None:
+                    closing = True
+                    break
+                batch.append(entry)
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.largest = max(self.largest, len(batch))
+            self._pool.submit(self._run, batch)
+
+    def _run(self, batch: list[tuple]) -> None:
+        try:
+            results = self.handler([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+class LatencyTracker:
+    """Percentiles over the most recent request latencies."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {"echantillons": 0}
+
+        def percentile(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 1)
+
+        return {"echantillons": len(samples), "p50": percentile(0.50), "p95": percentile(0.95), "p99": percentile(0.99)}
+
+
+class ClassificationService:
+    """Classify single files on demand through a warm Pipeline.
+
+    The pipeline's classifier (and its pooled HTTP client), cassette, reuse
+    index and extraction sandbox stay loaded between requests. Extraction runs in the request
+    thread; classification calls from concurrent requests are micro-batched
+    into FileClassifier.classify_batch.
+    """
+
+    def __init__(self, pipeline, window: float = BATCH_WINDOW, max_batch: int = MAX_BATCH):
+        self.pipeline = pipeline
+        # One poisoned file must not take down a long-lived service
+        pipeline.open_sandbox()
+        self.batcher = MicroBatcher(pipeline.classifier.classify_batch, window, max_batch, workers=pipeline.workers)
+        self.latency = LatencyTracker()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.skipped = 0
+        self.in_flight = 0
+
+    def classify(self, filepath: str) -> dict:
+        """Classify the file at filepath. Raise SkippedFile or the extraction error on failure."""
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            return self.pipeline.classify_path(filepath, self._classify_batched)
+        except SkippedFile:
+            with self._lock:
+                self.skipped += 1
+            raise
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            self.latency.record(time.perf_counter() - start)
+            with self._lock:
+                self.in_flight -= 1
+
+    def classify_upload(self, filename: str, data: bytes) -> dict:
+        """Classify uploaded bytes, written to a temporary file named like the original."""
+        with tempfile.TemporaryDirectory(prefix="fanga_") as tmp:
+            path = os.path.join(tmp, os.path.basename(filename))
+            with open(path, "wb") as f:
+                f.write(data)
+            return self.classify(path)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            metrics = {
+                "requetes": self.requests,
+                "erreurs": self.errors,
+                "ignores": self.skipped,
+                "en_cours": self.in_flight,
+            }
+        metrics["latence_ms"] = self.latency.stats()
+        metrics["micro_lots"] = self.batcher.stats()
+        metrics["disjoncteur"] = self.pipeline.breaker.stats()
+        metrics["concurrence"] = self.pipeline.limiter.stats()
+        metrics["jetons"] = self.pipeline.classifier.token_stats()
+        if self.pipeline.cassette is not None:
+            metrics["cassette"] = self.pipeline.cassette.stats()
+        if self.pipeline.extraction_cache is not None:
+            metrics["cache_extraction"] = self.pipeline.extraction_cache.stats()
+        if self.pipeline.sandbox is not None:
+            metrics["extraction_isolee"] = self.pipeline.sandbox.stats()
+        return metrics
+
+    def close(self) -> None:
+        self.batcher.close()
+        self.pipeline.close_sandbox()
+        if self.pipeline.cassette is not None:
+            self.pipeline.cassette.save()
+        if self.pipeline.extraction_cache is not None:
+            self.pipeline.extraction_cache.flush()
+        if self.pipeline.reuse_index is not None:
+            self.pipeline.reuse_index.save(self.pipeline.reuse_index_path)
+
+    def _classify_batched(self, metadata: dict, content: dict) -> dict:
+        return self.batcher.submit((metadata, content)).result()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """POST /classify, GET /metrics and GET /health, all answering JSON."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+        if path == "/metrics":
+            self._send(200, self.server.service.metrics())
+        elif path == "/health":
+            self._send(200, {"statut": "ok"})
+        else:
+            self._send(404, {"erreur": f"Unknown endpoint {path}"})
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        if url.path != "/classify":
+            self.rfile.read(length)
+            self._send(404, {"erreur": f"Unknown endpoint {url.path}"})
+            return
+        if length > MAX_UPLOAD_BYTES:
+            self.close_connection = True
+            self._send(413, {"erreur": f"Body larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB"})
+            return
+        body = self.rfile.read(length)
+        service = self.server.service
+
+        try:
+            if self.headers.get_content_type() == "application/json":
+                path = json.loads(body or b"{}").get("path")
+                if not path:
+                    self._send(400, {"erreur": "JSON body needs a 'path'"})
+                    return
+                result = service.classify(path)
+            else:
+                filename = parse_qs(url.query).get("filename", [""])[0]
+                if not filename:
+                    self._send(400, {"erreur": "Raw uploads need a ?filename= query parameter"})
+                    return
+                result = service.classify_upload(filename, body)
+        except json.JSONDecodeError as e:
+            self._send(400, {"erreur": f"Invalid JSON: {e}"})
+        except SkippedFile as e:
+            self._send(422, {"erreur": str(e)})
+        except FileNotFoundError as e:
+            self._send(404, {"erreur": str(e)})
+        except Exception as e:
+            logger.error(f"Service request failed: {e}")
+            self._send(500, {"erreur": str(e)})
+        else:
+            self._send(200, result)
+
+    def _send(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def make_server(service: ClassificationService, host: str, port: int) -> ThreadingHTTPServer:
+    """Bind the HTTP server for a service (port 0 picks a free port)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
@@ -1,8 +1,13 @@
+import atexit
 import hashlib
+import json
 import logging
 import os
-import re
+import queue
+import threading
+import time
 import unicodedata
+from logging.handlers import QueueHandler, QueueListener
 
 
 CATEGORIES = [
@@ -22,10 +27,78 @@ TEXT_EXTENSIONS = {".pdf", ".docx", ".xlsx", ".csv", ".txt"}
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp"}
 
 
-def setup_logging(log_dir: str) -> logging.Logger:
-    """Configure structured logging to file and console."""
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = os.path.join(log_dir, "pipeline.log")
+LOG_FORMAT = "[%(asctime)s] [%(levelname)s] [%(module)s] %(message)s"
+LOG_DATEFMT = "%Y-%m-%d %H:%M:%S"
+
+# Pass as extra= on log lines emitted once per file, so they can be rate-limited
+PER_FILE = {"per_file": True}
+PER_FILE_RATE = 20.0
+
+_listener = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per log record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, LOG_DATEFMT),
+            "niveau": record.levelname,
+            "module": record.module,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class PerFileRateFilter(logging.Filter):
+    """Token bucket over per-file INFO lines; warnings and run-level lines always pass."""
+
+    def __init__(self, rate: float = PER_FILE_RATE, burst: float | None = None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.suppressed = 0
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.levelno > logging.INFO or not getattr(record, "per_file", False):
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.suppressed += 1
+            return False
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() renders the message in the caller so the record can
+    be pickled; the queue here never leaves the process, so the worker only
+    pays for an enqueue.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(log_dir: str, json_lines: bool = False, per_file_rate: float = PER_FILE_RATE) -> logging.Logger:
+    """Configure non-blocking logging to file and console.
+
+    Records go through an in-memory queue; a listener thread formats them and
+    writes pipeline.log (or pipeline.jsonl with json_lines) and the console.
+    Per-file INFO lines are limited to per_file_rate per second (0 = no limit).
+    """
+    global _listener
 
     logger = logging.getLogger("fanga")
     logger.setLevel(logging.DEBUG)
@@ -33,44 +106,86 @@ def setup_logging(log_dir: str) -> logging.Logger:
     if logger.handlers:
         return logger
 
-    formatter = logging.Formatter(
-        "[%(asctime)s] [%(levelname)s] [%(module)s] %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    os.makedirs(log_dir, exist_ok=True)
+    log_file = os.path.join(log_dir, "pipeline.jsonl" if json_lines else "pipeline.log")
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATEFMT)
 
     file_handler = logging.FileHandler(log_file, encoding="utf-8")
     file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(formatter)
+    file_handler.setFormatter(JsonLinesFormatter() if json_lines else formatter)
 
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    records = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(records)
+    queue_handler.addFilter(PerFileRateFilter(per_file_rate))
+    logger.addHandler(queue_handler)
+
+    _listener = QueueListener(records, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.unregister(stop_logging)
+    atexit.register(stop_logging)
 
     return logger
 
 
+def stop_logging() -> None:
+    """Drain the log queue, close the handlers and detach them from the logger."""
+    global _listener
+
+    logger = logging.getLogger("fanga")
+    for handler in list(logger.handlers):
+        if not isinstance(handler, _DeferredQueueHandler):
+            continue
+        for log_filter in handler.filters:
+            if isinstance(log_filter, PerFileRateFilter) and log_filter.suppressed:
+                logger.info("%d per-file log lines dropped by rate limiting", log_filter.suppressed)
+        logger.removeHandler(handler)
+
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
 def compute_file_hash(filepath: str) -> str:
-    """Return MD5 hash of file content."""
+    """Return MD5 hash of file content (plain file or archive member)."""
+    from src.archive import open_source
+
     md5 = hashlib.md5()
-    with open(filepath, "rb") as f:
+    with open_source(filepath) as f:
         for chunk in iter(lambda: f.read(8192), b""):
             md5.update(chunk)
     return md5.hexdigest()
 
 
+class _SanitizeTable(dict):
+    """str.translate table: keep [a-z0-9-], whitespace to "-", drop the rest.
+
+    Characters outside ASCII are classified on first sight and cached.
+    """
+
+    def __missing__(self, char: int):
+        value = ord("-") if chr(char).isspace() else None
+        self[char] = value
+        return value
+
+
+_SANITIZE_TABLE = _SanitizeTable({c: c for c in b"abcdefghijklmnopqrstuvwxyz0123456789-"})
+
+
 def sanitize_description(text: str) -> str:
     """Clean and normalize a description string for use in filenames."""
     # Remove accents
-    nfkd = unicodedata.normalize("NFKD", text)
-    text = "".join(c for c in nfkd if not unicodedata.combining(c))
-
-    text = text.lower()
-    text = re.sub(r"[^a-z0-9\s-]", "", text)
-    text = re.sub(r"[\s_]+", "-", text)
-    text = re.sub(r"-+", "-", text)
-    text = text.strip("-")
+    if not text.isascii():
+        nfkd = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in nfkd if not unicodedata.combining(c))
+
+    text = text.lower().translate(_SANITIZE_TABLE)
+    # Collapse runs of hyphens and trim them at both ends
+    text = "-".join(part for part in text.split("-") if part)
 
     return text[:50]
@@ -0,0 +1,105 @@
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger("fanga")
+
+
+class VectorIndex:
+    """Brute-force cosine-similarity index over embeddings of classified files.
+
+    Vectors are L2-normalised on insert and kept in a preallocated float32
+    matrix that doubles when full, so incremental adds are amortised O(1) and a
+    batch query is a single matrix product. Each row carries a label dict
+    (category, description, confidence, source filename).
+    """
+
+    def __init__(self, dim: int | None = None):
+        self.dim = dim
+        self._matrix = None
+        self._labels = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def add(self, vectors, labels: list[dict]) -> None:
+        """Append vectors with their labels."""
+        if not labels:
+            return
+        rows = self._normalise(vectors)
+        with self._lock:
+            if self._matrix is None:
+                self.dim = rows.shape[1]
+                self._matrix = np.empty((max(64, len(rows)), self.dim), dtype=np.float32)
+            elif rows.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {rows.shape[1]} does not match index ({self.dim})")
+
+            size = len(self._labels)
+            needed = size + len(rows)
+            if needed > len(self._matrix):
+                grown = np.empty((max(needed, 2 * len(self._matrix)), self.dim), dtype=np.float32)
+                grown[:size] = self._matrix[:size]
+                self._matrix = grown
+
+            self._matrix[size:needed] = rows
+            self._labels.extend(labels)
+
+    def query_batch(self, vectors, k: int = 1) -> list[list[tuple[float, dict]]]:
+        """Return the k nearest labels with their cosine similarity, per query vector."""
+        queries = self._normalise(vectors)
+        with self._lock:
+            size = len(self._labels)
+            if size == 0:
+                return [[] for _ in range(len(queries))]
+            scores = queries @ self._matrix[:size].T
+            labels = list(self._labels)
+
+        k = min(k, size)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(scores, top):
+            ordered = candidates[np.argsort(-row[candidates])]
+            results.append([(float(row[i]), labels[i]) for i in ordered])
+        return results
+
+    def query(self, vector, k: int = 1) -> list[tuple[float, dict]]:
+        return self.query_batch([vector], k)[0]
+
+    def save(self, path: str) -> None:
+        """Persist vectors and labels to a compressed .npz file."""
+        with self._lock:
+            size = len(self._labels)
+            matrix = self._matrix[:size] if self._matrix is not None else np.empty((0, 0), dtype=np.float32)
+            labels = json.dumps(self._labels, ensure_ascii=False)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, vectors=matrix, labels=np.array(labels))
+        os.replace(tmp_path, path)
+        logger.info(f"Vector index saved: {size} entries -> {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "VectorIndex":
+        """Load an index saved with save(); return an empty index if absent."""
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        with np.load(path) as data:
+            labels = json.loads(str(data["labels"]))
+            if labels:
+                index.add(data["vectors"], labels)
+        logger.info(f"Vector index loaded: {len(index)} entries from {path}")
+        return index
+
+    @staticmethod
+    def _normalise(vectors) -> np.ndarray:
+        rows = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(rows, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return rows / norms
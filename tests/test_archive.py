@@ -0,0 +1,110 @@
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
+
+from src.archive import (
+    ArchiveMemberTooLarge,
+    is_archive,
+    list_members,
+    member_path,
+    read_source,
+    source_stat,
+)
+from src.extractor import FileExtractor
+from src.organizer import FileOrganizer
+
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.zip_path = os.path.join(self.tmp.name, "bundle.zip")
+        with zipfile.ZipFile(self.zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("factures/", "")
+            archive.writestr("factures/releve.csv", "date,montant\n2024-01-15,2500\n")
+            archive.writestr("notes.txt", "Réunion station Cocody")
+            archive.writestr(".DS_Store", "x")
+            archive.writestr("__MACOSX/._notes.txt", "x")
+            archive.writestr("gros.txt", "a" * 5000)
+
+        self.tar_path = os.path.join(self.tmp.name, "photos.tar.gz")
+        with tarfile.open(self.tar_path, "w:gz") as archive:
+            data = b"%PDF-1.4 fake"
+            info = tarfile.TarInfo("scan.pdf")
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_is_archive(self):
+        assert is_archive(self.zip_path)
+        assert is_archive(self.tar_path)
+        assert not is_archive("facture.pdf")
+        assert not is_archive(member_path(self.zip_path, "inner.zip"))
+
+    def test_list_members_skips_dirs_hidden_and_oversized(self):
+        members = list_members(self.zip_path, max_member_bytes=1000)
+        assert members == [
+            member_path(self.zip_path, "factures/releve.csv"),
+            member_path(self.zip_path, "notes.txt"),
+        ]
+        assert list_members(self.tar_path) == [member_path(self.tar_path, "scan.pdf")]
+
+    def test_read_and_stat_member(self):
+        path = member_path(self.tar_path, "scan.pdf")
+        assert read_source(path) == b"%PDF-1.4 fake"
+        assert read_source(path, 4) == b"%PDF"
+        assert source_stat(path)[0] == len(b"%PDF-1.4 fake")
+
+    def test_tar_members_are_read_in_one_pass(self):
+        path = os.path.join(self.tmp.name, "lot.tar.gz")
+        with tarfile.open(path, "w:gz") as archive:
+            for i in range(20):
+                data = f"Facture {i}".encode("utf-8")
+                info = tarfile.TarInfo(f"facture_{i}.txt")
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        members = list_members(path)
+        with patch("src.archive.tarfile.open", wraps=tarfile.open) as opened:
+            for _ in range(3):
+                contents = [read_source(member) for member in members]
+        assert opened.call_count == 1
+        assert contents[7] == b"Facture 7"
+
+    def test_read_cap_applies_to_decompressed_bytes(self):
+        with self.assertRaises(ArchiveMemberTooLarge):
+            read_source(member_path(self.zip_path, "gros.txt"), max_member_bytes=1000)
+
+    def test_missing_member(self):
+        with self.assertRaises(FileNotFoundError):
+            source_stat(member_path(self.zip_path, "absent.pdf"))
+
+    def test_extractor_reads_members(self):
+        extractor = FileExtractor()
+        csv_member = member_path(self.zip_path, "factures/releve.csv")
+        metadata = extractor.extract_metadata(csv_member)
+        assert metadata["filename"] == "releve.csv"
+        assert metadata["extension"] == ".csv"
+        assert extractor.sniff(csv_member)["decision"] == "ok"
+        assert "2024-01-15 | 2500" in extractor.extract_content(csv_member)["content"]
+
+        txt = extractor.extract_content(member_path(self.zip_path, "notes.txt"))
+        assert txt["content"] == "Réunion station Cocody"
+        assert extractor.sniff(member_path(self.tar_path, "scan.pdf"))["type_detecte"] == ".pdf"
+
+    def test_member_is_copied_even_with_move(self):
+        out = os.path.join(self.tmp.name, "out")
+        os.makedirs(os.path.join(out, "Autre"))
+        dest = FileOrganizer().place_file(member_path(self.zip_path, "notes.txt"), out, "Autre", "n.txt", move=True)
+        with open(dest, encoding="utf-8") as f:
+            assert f.read() == "Réunion station Cocody"
+        assert os.path.exists(self.zip_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
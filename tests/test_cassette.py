@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from src.cassette import Cassette
+from src.classifier import FileClassifier
+
+
+REQUEST = {"model": "gpt-4o", "messages": [{"role": "user", "content": "facture"}]}
+
+
+class TestCassette(unittest.TestCase):
+
+    def test_fingerprint_is_key_order_independent(self):
+        a = Cassette.fingerprint({"model": "gpt-4o", "temperature": 0.2})
+        b = Cassette.fingerprint({"temperature": 0.2, "model": "gpt-4o"})
+        assert a == b
+
+    def test_record_then_replay(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "run.jsonl.gz")
+            recorder = Cassette(path, mode="record")
+            recorder.record(REQUEST, '{"category": "Factures"}', {"prompt_tokens": 10, "completion_tokens": 5}, 0.3)
+            recorder.save()
+
+            player = Cassette(path, mode="replay")
+            entry = player.lookup(REQUEST)
+            assert entry["content"] == '{"category": "Factures"}'
+            assert entry["latency"] == 0.3
+            assert player.stats()["reponses_rejouees"] == 1
+
+    def test_replay_missing_file_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            Cassette("/tmp/nonexistent_cassette_abc123.jsonl.gz", mode="replay")
+
+    def test_save_appends_to_existing_cassette(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "run.jsonl.gz")
+            first = Cassette(path, mode="record")
+            first.record(REQUEST, "a", {}, 0.1)
+            first.save()
+
+            second = Cassette(path, mode="record")
+            other = dict(REQUEST, model="gpt-4o-mini")
+            second.record(other, "b", {}, 0.1)
+            second.save()
+
+            player = Cassette(path, mode="replay")
+            assert player.lookup(REQUEST)["content"] == "a"
+            assert player.lookup(other)["content"] == "b"
+
+
+class TestClassifierReplay(unittest.TestCase):
+
+    def test_replay_does_not_call_api(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "run.jsonl.gz")
+            metadata = {"filename": "test.pdf", "extension": ".pdf", "size_human": "1.0 KB"}
+            content = {"type": "text", "content": "facture"}
+
+            recorder = FileClassifier(api_key="test-key", cassette=Cassette(path, mode="record"))
+            response = MagicMock()
+            response.usage.prompt_tokens = 10
+            response.usage.completion_tokens = 5
+            response.choices[0].message.content = (
+                '{"category": "Factures", "confidence": 0.9, "description": "facture", "reasoning": "x"}'
+            )
+            recorder.client = MagicMock()
+            recorder.client.chat.completions.create.return_value = response
+            recorder._call_llm(metadata, content)
+            recorder.cassette.save()
+
+            player = FileClassifier(api_key="test-key", cassette=Cassette(path, mode="replay"))
+            player.client = MagicMock()
+            result = player.classify(metadata, content)
+            assert result["category"] == "Factures"
+            player.client.chat.completions.create.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import MagicMock, patch
 
-from src.classifier import FileClassifier
+from src.classifier import PROMPT_CACHE_KEY, SYSTEM_PROMPT, FileClassifier
 from src.utils import CATEGORIES
 
 
@@ -147,5 +147,139 @@ class TestFileClassifier(unittest.TestCase):
         assert result["confidence"] == 0.0
 
 
+class TestCascade(unittest.TestCase):
+
+    def setUp(self):
+        self.classifier = FileClassifier(
+            api_key="test-key", cascade_model="gpt-4o-mini", escalation_threshold=0.7
+        )
+        self.metadata = {"filename": "test.csv", "extension": ".csv", "size_human": "1.0 KB"}
+        self.content = {"type": "text", "content": "id,montant"}
+
+    @patch.object(FileClassifier, "_call_llm")
+    def test_confident_cheap_answer_is_kept(self, mock_llm):
+        mock_llm.return_value = {
+            "category": "Exports_donnees",
+            "confidence": 0.9,
+            "description": "export",
+            "reasoning": "Test",
+        }
+        result = self.classifier.classify(self.metadata, self.content)
+        assert result["tier"] == "rapide"
+        assert result["model"] == "gpt-4o-mini"
+        assert mock_llm.call_count == 1
+
+    @patch.object(FileClassifier, "_call_llm")
+    def test_low_confidence_escalates(self, mock_llm):
+        mock_llm.side_effect = [
+            {"category": "Exports_donnees", "confidence": 0.4, "description": "x", "reasoning": "Test"},
+            {"category": "Rapports", "confidence": 0.8, "description": "y", "reasoning": "Test"},
+        ]
+        result = self.classifier.classify(self.metadata, self.content)
+        assert result["tier"] == "complet"
+        assert result["model"] == "gpt-4o"
+        assert result["category"] == "Rapports"
+
+    @patch.object(FileClassifier, "_call_llm")
+    def test_invalid_category_escalates(self, mock_llm):
+        mock_llm.side_effect = [
+            {"category": "Invoices", "confidence": 0.95, "description": "x", "reasoning": "Test"},
+            {"category": "Factures", "confidence": 0.9, "description": "y", "reasoning": "Test"},
+        ]
+        result = self.classifier.classify(self.metadata, self.content)
+        assert result["tier"] == "complet"
+        assert result["category"] == "Factures"
+
+
+
+class TestClassifyBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.classifier = FileClassifier(api_key="test-key")
+        self.items = [
+            ({"filename": f"doc{i}.txt", "extension": ".txt", "size_human": "1.0 KB"}, {"type": "text", "content": "x"})
+            for i in range(3)
+        ]
+
+    @patch.object(FileClassifier, "_call_llm")
+    @patch.object(FileClassifier, "_call_llm_batch")
+    def test_text_files_share_one_request(self, mock_batch, mock_llm):
+        mock_batch.return_value = [
+            {"category": "Factures", "confidence": 0.9, "description": "a", "reasoning": "r"},
+            {"category": "Nope", "confidence": 0.8, "description": "b", "reasoning": "r"},
+            {"category": "Contrats", "confidence": "bad", "description": "c", "reasoning": "r"},
+        ]
+        results = self.classifier.classify_batch(self.items)
+        assert mock_batch.call_count == 1
+        mock_llm.assert_not_called()
+        assert [r["category"] for r in results] == ["Factures", "Autre", "Contrats"]
+        assert results[2]["confidence"] == 0.0
+        assert all(r["batch"] == 3 for r in results)
+
+    @patch.object(FileClassifier, "_call_llm")
+    @patch.object(FileClassifier, "_call_llm_batch")
+    def test_malformed_batch_falls_back_per_file(self, mock_batch, mock_llm):
+        mock_batch.side_effect = ValueError("expected 3 results, got 2")
+        mock_llm.return_value = {"category": "Rapports", "confidence": 0.9, "description": "r", "reasoning": "r"}
+        results = self.classifier.classify_batch(self.items)
+        assert mock_llm.call_count == 3
+        assert [r["category"] for r in results] == ["Rapports"] * 3
+
+    @patch.object(FileClassifier, "_call_llm")
+    @patch.object(FileClassifier, "_call_llm_batch")
+    def test_images_are_classified_alone(self, mock_batch, mock_llm):
+        mock_llm.return_value = {"category": "Photos", "confidence": 0.9, "description": "p", "reasoning": "r"}
+        image = ({"filename": "a.jpg", "extension": ".jpg", "size_human": "1.0 KB"}, {"type": "image", "content": "AA"})
+        results = self.classifier.classify_batch([image, self.items[0]])
+        mock_batch.assert_not_called()
+        assert mock_llm.call_count == 2
+        assert results[0]["category"] == "Photos"
+
+
+
+class TestPromptLayout(unittest.TestCase):
+
+    def setUp(self):
+        self.classifier = FileClassifier(api_key="test-key")
+        self.classifier.client = MagicMock()
+        response = MagicMock()
+        response.usage.prompt_tokens = 1500
+        response.usage.prompt_tokens_details.cached_tokens = 1024
+        response.usage.completion_tokens = 40
+        response.choices[0].message.content = (
+            '{"category": "Factures", "confidence": 0.9, "description": "facture", "reasoning": "x"}'
+        )
+        self.classifier.client.chat.completions.create.return_value = response
+
+    def _request(self, filename: str, text: str) -> dict:
+        metadata = {"filename": filename, "extension": ".pdf", "size_human": "1.0 KB"}
+        self.classifier.classify(metadata, {"type": "text", "content": text})
+        return self.classifier.client.chat.completions.create.call_args.kwargs
+
+    def test_static_prefix_comes_before_the_file(self):
+        first = self._request("a.pdf", "facture A")
+        second = self._request("b.pdf", "contrat B")
+        assert first["messages"][0] == second["messages"][0] == {"role": "system", "content": SYSTEM_PROMPT}
+        assert first["prompt_cache_key"] == second["prompt_cache_key"] == PROMPT_CACHE_KEY
+        user_text = second["messages"][1]["content"][0]["text"]
+        assert user_text.startswith("Filename: b.pdf")
+        assert user_text.endswith("contrat B")
+
+    def test_cached_tokens_are_counted(self):
+        self._request("a.pdf", "facture")
+        self._request("b.pdf", "facture")
+        stats = self.classifier.token_stats()
+        assert stats["appels"] == 2
+        assert stats["jetons_prompt"] == 3000
+        assert stats["jetons_prompt_en_cache"] == 2048
+        assert stats["jetons_prompt_hors_cache"] == 952
+        assert stats["taux_cache"] == 0.683
+
+    def test_missing_cache_details_count_as_uncached(self):
+        self.classifier.client.chat.completions.create.return_value.usage.prompt_tokens_details = None
+        self._request("a.pdf", "facture")
+        assert self.classifier.token_stats()["jetons_prompt_en_cache"] == 0
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,87 @@
+import threading
+import unittest
+
+from src.concurrency import AdaptiveLimiter
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+
+    def test_healthy_calls_raise_limit(self):
+        limiter = AdaptiveLimiter(initial=1, max_limit=4)
+        for _ in range(20):
+            limiter.release(limiter.acquire(), "success")
+        assert int(limiter.limit) == 4
+        assert limiter.stats()["augmentations"] == 3
+
+    def test_limit_never_exceeds_max(self):
+        limiter = AdaptiveLimiter(initial=2, max_limit=2)
+        for _ in range(10):
+            limiter.release(limiter.acquire(), "success")
+        assert int(limiter.limit) == 2
+
+    def test_rate_limit_halves_limit(self):
+        limiter = AdaptiveLimiter(initial=8, max_limit=8)
+        limiter.release(limiter.acquire(), "rate_limited")
+        assert int(limiter.limit) == 4
+        assert limiter.stats()["decisions"][-1]["raison"] == "429"
+
+    def test_single_decrease_per_generation(self):
+        limiter = AdaptiveLimiter(initial=8, max_limit=8)
+        tokens = [limiter.acquire() for _ in range(4)]
+        for token in tokens:
+            limiter.release(token, "rate_limited")
+        assert int(limiter.limit) == 4
+        assert limiter.decreases == 1
+
+    def _release_after(self, limiter: AdaptiveLimiter, latency: float) -> None:
+        start, generation = limiter.acquire()
+        limiter.release((start - latency, generation), "success")
+
+    def test_sustained_latency_shift_becomes_baseline(self):
+        limiter = AdaptiveLimiter(initial=4, max_limit=4, min_spike=0.0)
+        for _ in range(5):
+            self._release_after(limiter, 0.010)
+        with self.assertLogs("fanga", level="WARNING") as logs:
+            for _ in range(200):
+                self._release_after(limiter, 0.030)
+        assert limiter.decreases <= 2
+        assert len(logs.output) == limiter.decreases
+        assert limiter.stats()["latence_reference"] > 0.025
+        assert int(limiter.limit) == 4
+
+    def test_small_absolute_jitter_is_not_a_spike(self):
+        limiter = AdaptiveLimiter(initial=4, max_limit=4)
+        self._release_after(limiter, 0.001)
+        self._release_after(limiter, 0.010)
+        assert limiter.decreases == 0
+
+    def test_limit_never_below_min(self):
+        limiter = AdaptiveLimiter(initial=1, min_limit=1)
+        for _ in range(5):
+            limiter.release(limiter.acquire(), "error")
+        assert int(limiter.limit) == 1
+
+    def test_ignored_outcome_does_not_adapt(self):
+        limiter = AdaptiveLimiter(initial=2, max_limit=8)
+        limiter.release(limiter.acquire(), "ignored")
+        assert limiter.limit == 2.0
+
+    def test_acquire_blocks_at_limit(self):
+        limiter = AdaptiveLimiter(initial=1, max_limit=1)
+        token = limiter.acquire()
+        acquired = threading.Event()
+
+        def worker():
+            limiter.release(limiter.acquire(), "ignored")
+            acquired.set()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        assert not acquired.wait(0.05)
+        limiter.release(token, "ignored")
+        assert acquired.wait(1)
+        thread.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.extraction_cache import ExtractionCache
+from src.extractor import FileExtractor
+
+
+class TestExtractionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ExtractionCache(os.path.join(self.tmp.name, "cache"))
+        self.extract = MagicMock(side_effect=FileExtractor().extract_content)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def _write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_hit_survives_rename(self):
+        path = self._write("facture.txt", "Facture 2050 FCFA".encode())
+        first = self.cache.fetch(path, ".txt", self.extract)
+        renamed = os.path.join(self.tmp.name, "copie.txt")
+        shutil.copy(path, renamed)
+        second = self.cache.fetch(renamed, ".txt", self.extract)
+        assert first == second
+        assert self.extract.call_count == 1
+        assert self.cache.stats()["succes"] == 1
+
+    def test_changed_content_or_version_misses(self):
+        path = self._write("a.txt", b"version un")
+        self.cache.fetch(path, ".txt", self.extract)
+        self._write("a.txt", b"version deux")
+        assert self.cache.fetch(path, ".txt", self.extract)["content"] == "version deux"
+        with patch("src.extraction_cache.EXTRACTOR_VERSION", 999):
+            self.cache.fetch(path, ".txt", self.extract)
+        assert self.extract.call_count == 3
+
+    def test_entries_persist_across_instances(self):
+        path = self._write("a.txt", b"contenu")
+        self.cache.fetch(path, ".txt", self.extract)
+        self.cache.close()
+        self.cache = ExtractionCache(os.path.join(self.tmp.name, "cache"))
+        self.cache.fetch(path, ".txt", self.extract)
+        assert self.extract.call_count == 1
+
+    def test_errors_are_not_cached(self):
+        path = self._write("a.txt", b"contenu")
+        failing = MagicMock(return_value={"type": "error", "content": "", "error": "boom"})
+        self.cache.fetch(path, ".txt", failing)
+        self.cache.fetch(path, ".txt", failing)
+        assert failing.call_count == 2
+
+    def test_image_payload_is_rebuilt_not_stored(self):
+        path = self._write("photo.jpg", b"\xff\xd8\xff" + os.urandom(20000))
+        first = self.cache.fetch(path, ".jpg", self.extract)
+        assert self.cache.stats()["taille_mo"] < 0.01
+        second = self.cache.fetch(path, ".jpg", self.extract)
+        assert second == first
+        assert self.extract.call_count == 1
+
+    def test_least_recently_used_entries_are_evicted(self):
+        paths = [self._write(f"f{i}.txt", os.urandom(600).hex().encode()) for i in range(10)]
+        for path in paths[:3]:
+            self.cache.fetch(path, ".txt", self.extract)
+        self.cache.max_bytes = self.cache._bytes * 2
+        self.cache.fetch(paths[0], ".txt", self.extract)
+        for path in paths[3:]:
+            self.cache.fetch(path, ".txt", self.extract)
+
+        stats = self.cache.stats()
+        assert stats["evictions"] > 0
+        assert self.cache._bytes <= self.cache.max_bytes
+        calls = self.extract.call_count
+        self.cache.fetch(paths[1], ".txt", self.extract)
+        assert self.extract.call_count == calls + 1
+
+
+if __name__ == "__main__":
+    unittest.main()
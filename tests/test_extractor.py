@@ -0,0 +1,144 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.extractor import _BACKENDS, FileExtractor, parse_backends
+
+INBOX = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fanga_inbox")
+
+
+class TestSniff(unittest.TestCase):
+
+    def setUp(self):
+        self.extractor = FileExtractor()
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_empty_file(self):
+        assert self.extractor.sniff(self._write("stub.pdf", b""))["decision"] == "vide"
+
+    def test_matching_extension_is_ok(self):
+        result = self.extractor.sniff(self._write("scan.pdf", b"%PDF-1.4\n..."))
+        assert result["decision"] == "ok"
+        assert result["type_detecte"] == ".pdf"
+
+    def test_png_named_pdf_is_corrected(self):
+        result = self.extractor.sniff(self._write("scan.pdf", b"\x89PNG\r\n\x1a\n" + b"\x00" * 32))
+        assert result["decision"] == "corrige"
+        assert result["type_detecte"] == ".png"
+
+    def test_jpeg_extension_alias(self):
+        result = self.extractor.sniff(self._write("photo.jpeg", b"\xff\xd8\xff\xe0" + b"\x00" * 32))
+        assert result["decision"] == "ok"
+
+    def test_garbage_with_supported_extension_is_rejected(self):
+        result = self.extractor.sniff(self._write("facture.pdf", b"\x00\x01\x02\x03garbage"))
+        assert result["decision"] == "non_supporte"
+
+    def test_text_with_unknown_extension_keeps_route(self):
+        result = self.extractor.sniff(self._write("notes.md", "Réunion équipe".encode("utf-8")))
+        assert result["decision"] == "ok"
+
+    def test_text_starting_like_bmp_is_not_an_image(self):
+        csv_result = self.extractor.sniff(self._write("parc.csv", b"BMW,Serie 3,2019\nAudi,A4,2020\n"))
+        assert csv_result["decision"] == "ok"
+        assert csv_result["type_detecte"] == ".csv"
+        txt_result = self.extractor.sniff(self._write("stations.txt", b"BM-001;station Nord\n"))
+        assert txt_result["decision"] == "ok"
+
+    def test_bmp_named_png_is_corrected(self):
+        pixels = b"\x00" * 16
+        header = b"BM" + (14 + 40 + len(pixels)).to_bytes(4, "little") + b"\x00" * 4 + (54).to_bytes(4, "little")
+        dib = (40).to_bytes(4, "little") + (2).to_bytes(4, "little") * 2 + b"\x01\x00\x18\x00" + b"\x00" * 24
+        result = self.extractor.sniff(self._write("photo.png", header + dib + pixels))
+        assert result["decision"] == "corrige"
+        assert result["type_detecte"] == ".bmp"
+
+    def test_docx_detected_inside_zip(self):
+        source = os.path.join(INBOX, "maintenance_batterie_ST-002.docx")
+        path = os.path.join(self.tmpdir.name, "maintenance.pdf")
+        shutil.copy(source, path)
+        result = self.extractor.sniff(path)
+        assert result["decision"] == "corrige"
+        assert result["type_detecte"] == ".docx"
+
+
+
+class TestBackends(unittest.TestCase):
+
+    def setUp(self):
+        self.pdf = os.path.join(INBOX, "contrat_aissata_kone_2024.pdf")
+
+    def _replace(self, name: str, func):
+        backend = _BACKENDS[name]
+        return patch.dict(_BACKENDS, {name: backend._replace(extract=func)})
+
+    def test_fast_pdf_backend_comes_first(self):
+        assert FileExtractor().chain(".pdf") == ["pdfium", "pdfplumber"]
+        result = FileExtractor().extract_content(self.pdf)
+        assert result["extraction_method"] == "pdfium"
+        assert "Aissata Kone" in result["content"]
+        assert "\r" not in result["content"]
+
+    def test_backends_agree_on_text(self):
+        fast = FileExtractor().extract_content(self.pdf)["content"]
+        layout = FileExtractor({".pdf": ["pdfplumber"]}).extract_content(self.pdf)["content"]
+        assert fast.split() == layout.split()
+
+    def test_failing_backend_falls_back(self):
+        def broken(filepath):
+            raise RuntimeError("corrupt xref")
+
+        with self._replace("pdfium", broken):
+            result = FileExtractor().extract_content(self.pdf)
+        assert result["extraction_method"] == "pdfplumber"
+
+    def test_missing_library_falls_back(self):
+        def missing(filepath):
+            raise ImportError("No module named 'pypdfium2'")
+
+        with self._replace("pdfium", missing):
+            assert FileExtractor().extract_content(self.pdf)["extraction_method"] == "pdfplumber"
+
+    def test_no_text_layer_goes_to_vision_without_other_backends(self):
+        calls = []
+        with self._replace("pdfium", lambda filepath: None), \
+                self._replace("pdfplumber", lambda filepath: calls.append(filepath)):
+            result = FileExtractor().extract_content(self.pdf)
+        assert result["type"] == "image"
+        assert calls == []
+
+    def test_every_backend_failing_is_an_error(self):
+        def broken(filepath):
+            raise RuntimeError("boom")
+
+        with self._replace("pdfium", broken), self._replace("pdfplumber", broken):
+            result = FileExtractor().extract_content(self.pdf)
+        assert result["type"] == "error"
+        assert "pdfium: boom" in result["error"]
+
+    def test_unknown_backend_rejected(self):
+        with self.assertRaises(ValueError):
+            FileExtractor({".pdf": ["openpyxl"]})
+
+    def test_parse_backends(self):
+        assert parse_backends(["pdf=pdfplumber, pdfium", ".DOCX=python-docx"]) == {
+            ".pdf": ["pdfplumber", "pdfium"],
+            ".docx": ["python-docx"],
+        }
+        with self.assertRaises(ValueError):
+            parse_backends(["pdf"])
+
+
+if __name__ == "__main__":
+    unittest.main()
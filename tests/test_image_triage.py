@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from src.image_triage import EXIF_MAKE, EXIF_MODEL, ImageTriage
+
+
+class TestImageTriage(unittest.TestCase):
+
+    def setUp(self):
+        self.triage = ImageTriage()
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_flat_image_at_screen_resolution_is_screenshot(self):
+        image = Image.new("RGB", (1080, 1920), (255, 255, 255))
+        draw = ImageDraw.Draw(image)
+        draw.rectangle((0, 0, 1080, 160), fill=(0, 120, 60))
+        draw.rectangle((80, 400, 1000, 520), fill=(230, 230, 230))
+        path = self._path("shot.png")
+        image.save(path)
+
+        result = self.triage.analyze(path)
+        assert result["category"] == "Autre"
+        assert result["description"] == "capture-ecran"
+
+    def test_noisy_camera_image_is_photo(self):
+        rng = np.random.default_rng(0)
+        pixels = rng.integers(0, 200, size=(300, 400, 3), dtype=np.uint8)
+        image = Image.fromarray(pixels)
+        exif = Image.Exif()
+        exif[EXIF_MAKE] = "samsung"
+        exif[EXIF_MODEL] = "SM-A125F"
+        path = self._path("photo.jpg")
+        image.save(path, exif=exif, quality=95)
+
+        result = self.triage.analyze(path)
+        assert result["category"] == "Photos"
+        assert "samsung" in result["reasoning"]
+
+    def test_ambiguous_image_goes_to_model(self):
+        image = Image.new("RGB", (500, 300), (200, 200, 200))
+        path = self._path("card.png")
+        image.save(path)
+        assert self.triage.analyze(path) is None
+
+    def test_unreadable_file_goes_to_model(self):
+        path = self._path("broken.jpg")
+        with open(path, "wb") as f:
+            f.write(b"not an image")
+        assert self.triage.analyze(path) is None
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import time
+import unittest
+
+from src.leases import LEASE_DIR, ConsistentHashRing, LeaseManager
+
+
+class TestLeaseManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.inbox = self.tmp.name
+        self.files = []
+        for i in range(20):
+            path = os.path.join(self.inbox, f"f{i}.txt")
+            with open(path, "w") as f:
+                f.write(str(i))
+            self.files.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_claim_is_exclusive(self):
+        a = LeaseManager(self.inbox, node_id="a")
+        b = LeaseManager(self.inbox, node_id="b")
+        assert a.claim(self.files[0])
+        assert not b.claim(self.files[0])
+        assert b.stats()["fichiers_pris_ailleurs"] == 1
+
+    def test_done_file_is_never_claimed_again(self):
+        a = LeaseManager(self.inbox, node_id="a")
+        b = LeaseManager(self.inbox, node_id="b")
+        assert a.claim(self.files[0])
+        a.complete(self.files[0])
+        assert not b.claim(self.files[0])
+        assert not a.claim(self.files[0])
+        assert b.stats()["fichiers_deja_traites"] == 1
+
+    def test_released_file_can_be_claimed(self):
+        a = LeaseManager(self.inbox, node_id="a")
+        b = LeaseManager(self.inbox, node_id="b")
+        a.claim(self.files[0])
+        a.release(self.files[0])
+        assert b.claim(self.files[0])
+
+    def test_expired_lease_is_taken_over(self):
+        crashed = LeaseManager(self.inbox, node_id="crashed", ttl=60)
+        assert crashed.claim(self.files[0])
+        lease = os.path.join(self.inbox, LEASE_DIR, os.listdir(os.path.join(self.inbox, LEASE_DIR))[0])
+        old = time.time() - 120
+        os.utime(lease, (old, old))
+
+        survivor = LeaseManager(self.inbox, node_id="survivor", ttl=60)
+        assert survivor.claim(self.files[0])
+        assert survivor.stats()["baux_expires_repris"] == 1
+
+    def test_heartbeat_keeps_lease_alive(self):
+        a = LeaseManager(self.inbox, node_id="a", ttl=0.3)
+        a.start()
+        try:
+            assert a.claim(self.files[0])
+            time.sleep(0.6)
+            assert not LeaseManager(self.inbox, node_id="b", ttl=0.3).claim(self.files[0])
+        finally:
+            a.stop()
+        assert LeaseManager(self.inbox, node_id="b", ttl=0.3).claim(self.files[0])
+
+    def test_shard_order_puts_own_files_first(self):
+        nodes = ["a", "b", "c"]
+        managers = [LeaseManager(self.inbox, node_id=n, shard_nodes=nodes) for n in nodes]
+        firsts = set()
+        for manager in managers:
+            ordered = manager.order(self.files)
+            assert sorted(ordered) == sorted(self.files)
+            own = [f for f in ordered if manager.ring.node_for(manager._relative(f)) == manager.node_id]
+            assert ordered[:len(own)] == own
+            firsts.update(own)
+        assert firsts == set(self.files)
+
+    def test_unknown_node_in_shard_rejected(self):
+        with self.assertRaises(ValueError):
+            LeaseManager(self.inbox, node_id="z", shard_nodes=["a", "b"])
+
+
+class TestConsistentHashRing(unittest.TestCase):
+
+    def test_adding_a_node_moves_few_keys(self):
+        keys = [f"facture_{i}.pdf" for i in range(2000)]
+        before = ConsistentHashRing(["a", "b", "c"])
+        after = ConsistentHashRing(["a", "b", "c", "d"])
+        moved = sum(before.node_for(k) != after.node_for(k) for k in keys)
+        assert moved < len(keys) * 0.4
+        assert all(after.node_for(k) == "d" for k in keys if before.node_for(k) != after.node_for(k))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from src.utils import PER_FILE, JsonLinesFormatter, PerFileRateFilter, setup_logging, stop_logging
+
+
+def _record(level: int = logging.INFO, per_file: bool = True) -> logging.LogRecord:
+    record = logging.LogRecord("fanga", level, __file__, 1, "Copied: %s", ("a.pdf",), None)
+    if per_file:
+        record.per_file = True
+    return record
+
+
+class TestPerFileRateFilter(unittest.TestCase):
+
+    def test_drops_per_file_lines_over_burst(self):
+        log_filter = PerFileRateFilter(rate=0.001, burst=2)
+        passed = [log_filter.filter(_record()) for _ in range(5)]
+        assert passed == [True, True, False, False, False]
+        assert log_filter.suppressed == 3
+
+    def test_warnings_and_run_level_lines_always_pass(self):
+        log_filter = PerFileRateFilter(rate=0.001, burst=1)
+        log_filter.filter(_record())
+        assert log_filter.filter(_record(logging.WARNING))
+        assert log_filter.filter(_record(per_file=False))
+
+    def test_zero_rate_disables_limit(self):
+        log_filter = PerFileRateFilter(rate=0)
+        assert all(log_filter.filter(_record()) for _ in range(100))
+
+
+class TestQueueLogging(unittest.TestCase):
+
+    def test_json_lines_written_by_listener(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            logger = setup_logging(tmp, json_lines=True, per_file_rate=0)
+            try:
+                logger.info("Copied: %s -> %s", "a.pdf", "out/a.pdf", extra=PER_FILE)
+            finally:
+                stop_logging()
+            assert not logger.handlers
+            with open(os.path.join(tmp, "pipeline.jsonl"), encoding="utf-8") as f:
+                entry = json.loads(f.readline())
+        assert entry["message"] == "Copied: a.pdf -> out/a.pdf"
+        assert entry["niveau"] == "INFO"
+
+    def test_formatter_includes_exception(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            import sys
+
+            record = logging.LogRecord("fanga", logging.ERROR, __file__, 1, "failed", (), sys.exc_info())
+        entry = json.loads(JsonLinesFormatter().format(record))
+        assert "ValueError: boom" in entry["exception"]
+
+
+if __name__ == "__main__":
+    unittest.main()
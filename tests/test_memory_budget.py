@@ -0,0 +1,52 @@
+import threading
+import unittest
+
+from src.memory_budget import MemoryBudget
+
+
+class TestMemoryBudget(unittest.TestCase):
+
+    def test_tracks_peak(self):
+        budget = MemoryBudget(100)
+        a = budget.acquire(40)
+        b = budget.acquire(50)
+        budget.release(a)
+        budget.release(b)
+        assert budget.in_use == 0
+        assert budget.peak == 90
+
+    def test_blocks_until_released(self):
+        budget = MemoryBudget(100)
+        held = budget.acquire(80)
+        acquired = threading.Event()
+
+        def worker():
+            budget.release(budget.acquire(50))
+            acquired.set()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        assert not acquired.wait(0.05)
+        budget.release(held)
+        assert acquired.wait(1)
+        thread.join()
+        assert budget.stats()["attentes"] == 1
+
+    def test_oversized_item_admitted_when_idle(self):
+        budget = MemoryBudget(100)
+        budget.release(budget.acquire(500))
+        assert budget.peak == 500
+
+    def test_resize_adjusts_reservation(self):
+        budget = MemoryBudget(100)
+        reserved = budget.acquire(60)
+        reserved = budget.resize(reserved, 10)
+        assert budget.in_use == 10
+        reserved = budget.resize(reserved, 150)
+        assert budget.in_use == 150
+        budget.release(reserved)
+        assert budget.in_use == 0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+from PIL import Image, ImageDraw
+
+from src.perceptual_hash import BKTree, dhash, hamming, perceptual_hash
+
+INBOX = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fanga_inbox")
+
+
+def _draw_scene(size=(320, 240)) -> Image.Image:
+    image = Image.new("RGB", size, (30, 90, 160))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((40, 60, 200, 200), fill=(240, 200, 40))
+    draw.ellipse((180, 20, 300, 140), fill=(200, 40, 40))
+    return image
+
+
+class TestDHash(unittest.TestCase):
+
+    def test_recompressed_copy_is_close(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            original = os.path.join(tmpdir, "station.png")
+            copy = os.path.join(tmpdir, "station_whatsapp.jpg")
+            _draw_scene().save(original)
+            _draw_scene().resize((160, 120)).save(copy, quality=30)
+
+            assert hamming(perceptual_hash(original), perceptual_hash(copy)) <= 6
+
+    def test_different_images_are_far(self):
+        flipped = _draw_scene().transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+        assert hamming(dhash(_draw_scene()), dhash(flipped)) > 10
+
+    def test_scanned_pdf_is_hashed_and_text_pdf_is_not(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            scanned = os.path.join(tmpdir, "scan.pdf")
+            _draw_scene().save(scanned)
+            assert hamming(perceptual_hash(scanned), dhash(_draw_scene())) <= 6
+        assert perceptual_hash(os.path.join(INBOX, "facture_station_cocody_mars.pdf")) is None
+
+    def test_non_image_returns_none(self):
+        with tempfile.NamedTemporaryFile(suffix=".csv") as f:
+            assert perceptual_hash(f.name) is None
+
+
+class TestBKTree(unittest.TestCase):
+
+    def test_query_within_distance(self):
+        tree = BKTree()
+        tree.add(0b0000, "a")
+        tree.add(0b0011, "b")
+        tree.add(0b1111, "c")
+        assert tree.query(0b0001, 1) == [(1, "a"), (1, "b")]
+        assert tree.query(0b0001, 0) == []
+        assert len(tree) == 3
+
+    def test_closest_match_first(self):
+        tree = BKTree()
+        for i, value in enumerate([0b1000, 0b1100, 0b1110]):
+            tree.add(value, i)
+        assert tree.query(0b1110, 2)[0] == (0, 2)
+
+    def test_empty_tree(self):
+        assert BKTree().query(123, 5) == []
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,309 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from src.pipeline import Pipeline
+from src.review_index import ReviewIndex
+from src.utils import AMBIGUOUS_FOLDER, stop_logging
+
+
+def _fake_create(**request):
+    time.sleep(0.02)
+    response = MagicMock()
+    response.usage.prompt_tokens = 100
+    response.usage.completion_tokens = 20
+    response.choices[0].message.content = json.dumps(
+        {"category": "Factures", "confidence": 0.9, "description": "facture", "reasoning": "r"}
+    )
+    return response
+
+
+class TestIterProcess(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.inbox = os.path.join(self.tmp.name, "inbox")
+        self.output = os.path.join(self.tmp.name, "out")
+        os.makedirs(self.inbox)
+        for i in range(6):
+            with open(os.path.join(self.inbox, f"facture_{i}.txt"), "w") as f:
+                f.write(f"Facture {i}")
+        with open(os.path.join(self.inbox, "vide.txt"), "w"):
+            pass
+
+    def tearDown(self):
+        stop_logging()
+        self.tmp.cleanup()
+
+    def _pipeline(self, workers: int = 2) -> Pipeline:
+        pipeline = Pipeline(self.inbox, self.output, api_key="x", workers=workers)
+        pipeline.classifier.client = MagicMock()
+        pipeline.classifier.client.chat.completions.create.side_effect = _fake_create
+        return pipeline
+
+    def _placed(self) -> list[str]:
+        return os.listdir(os.path.join(self.output, "Factures"))
+
+    def test_yields_every_file_once_placed(self):
+        seen = []
+        for record in self._pipeline().iter_process():
+            if record["statut"] == "succes":
+                assert record["nom_final"] in self._placed()
+            seen.append(record["nom_original"])
+        assert sorted(seen) == sorted(os.listdir(self.inbox))
+        assert not os.path.exists(os.path.join(self.tmp.name, "rapport_traitement.json"))
+
+    def test_rejected_file_is_yielded_as_ignored(self):
+        path = os.path.join(self.inbox, "vide.txt")
+        records = list(self._pipeline().iter_process([path]))
+        assert records == [{"nom_original": "vide.txt", "statut": "ignore", "raison": "Fichier vide"}]
+
+    def test_breaking_out_stops_queued_files(self):
+        pipeline = self._pipeline(workers=1)
+        stream = pipeline.iter_process()
+        next(stream)
+        stream.close()
+        assert len(self._placed()) < 6
+        assert pipeline.placement.journal is not None
+
+    def test_cancel_event(self):
+        cancel = threading.Event()
+        records = []
+        for record in self._pipeline(workers=1).iter_process(cancel=cancel):
+            records.append(record)
+            cancel.set()
+        # The file the single worker had already started is still yielded
+        assert 1 <= len(records) <= 2
+        assert sorted(r["nom_final"] for r in records if r["statut"] == "succes") == sorted(self._placed())
+
+    def test_cancel_yields_files_in_flight(self):
+        cancel = threading.Event()
+        records = []
+        for record in self._pipeline(workers=4).iter_process(cancel=cancel):
+            records.append(record)
+            cancel.set()
+        placed = [r for r in records if r["statut"] == "succes"]
+        assert sorted(r["nom_final"] for r in placed) == sorted(self._placed())
+        assert len(records) < 7
+
+    def test_caller_event_is_not_set_by_the_stream(self):
+        cancel = threading.Event()
+        pipeline = self._pipeline()
+        first = list(pipeline.iter_process(cancel=cancel))
+        assert not cancel.is_set()
+        second = list(pipeline.iter_process(cancel=cancel))
+        assert len(first) == len(second) == 7
+
+    def test_run_report_keeps_scan_order(self):
+        report = self._pipeline(workers=4).run()
+        names = [r["nom_original"] for r in report["fichiers"]]
+        assert names == sorted(names)
+        assert [r["nom_original"] for r in report["ignores"]] == ["vide.txt"]
+
+
+
+
+class TestPlanApply(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.inbox = os.path.join(self.tmp.name, "inbox")
+        self.output = os.path.join(self.tmp.name, "out")
+        self.plan_path = os.path.join(self.tmp.name, "plan.json")
+        os.makedirs(self.inbox)
+        for i in range(3):
+            with open(os.path.join(self.inbox, f"facture_{i}.txt"), "w") as f:
+                f.write(f"Facture {i}")
+
+    def tearDown(self):
+        stop_logging()
+        self.tmp.cleanup()
+
+    def _pipeline(self) -> Pipeline:
+        pipeline = Pipeline(self.inbox, self.output, api_key="x")
+        pipeline.classifier.client = MagicMock()
+        pipeline.classifier.client.chat.completions.create.side_effect = _fake_create
+        return pipeline
+
+    def _output_files(self) -> list[str]:
+        return [name for _, _, names in os.walk(self.output) for name in names if not name.startswith(".")]
+
+    def test_plan_touches_no_files_and_apply_reports_final_names(self):
+        self._pipeline().plan(self.plan_path)
+        assert os.path.exists(self.plan_path)
+        assert not os.path.exists(os.path.join(self.tmp.name, "rapport_traitement.json"))
+        assert self._output_files() == []
+        with open(self.plan_path, encoding="utf-8") as f:
+            planned = [entry["nom_final"] for entry in json.load(f)["fichiers"]]
+        assert len(set(planned)) == 3
+
+        report = self._pipeline().apply(self.plan_path)
+        placed = sorted(os.listdir(os.path.join(self.output, "Factures")))
+        assert sorted(r["nom_final"] for r in report["fichiers"]) == placed
+        assert placed == sorted(planned)
+        assert len(os.listdir(self.inbox)) == 3
+
+
+class TestRethreshold(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.inbox = os.path.join(self.tmp.name, "inbox")
+        self.output = os.path.join(self.tmp.name, "out")
+        os.makedirs(self.inbox)
+        for i in range(3):
+            with open(os.path.join(self.inbox, f"facture_{i}.txt"), "w") as f:
+                f.write(f"Facture {i}")
+
+    def tearDown(self):
+        stop_logging()
+        self.tmp.cleanup()
+
+    def _pipeline(self, **kwargs) -> Pipeline:
+        pipeline = Pipeline(self.inbox, self.output, api_key="x", **kwargs)
+        pipeline.classifier.client = MagicMock()
+        pipeline.classifier.client.chat.completions.create.side_effect = _fake_create
+        return pipeline
+
+    def _listdir(self, folder: str) -> list[str]:
+        path = os.path.join(self.output, folder)
+        return sorted(f for f in os.listdir(path) if not f.startswith(("revue", "."))) if os.path.isdir(path) else []
+
+    def test_rollback_undoes_rethreshold_then_run(self):
+        self._pipeline(move=True).run()
+        placed = self._listdir("Factures")
+        self._pipeline(threshold=0.95).rethreshold()
+        assert self._listdir(AMBIGUOUS_FOLDER) == placed
+
+        counts = self._pipeline().rollback()
+        assert counts["restaures"] == 3 and counts["absents"] == 0
+        assert self._listdir("Factures") == placed
+        assert ReviewIndex(os.path.join(self.output, AMBIGUOUS_FOLDER)).rows() == []
+
+        counts = self._pipeline().rollback()
+        assert counts["restaures"] == 3
+        assert sorted(os.listdir(self.inbox)) == [f"facture_{i}.txt" for i in range(3)]
+
+    def _run_mixed(self) -> dict:
+        # facture_0 comes back at 0.6, below the default 0.7 threshold
+        def create(**request):
+            response = _fake_create(**request)
+            if "Facture 0" in json.dumps(request["messages"], ensure_ascii=False):
+                response.choices[0].message.content = json.dumps(
+                    {"category": "Factures", "confidence": 0.6, "description": "facture", "reasoning": "r"}
+                )
+            return response
+
+        pipeline = self._pipeline()
+        pipeline.classifier.client.chat.completions.create.side_effect = create
+        return pipeline.run()
+
+    def _report(self) -> dict:
+        with open(os.path.join(self.tmp.name, "rapport_traitement.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _review_files(self) -> list[str]:
+        return sorted(row["fichier"] for row in ReviewIndex(os.path.join(self.output, AMBIGUOUS_FOLDER)).rows())
+
+    def test_lower_threshold_moves_only_the_ambiguous_file_out(self):
+        self._run_mixed()
+        ambiguous = self._listdir(AMBIGUOUS_FOLDER)
+        placed = self._listdir("Factures")
+        assert len(ambiguous) == 1 and self._review_files() == ambiguous
+
+        report = self._pipeline(threshold=0.5).rethreshold()
+        assert report["performance"]["reclassement_seuil"]["fichiers_deplaces"] == 1
+        assert self._listdir(AMBIGUOUS_FOLDER) == []
+        assert self._review_files() == []
+        assert set(placed) < set(self._listdir("Factures"))
+        saved = self._report()
+        assert {r["dossier"] for r in saved["fichiers"]} == {"Factures"}
+        assert sorted(r["nom_final"] for r in saved["fichiers"]) == self._listdir("Factures")
+
+    def test_higher_threshold_moves_confident_files_into_review(self):
+        self._run_mixed()
+        ambiguous = self._listdir(AMBIGUOUS_FOLDER)
+        self._pipeline(threshold=0.95).rethreshold()
+        assert self._listdir("Factures") == []
+        assert len(self._listdir(AMBIGUOUS_FOLDER)) == 3
+        assert self._review_files() == self._listdir(AMBIGUOUS_FOLDER)
+        # The file that was already in review keeps its name and row
+        assert set(ambiguous) < set(self._review_files())
+        assert {r["statut"] for r in self._report()["fichiers"]} == {"ambigu"}
+
+    def test_legacy_report_without_folder(self):
+        self._pipeline().run()
+        report = self._report()
+        for entry in report["fichiers"]:
+            del entry["dossier"]
+        with open(os.path.join(self.tmp.name, "rapport_traitement.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f)
+        result = self._pipeline(threshold=0.95).rethreshold()
+        assert result["erreurs"] == []
+        assert len(self._listdir(AMBIGUOUS_FOLDER)) == 3
+
+    def test_collision_in_target_folder_gets_a_suffix(self):
+        self._run_mixed()
+        ambiguous = self._listdir(AMBIGUOUS_FOLDER)[0]
+        # Another file already holds that name in Factures
+        with open(os.path.join(self.output, "Factures", ambiguous), "w") as f:
+            f.write("autre")
+        before = set(self._listdir("Factures"))
+        self._pipeline(threshold=0.5).rethreshold()
+        added = set(self._listdir("Factures")) - before
+        assert len(added) == 1
+        new_name = added.pop()
+        assert new_name != ambiguous and new_name.startswith(os.path.splitext(ambiguous)[0])
+        assert new_name in [r["nom_final"] for r in self._report()["fichiers"]]
+        with open(os.path.join(self.output, "Factures", ambiguous)) as f:
+            assert f.read() == "autre"
+
+class TestCoordinatedLeases(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.inbox = os.path.join(self.tmp.name, "inbox")
+        self.output = os.path.join(self.tmp.name, "out")
+        os.makedirs(self.inbox)
+        for i in range(3):
+            with open(os.path.join(self.inbox, f"facture_{i}.txt"), "w") as f:
+                f.write(f"Facture {i}")
+
+    def tearDown(self):
+        stop_logging()
+        self.tmp.cleanup()
+
+    def _pipeline(self, **kwargs) -> Pipeline:
+        pipeline = Pipeline(self.inbox, self.output, api_key="x", coordinate=True, node_id="a", **kwargs)
+        pipeline.classifier.client = MagicMock()
+        pipeline.classifier.client.chat.completions.create.side_effect = _fake_create
+        return pipeline
+
+    def _processed(self, report: dict) -> int:
+        return len([r for r in report["fichiers"] if r["statut"] == "succes"])
+
+    def test_dry_run_does_not_mark_files_done(self):
+        self._pipeline(dry_run=True).run()
+        report = self._pipeline().run()
+        assert self._processed(report) == 3
+
+    def test_failed_file_is_retried_by_the_next_run(self):
+        pipeline = self._pipeline()
+        process_file = pipeline._process_file
+
+        def failing(filepath, filename, duplicates):
+            if filename == "facture_1.txt":
+                raise OSError("disk error")
+            return process_file(filepath, filename, duplicates)
+
+        pipeline._process_file = failing
+        assert self._processed(pipeline.run()) == 2
+        retry = self._pipeline().run()
+        assert [r["nom_original"] for r in retry["fichiers"] if r["statut"] == "succes"] == ["facture_1.txt"]
+
+if __name__ == "__main__":
+    unittest.main()
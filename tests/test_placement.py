@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from src.placement import PlacementStage, latest_journal, rollback
+from src.review_index import ReviewIndex
+
+
+class TestPlacementStage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.inbox = os.path.join(self.tmp.name, "inbox")
+        self.output = os.path.join(self.tmp.name, "out")
+        os.makedirs(self.inbox)
+        os.makedirs(os.path.join(self.output, "Factures"))
+        os.makedirs(os.path.join(self.output, "A_verifier"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _source(self, name: str) -> str:
+        path = os.path.join(self.inbox, name)
+        with open(path, "w") as f:
+            f.write(name)
+        return path
+
+    def test_concurrent_names_do_not_collide(self):
+        stage = PlacementStage(self.output, workers=4)
+        names = [stage.submit(self._source(f"f{i}.txt"), "Factures", "facture.txt")[0] for i in range(5)]
+        stage.close()
+        assert len(set(names)) == 5
+        assert stage.placed == 5
+        assert sorted(os.listdir(os.path.join(self.output, "Factures"))) == sorted(names)
+
+    def test_rollback_copy_removes_files_and_review_rows(self):
+        review = ReviewIndex(os.path.join(self.output, "A_verifier"))
+        stage = PlacementStage(self.output, review=review)
+        source = self._source("a.txt")
+        note = {
+            "original_name": "a.txt",
+            "suggested_category": "Factures",
+            "confidence": 0.4,
+            "threshold": 0.7,
+            "reasoning": "",
+        }
+        stage.submit(source, "A_verifier", "a.txt", note)[1].result()
+        stage.close()
+        review.close()
+        assert review.stats()["fichiers_a_verifier"] == 1
+
+        counts = rollback(latest_journal(self.output))
+        assert counts["supprimes"] == 1
+        assert counts["revues_supprimees"] == 1
+        assert not os.path.exists(os.path.join(self.output, "A_verifier", "a.txt"))
+        assert ReviewIndex(os.path.join(self.output, "A_verifier")).rows() == []
+        assert os.path.exists(source)
+        assert latest_journal(self.output) is None
+
+    def test_rollback_move_restores_source(self):
+        stage = PlacementStage(self.output, move=True)
+        source = self._source("b.txt")
+        stage.submit(source, "Factures", "facture_b.txt")[1].result()
+        stage.close()
+        assert not os.path.exists(source)
+
+        counts = rollback(stage.journal.path)
+        assert counts["restaures"] == 1
+        assert os.path.exists(source)
+        assert os.listdir(os.path.join(self.output, "Factures")) == []
+
+    def test_failed_operation_releases_name(self):
+        stage = PlacementStage(self.output)
+        _, pending = stage.submit(os.path.join(self.inbox, "missing.txt"), "Factures", "x.txt")
+        with self.assertRaises(FileNotFoundError):
+            pending.result()
+        stage.close()
+        assert os.listdir(os.path.join(self.output, "Factures")) == []
+        assert rollback(stage.journal.path)["absents"] == 0
+
+
+if __name__ == "__main__":
+    unittest.main()
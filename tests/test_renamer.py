@@ -95,6 +95,67 @@ class TestFileRenamer(unittest.TestCase):
         assert name.startswith("2024-01-01_Contrats_")
         assert name.endswith(".pdf")
 
+    def test_full_date_from_filename(self):
+        for filename in ("IMG_20240315_1200.jpg", "releve_2024-03-15.pdf", "recu_15-03-2024.pdf"):
+            metadata = {"filename": filename, "extension": ".pdf"}
+            name = self.renamer.generate_name(metadata, {"category": "Factures", "description": "recu"})
+            assert name.startswith("2024-03-15"), filename
+
+    def test_full_date_from_content(self):
+        metadata = {"filename": "scan_001.pdf", "extension": ".pdf"}
+        classification = {"category": "Factures", "description": "facture"}
+        name = self.renamer.generate_name(metadata, classification, "FACTURE\nDate : 15/01/2024\nTotal 2050 FCFA")
+        assert name.startswith("2024-01-15")
+
+    def test_written_date_from_content(self):
+        metadata = {"filename": "courrier.docx", "extension": ".docx"}
+        classification = {"category": "Contrats", "description": "avenant"}
+        name = self.renamer.generate_name(metadata, classification, "Fait a Abidjan, le 1er février 2025")
+        assert name.startswith("2025-02-01")
+
+    def test_filename_year_and_month_beat_content(self):
+        metadata = {"filename": "facture_mars_2024.pdf", "extension": ".pdf"}
+        classification = {"category": "Factures", "description": "facture"}
+        name = self.renamer.generate_name(metadata, classification, "Date : 15/01/2023")
+        assert name.startswith("2024-03-01")
+
+    def test_content_year_alone_is_ignored(self):
+        from datetime import date
+        metadata = {"filename": "scan.pdf", "extension": ".pdf"}
+        classification = {"category": "Autre", "description": "scan"}
+        name = self.renamer.generate_name(metadata, classification, "Montant : 2030 FCFA")
+        assert name.startswith(date.today().strftime("%Y-%m-%d"))
+
+    def test_month_inside_word_is_not_a_month(self):
+        from datetime import date
+        metadata = {"filename": "maintenance_batterie.docx", "extension": ".docx"}
+        classification = {"category": "Maintenance", "description": "batterie"}
+        name = self.renamer.generate_name(metadata, classification)
+        assert name.startswith(date.today().strftime("%Y-%m-%d"))
+
+    def test_accented_month(self):
+        metadata = {"filename": "export_transactions_février_2024.csv", "extension": ".csv"}
+        classification = {"category": "Exports_donnees", "description": "transactions"}
+        assert self.renamer.generate_name(metadata, classification).startswith("2024-02-01")
+
+    def test_generate_names_matches_single_calls(self):
+        metadatas = [
+            {"filename": "contrat_2024.pdf", "extension": ".pdf"},
+            {"filename": "facture_mars.pdf", "extension": ".pdf"},
+            {"filename": "scan.pdf", "extension": ".pdf"},
+        ]
+        classifications = [
+            {"category": "Contrats", "description": "Contrat de location"},
+            {"category": "Factures", "description": "Contrat de location"},
+            {"category": "Factures"},
+        ]
+        texts = ["", "", "Date : 02/03/2024"]
+        names = self.renamer.generate_names(metadatas, classifications, texts)
+        assert names == [
+            self.renamer.generate_name(m, c, t) for m, c, t in zip(metadatas, classifications, texts)
+        ]
+        assert names[2] == "2024-03-02_Factures_unknown.pdf"
+
 
 class TestSanitizeEdgeCases(unittest.TestCase):
 
@@ -107,6 +168,12 @@ class TestSanitizeEdgeCases(unittest.TestCase):
     def test_french_accented_chars(self):
         assert sanitize_description("resume general") == "resume-general"
 
+    def test_whitespace_and_hyphen_runs(self):
+        assert sanitize_description("  -- bon\tde   commande--") == "bon-de-commande"
+
+    def test_underscores_are_dropped(self):
+        assert sanitize_description("bon_de commande") == "bonde-commande"
+
     def test_mixed_accents(self):
         result = sanitize_description("controle qualite superieure")
         assert "controle" in result
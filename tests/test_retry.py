@@ -0,0 +1,105 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.classifier import FileClassifier
+from src.retry import (
+    CircuitBreaker,
+    RetryPolicy,
+    is_retryable,
+    parse_duration,
+    retry_after_seconds,
+)
+
+
+class FakeAPIError(Exception):
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = MagicMock()
+        self.response.headers = headers or {}
+
+
+class TestRetryHelpers(unittest.TestCase):
+
+    def test_rate_limit_and_5xx_are_retryable(self):
+        assert is_retryable(FakeAPIError(429))
+        assert is_retryable(FakeAPIError(503))
+        assert is_retryable(TimeoutError())
+
+    def test_client_error_is_not_retryable(self):
+        assert not is_retryable(FakeAPIError(400))
+        assert not is_retryable(ValueError("bad"))
+
+    def test_parse_duration(self):
+        assert parse_duration("20ms") == 0.02
+        assert parse_duration("6m0s") == 360.0
+        assert parse_duration("garbage") is None
+
+    def test_retry_after_header(self):
+        assert retry_after_seconds(FakeAPIError(429, {"retry-after": "7"})) == 7.0
+        assert retry_after_seconds(FakeAPIError(429, {"retry-after-ms": "1500"})) == 1.5
+        assert retry_after_seconds(FakeAPIError(429, {"x-ratelimit-reset-requests": "2s"})) == 2.0
+        assert retry_after_seconds(FakeAPIError(429)) is None
+
+    def test_backoff_is_bounded(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=10.0)
+        for attempt in range(10):
+            assert 0.0 <= policy.compute_delay(attempt) <= 10.0
+
+    def test_hinted_delay_is_honored(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+        delay = policy.compute_delay(0, FakeAPIError(429, {"retry-after": "30"}))
+        assert 30.0 <= delay <= 30.1
+
+
+    def test_huge_hint_is_capped(self):
+        policy = RetryPolicy(base_delay=1.0, max_hint_delay=120.0)
+        for headers in ({"retry-after": "36000"}, {"x-ratelimit-reset-tokens": "10h"}):
+            delay = policy.compute_delay(0, FakeAPIError(429, headers))
+            assert 120.0 <= delay <= 120.1
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.stats()["ouvertures"] == 1
+
+    def test_half_open_trial_closes_on_success(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestClassifierRetries(unittest.TestCase):
+
+    @patch("src.classifier.time.sleep")
+    def test_rate_limit_is_retried_then_succeeds(self, _sleep):
+        classifier = FileClassifier(api_key="test-key")
+        response = MagicMock()
+        response.usage.prompt_tokens = 10
+        response.usage.completion_tokens = 5
+        response.choices[0].message.content = (
+            '{"category": "Factures", "confidence": 0.9, "description": "facture", "reasoning": "x"}'
+        )
+        classifier.client = MagicMock()
+        classifier.client.chat.completions.create.side_effect = [
+            FakeAPIError(429, {"retry-after": "0"}),
+            response,
+        ]
+        metadata = {"filename": "test.pdf", "extension": ".pdf", "size_human": "1.0 KB"}
+
+        result = classifier.classify(metadata, {"type": "text", "content": "facture"})
+        assert result["category"] == "Factures"
+        assert result["retries"] == 1
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from src.review_index import REVIEW_CSV, REVIEW_HTML, ReviewIndex
+
+
+class TestReviewIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.tmp.name, "A_verifier")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _add(self, index: ReviewIndex, name: str, confidence: float) -> None:
+        index.add(
+            filename=name,
+            original_name="scan.pdf",
+            suggested_category="Factures",
+            confidence=confidence,
+            threshold=0.7,
+            reasoning="<b>peu lisible</b>",
+        )
+
+    def test_rows_are_batched(self):
+        index = ReviewIndex(self.folder, batch_size=2)
+        self._add(index, "a.pdf", 0.5)
+        assert index._pending
+        self._add(index, "b.pdf", 0.3)
+        assert not index._pending
+        assert [row["fichier"] for row in index.rows()] == ["b.pdf", "a.pdf"]
+        index.close()
+
+    def test_close_exports_views_and_persists(self):
+        index = ReviewIndex(self.folder)
+        self._add(index, "a.pdf", 0.5)
+        index.close()
+
+        with open(os.path.join(self.folder, REVIEW_CSV), encoding="utf-8") as f:
+            assert [row["fichier"] for row in csv.DictReader(f)] == ["a.pdf"]
+        with open(os.path.join(self.folder, REVIEW_HTML), encoding="utf-8") as f:
+            page = f.read()
+        assert "&lt;b&gt;peu lisible&lt;/b&gt;" in page
+
+        reopened = ReviewIndex(self.folder)
+        self._add(reopened, "b.pdf", 0.6)
+        reopened.close()
+        assert reopened.stats()["fichiers_a_verifier"] == 2
+        assert not any(name.endswith("_NOTE.txt") for name in os.listdir(self.folder))
+
+    def test_note_files_export_and_remove(self):
+        index = ReviewIndex(self.folder, note_files=True)
+        self._add(index, "a.pdf", 0.5)
+        index.close()
+        assert os.path.exists(os.path.join(self.folder, "a_NOTE.txt"))
+
+        index = ReviewIndex(self.folder)
+        assert index.remove("a.pdf")
+        assert not os.path.exists(os.path.join(self.folder, "a_NOTE.txt"))
+        assert index.rows() == []
+        index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
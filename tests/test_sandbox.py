@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+from src.sandbox import ExtractionSandbox
+
+
+@unittest.skipUnless(hasattr(os, "mkfifo"), "needs named pipes")
+class TestExtractionSandbox(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.sandbox = ExtractionSandbox(workers=1, timeout=1.0)
+
+    def tearDown(self):
+        self.sandbox.close()
+        self.tmpdir.cleanup()
+
+    def test_extracts_in_subprocess(self):
+        path = os.path.join(self.tmpdir.name, "export.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("id,montant\n1,5000\n")
+        content = self.sandbox.extract_content(path)
+        assert content["type"] == "text"
+        assert "5000" in content["content"]
+
+    def test_hanging_file_times_out_and_worker_is_recycled(self):
+        # Opening a FIFO with no writer blocks forever, like a parser stuck in a loop
+        stuck = os.path.join(self.tmpdir.name, "stuck.csv")
+        os.mkfifo(stuck)
+        content = self.sandbox.extract_content(stuck)
+        assert content["type"] == "error"
+        assert content["timeout"] is True
+        assert self.sandbox.stats()["expirations"] == 1
+
+        path = os.path.join(self.tmpdir.name, "ok.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("a,b\n")
+        assert self.sandbox.extract_content(path)["type"] == "text"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from src.scheduler import estimate_cost, schedule
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.files = {
+            "a_scan.pdf": 5 * 1024 * 1024,
+            "b_export.csv": 2 * 1024,
+            "c_photo.jpg": 3 * 1024 * 1024,
+            "d_export.csv": 1024,
+            "e_facture.pdf": 40 * 1024,
+        }
+        self.paths = []
+        for name, size in self.files.items():
+            path = os.path.join(self.tmpdir.name, name)
+            with open(path, "wb") as f:
+                f.write(b"x" * size)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _names(self, paths):
+        return [os.path.basename(p) for p in paths]
+
+    def test_fifo_keeps_input_order(self):
+        assert schedule(self.paths, "fifo") == self.paths
+
+    def test_sjf_puts_small_csv_first(self):
+        order = self._names(schedule(self.paths, "sjf"))
+        assert order[:2] == ["d_export.csv", "b_export.csv"]
+        assert order[-1] == "a_scan.pdf"
+
+    def test_ljf_is_reverse_of_sjf(self):
+        assert schedule(self.paths, "ljf") == list(reversed(schedule(self.paths, "sjf")))
+
+    def test_fair_interleaves_types(self):
+        order = self._names(schedule(self.paths, "fair"))
+        assert [os.path.splitext(n)[1] for n in order[:3]] == [".csv", ".pdf", ".jpg"]
+        assert sorted(order) == sorted(self.files)
+
+    def test_scanned_pdf_costs_more_than_text_pdf(self):
+        assert estimate_cost("scan.pdf", 5 * 1024 * 1024) > estimate_cost("facture.pdf", 40 * 1024)
+
+    def test_unknown_policy_raises(self):
+        with self.assertRaises(ValueError):
+            schedule(self.paths, "random")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from src.pipeline import Pipeline
+from src.service import ClassificationService, LatencyTracker, MicroBatcher, make_server
+
+
+def _completion(payload: dict):
+    response = MagicMock()
+    response.usage.prompt_tokens = 100
+    response.usage.completion_tokens = 20
+    response.choices[0].message.content = json.dumps(payload)
+    return response
+
+
+def _answer(text: str) -> dict:
+    category = "Factures" if "facture" in text.lower() else "Autre"
+    return {"category": category, "confidence": 0.9, "description": "test doc", "reasoning": "r"}
+
+
+def _fake_create(**request):
+    text = request["messages"][-1]["content"][0]["text"]
+    if "### File" in text:
+        sections = text.split("### File ")[1:]
+        return _completion({"results": [_answer(section) for section in sections]})
+    return _completion(_answer(text))
+
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def test_concurrent_submissions_share_a_batch(self):
+        sizes = []
+        batcher = MicroBatcher(lambda items: sizes.append(len(items)) or [i * 2 for i in items], window=0.2)
+        futures = [batcher.submit(i) for i in range(5)]
+        assert [f.result() for f in futures] == [0, 2, 4, 6, 8]
+        batcher.close()
+        assert sizes == [5]
+        assert batcher.stats()["plus_grand_lot"] == 5
+
+    def test_max_batch_splits(self):
+        sizes = []
+        batcher = MicroBatcher(lambda items: sizes.append(len(items)) or items, window=0.2, max_batch=2)
+        futures = [batcher.submit(i) for i in range(5)]
+        [f.result() for f in futures]
+        batcher.close()
+        assert sorted(sizes) == [1, 2, 2]
+
+    def test_handler_error_reaches_every_caller(self):
+        def fail(items):
+            raise RuntimeError("boom")
+
+        batcher = MicroBatcher(fail, window=0.05)
+        futures = [batcher.submit(i) for i in range(3)]
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result()
+        batcher.close()
+
+    def test_latency_percentiles(self):
+        tracker = LatencyTracker()
+        for ms in range(1, 101):
+            tracker.record(ms / 1000)
+        stats = tracker.stats()
+        assert stats["echantillons"] == 100
+        assert stats["p50"] == 51.0
+        assert stats["p99"] == 100.0
+
+
+class TestClassificationService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pipeline = Pipeline(self.tmp.name, os.path.join(self.tmp.name, "out"), api_key="x")
+        self.create = MagicMock(side_effect=_fake_create)
+        self.pipeline.classifier.client = MagicMock()
+        self.pipeline.classifier.client.chat.completions.create = self.create
+        self.service = ClassificationService(self.pipeline, window=0.2)
+        self.server = make_server(self.service, "127.0.0.1", 0)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+        self.tmp.cleanup()
+
+    def _write(self, name: str, text: str) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def _post(self, path: str, body: bytes, content_type: str) -> tuple[int, dict]:
+        request = urllib.request.Request(self.url + path, data=body, headers={"Content-Type": content_type})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def _classify_path(self, path: str) -> tuple[int, dict]:
+        return self._post("/classify", json.dumps({"path": path}).encode(), "application/json")
+
+    def test_concurrent_requests_are_batched(self):
+        paths = [self._write(f"facture_{i}.txt", f"Facture numero {i}") for i in range(4)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            answers = list(pool.map(self._classify_path, paths))
+
+        assert all(status == 200 for status, _ in answers)
+        assert all(result["categorie"] == "Factures" for _, result in answers)
+        assert self.create.call_count < 4
+        with urllib.request.urlopen(self.url + "/metrics") as response:
+            metrics = json.loads(response.read())
+        assert metrics["requetes"] == 4
+        assert metrics["micro_lots"]["requetes_groupees"] == 4
+        assert metrics["latence_ms"]["echantillons"] == 4
+
+    def test_raw_upload_keeps_original_name(self):
+        status, result = self._post("/classify?filename=facture_mars.txt", b"Facture mars", "text/plain")
+        assert status == 200
+        assert result["nom_original"] == "facture_mars.txt"
+        assert result["nom_suggere"].endswith(".txt")
+
+    def test_errors_map_to_status_codes(self):
+        assert self._classify_path(os.path.join(self.tmp.name, "missing.txt"))[0] == 404
+        assert self._classify_path(self._write("vide.txt", ""))[0] == 422
+        assert self._post("/classify", b"{}", "application/json")[0] == 400
+        assert self._post("/classify", b"data", "text/plain")[0] == 400
+
+
+class TestServiceSandbox(unittest.TestCase):
+
+    def test_service_extracts_in_the_sandbox(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pipeline = Pipeline(tmp, os.path.join(tmp, "out"), api_key="x", sandbox=True)
+            pipeline.classifier.client = MagicMock()
+            pipeline.classifier.client.chat.completions.create.side_effect = _fake_create
+            # In-process extraction would mean the sandbox was skipped
+            pipeline.extractor.extract_content = MagicMock(side_effect=AssertionError("not sandboxed"))
+            service = ClassificationService(pipeline, window=0.01)
+            try:
+                path = os.path.join(tmp, "facture.txt")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write("Facture station")
+                assert service.classify(path)["categorie"] == "Factures"
+                assert "extraction_isolee" in service.metrics()
+            finally:
+                service.close()
+            assert pipeline.sandbox is None
+
+if __name__ == "__main__":
+    unittest.main()
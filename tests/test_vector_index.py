@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from src.vector_index import VectorIndex
+
+
+class TestVectorIndex(unittest.TestCase):
+
+    def test_empty_index_returns_no_match(self):
+        index = VectorIndex()
+        assert index.query([1.0, 0.0]) == []
+
+    def test_nearest_neighbour(self):
+        index = VectorIndex()
+        index.add([[1.0, 0.0], [0.0, 1.0]], [{"category": "Factures"}, {"category": "Contrats"}])
+        score, label = index.query([0.9, 0.1])[0]
+        assert label["category"] == "Factures"
+        assert 0.9 < score <= 1.0
+
+    def test_batch_query_orders_by_similarity(self):
+        index = VectorIndex()
+        index.add([[1.0, 0.0], [0.7, 0.7], [0.0, 1.0]], [{"id": 0}, {"id": 1}, {"id": 2}])
+        results = index.query_batch([[1.0, 0.1], [0.1, 1.0]], k=2)
+        assert [label["id"] for _, label in results[0]] == [0, 1]
+        assert [label["id"] for _, label in results[1]] == [2, 1]
+
+    def test_incremental_add_grows_matrix(self):
+        index = VectorIndex()
+        for i in range(200):
+            index.add([[float(i + 1), 1.0]], [{"id": i}])
+        assert len(index) == 200
+
+    def test_dimension_mismatch_raises(self):
+        index = VectorIndex()
+        index.add([[1.0, 0.0]], [{"id": 0}])
+        with self.assertRaises(ValueError):
+            index.add([[1.0, 0.0, 0.0]], [{"id": 1}])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "index.npz")
+            index = VectorIndex()
+            index.add([[1.0, 0.0]], [{"category": "Maintenance", "description": "rapport-batterie"}])
+            index.save(path)
+
+            loaded = VectorIndex.load(path)
+            assert len(loaded) == 1
+            assert loaded.query([1.0, 0.0])[0][1]["description"] == "rapport-batterie"
+
+    def test_load_missing_file_is_empty(self):
+        assert len(VectorIndex.load("/tmp/nonexistent_index_abc123.npz")) == 0
+
+
+if __name__ == "__main__":
+    unittest.main()